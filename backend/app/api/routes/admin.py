@@ -0,0 +1,77 @@
+"""
+Admin API endpoints
+Operational tools for production debugging; disabled unless ADMIN_TOKEN is set
+"""
+import asyncio
+import secrets
+import threading
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from app.core.config import settings
+from app.core.profiler import SamplingProfiler, loop_entry_code
+
+
+router = APIRouter()
+
+# One profile at a time: concurrent samplers would skew each other's overhead
+_profile_lock = asyncio.Lock()
+
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Checks the X-Admin-Token header against ADMIN_TOKEN"""
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+@router.get(
+    "/profile",
+    response_class=PlainTextResponse,
+    summary="Sample the event loop",
+    description="""
+    Samples the event loop thread's stack every `interval_ms` for `seconds` and returns
+    collapsed stacks (`frame;frame;frame count`), ready for flamegraph.pl, inferno or
+    speedscope. Fire real traffic while it runs.
+    """,
+    dependencies=[Depends(require_admin)]
+)
+async def profile_event_loop(
+    seconds: float = Query(10, gt=0, le=60, description="Sampling duration"),
+    interval_ms: float = Query(5, ge=1, le=100, description="Time between samples"),
+    include_idle: bool = Query(False, description="Keep samples of the loop waiting for I/O"),
+    lines: bool = Query(False, description="Add line numbers to frames")
+) -> PlainTextResponse:
+    """
+    Low-overhead profile of everything the event loop runs (routes, engines, Pydantic
+    validation, row conversion), without redeploying under cProfile.
+    """
+    if _profile_lock.locked():
+        raise HTTPException(status_code=409, detail="A profile is already running")
+
+    async with _profile_lock:
+        profiler = SamplingProfiler(
+            threading.get_ident(),
+            interval=interval_ms / 1000,
+            include_idle=include_idle,
+            lines=lines,
+            idle_code=loop_entry_code(asyncio.get_running_loop())
+        )
+        profiler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profiler.stop()
+
+    print(f"🔥 Profiled event loop for {seconds}s: {profiler.samples} samples, {profiler.idle_samples} idle")
+    return PlainTextResponse(
+        profiler.collapsed(),
+        headers={
+            "Content-Disposition": 'attachment; filename="profile.collapsed"',
+            "X-Profile-Samples": str(profiler.samples),
+            "X-Profile-Idle-Samples": str(profiler.idle_samples),
+        }
+    )
@@ -1,11 +1,13 @@
 """
 Analytics API Routes
 """
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from datetime import date, timedelta
 from typing import Optional
 
 from app.core.database import get_db, Database
+from app.core.admission import route_class
+from app.core.query_budget import query_budget
 from app.services.analytics_engine import AnalyticsEngine
 from app.models.schemas import (
     OverviewResponse,
@@ -20,6 +22,7 @@ from app.models.schemas import (
     StoresListResponse,
     Brand,
     Store,
+    CompareTo,
 )
 
 router = APIRouter()
@@ -30,11 +33,39 @@ def get_analytics_engine(db: Database = Depends(get_db)) -> AnalyticsEngine:
     return AnalyticsEngine(db)
 
 
+def get_comparison_period(
+    engine: AnalyticsEngine,
+    start_date: date,
+    end_date: date,
+    compare_to: Optional[CompareTo]
+) -> Optional[dict]:
+    """
+    Comparison period information for responses (None without compare_to)
+    
+    Raises:
+        HTTPException 400: if the comparison window would overlap the period
+    """
+    if not compare_to:
+        return None
+    
+    try:
+        previous_start, previous_end = engine.get_comparison_window(start_date, end_date, compare_to)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "compare_to": compare_to,
+        "start_date": previous_start.isoformat(),
+        "end_date": previous_end.isoformat()
+    }
+
+
 # ============================================================================
 # BRANDS & STORES ENDPOINTS
 # ============================================================================
 
 @router.get("/brands/list", response_model=BrandsListResponse)
+@query_budget(queries=1)
+@route_class("light")
 async def get_brands_list(db: Database = Depends(get_db)):
     """
     Get list of all brands (owners/proprietários)
@@ -62,6 +93,8 @@ async def get_brands_list(db: Database = Depends(get_db)):
 
 
 @router.get("/stores/list", response_model=StoresListResponse)
+@query_budget(queries=1)
+@route_class("light")
 async def get_stores_list(
     brand_id: int = Query(..., description="Brand ID to filter stores"),
     db: Database = Depends(get_db)
@@ -110,12 +143,15 @@ async def get_stores_list(
 # ============================================================================
 
 @router.get("/overview", response_model=OverviewResponse)
+@query_budget(queries=1)
+@route_class("heavy")
 async def get_overview(
     start_date: date = Query(..., description="Start date (YYYY-MM-DD)"),
     end_date: date = Query(..., description="End date (YYYY-MM-DD)"),
     brand_id: Optional[int] = Query(None, description="Brand ID to filter by owner"),
     store_ids: Optional[str] = Query(None, description="Comma-separated store IDs"),
     channel_ids: Optional[str] = Query(None, description="Comma-separated channel IDs"),
+    compare_to: Optional[CompareTo] = Query(None, description="Compare with 'previous' period or 'yoy' (year over year)"),
     engine: AnalyticsEngine = Depends(get_analytics_engine)
 ):
     """
@@ -128,18 +164,33 @@ async def get_overview(
     - Completed/cancelled sales
     - Cancellation rate
     - Total unique customers
+    
+    With compare_to, metrics carry deltas vs the comparison period
+    (both windows are computed in a single query).
     """
     # Parse comma-separated IDs
     store_ids_list = [int(x) for x in store_ids.split(",")] if store_ids else None
     channel_ids_list = [int(x) for x in channel_ids.split(",")] if channel_ids else None
     
-    metrics = await engine.get_overview_metrics(
-        start_date=start_date,
-        end_date=end_date,
-        brand_id=brand_id,
-        store_ids=store_ids_list,
-        channel_ids=channel_ids_list
-    )
+    comparison_period = get_comparison_period(engine, start_date, end_date, compare_to)
+    
+    if compare_to:
+        metrics = await engine.get_overview_comparison(
+            compare_to=compare_to,
+            start_date=start_date,
+            end_date=end_date,
+            brand_id=brand_id,
+            store_ids=store_ids_list,
+            channel_ids=channel_ids_list
+        )
+    else:
+        metrics = await engine.get_overview_metrics(
+            start_date=start_date,
+            end_date=end_date,
+            brand_id=brand_id,
+            store_ids=store_ids_list,
+            channel_ids=channel_ids_list
+        )
     
     days_diff = (end_date - start_date).days + 1
     
@@ -149,7 +200,8 @@ async def get_overview(
             "start_date": start_date.isoformat(),
             "end_date": end_date.isoformat(),
             "days": days_diff
-        }
+        },
+        comparison_period=comparison_period
     )
 
 
@@ -158,6 +210,8 @@ async def get_overview(
 # ============================================================================
 
 @router.get("/products/top", response_model=ProductsResponse)
+@query_budget(queries=1)
+@route_class("heavy")
 async def get_top_products(
     start_date: date = Query(..., description="Start date (YYYY-MM-DD)"),
     end_date: date = Query(..., description="End date (YYYY-MM-DD)"),
@@ -203,11 +257,14 @@ async def get_top_products(
 # ============================================================================
 
 @router.get("/channels", response_model=ChannelsResponse)
+@query_budget(queries=1)
+@route_class("heavy")
 async def get_channel_metrics(
     start_date: date = Query(..., description="Start date (YYYY-MM-DD)"),
     end_date: date = Query(..., description="End date (YYYY-MM-DD)"),
     brand_id: Optional[int] = Query(None, description="Brand ID to filter by owner"),
     store_ids: Optional[str] = Query(None, description="Comma-separated store IDs"),
+    compare_to: Optional[CompareTo] = Query(None, description="Compare with 'previous' period or 'yoy' (year over year)"),
     engine: AnalyticsEngine = Depends(get_analytics_engine)
 ):
     """
@@ -218,15 +275,29 @@ async def get_channel_metrics(
     - Total revenue
     - Average ticket
     - Revenue share %
+    
+    With compare_to, each row carries deltas vs the comparison period
+    (both windows are computed in a single query).
     """
     store_ids_list = [int(x) for x in store_ids.split(",")] if store_ids else None
     
-    channels = await engine.get_channel_metrics(
-        start_date=start_date,
-        end_date=end_date,
-        brand_id=brand_id,
-        store_ids=store_ids_list
-    )
+    comparison_period = get_comparison_period(engine, start_date, end_date, compare_to)
+    
+    if compare_to:
+        channels = await engine.get_channel_comparison(
+            compare_to=compare_to,
+            start_date=start_date,
+            end_date=end_date,
+            brand_id=brand_id,
+            store_ids=store_ids_list
+        )
+    else:
+        channels = await engine.get_channel_metrics(
+            start_date=start_date,
+            end_date=end_date,
+            brand_id=brand_id,
+            store_ids=store_ids_list
+        )
     
     return ChannelsResponse(
         channels=channels,
@@ -234,7 +305,8 @@ async def get_channel_metrics(
         period={
             "start_date": start_date.isoformat(),
             "end_date": end_date.isoformat()
-        }
+        },
+        comparison_period=comparison_period
     )
 
 
@@ -243,11 +315,14 @@ async def get_channel_metrics(
 # ============================================================================
 
 @router.get("/stores", response_model=StoresResponse)
+@query_budget(queries=1)
+@route_class("heavy")
 async def get_store_metrics(
     start_date: date = Query(..., description="Start date (YYYY-MM-DD)"),
     end_date: date = Query(..., description="End date (YYYY-MM-DD)"),
     brand_id: Optional[int] = Query(None, description="Brand ID to filter by owner"),
     channel_ids: Optional[str] = Query(None, description="Comma-separated channel IDs"),
+    compare_to: Optional[CompareTo] = Query(None, description="Compare with 'previous' period or 'yoy' (year over year)"),
     engine: AnalyticsEngine = Depends(get_analytics_engine)
 ):
     """
@@ -258,15 +333,29 @@ async def get_store_metrics(
     - Total revenue
     - Average ticket
     - Revenue share %
+    
+    With compare_to, each row carries deltas vs the comparison period
+    (both windows are computed in a single query).
     """
     channel_ids_list = [int(x) for x in channel_ids.split(",")] if channel_ids else None
     
-    stores = await engine.get_store_metrics(
-        start_date=start_date,
-        end_date=end_date,
-        brand_id=brand_id,
-        channel_ids=channel_ids_list
-    )
+    comparison_period = get_comparison_period(engine, start_date, end_date, compare_to)
+    
+    if compare_to:
+        stores = await engine.get_store_comparison(
+            compare_to=compare_to,
+            start_date=start_date,
+            end_date=end_date,
+            brand_id=brand_id,
+            channel_ids=channel_ids_list
+        )
+    else:
+        stores = await engine.get_store_metrics(
+            start_date=start_date,
+            end_date=end_date,
+            brand_id=brand_id,
+            channel_ids=channel_ids_list
+        )
     
     return StoresResponse(
         stores=stores,
@@ -274,7 +363,8 @@ async def get_store_metrics(
         period={
             "start_date": start_date.isoformat(),
             "end_date": end_date.isoformat()
-        }
+        },
+        comparison_period=comparison_period
     )
 
 
@@ -283,12 +373,15 @@ async def get_store_metrics(
 # ============================================================================
 
 @router.get("/sales/trend", response_model=SalesTrendResponse)
+@query_budget(queries=1)
+@route_class("heavy")
 async def get_sales_trend(
     start_date: date = Query(..., description="Start date (YYYY-MM-DD)"),
     end_date: date = Query(..., description="End date (YYYY-MM-DD)"),
     brand_id: Optional[int] = Query(None, description="Brand ID to filter by owner"),
     store_ids: Optional[str] = Query(None, description="Comma-separated store IDs"),
     channel_ids: Optional[str] = Query(None, description="Comma-separated channel IDs"),
+    compare_to: Optional[CompareTo] = Query(None, description="Compare with 'previous' period or 'yoy' (year over year)"),
     engine: AnalyticsEngine = Depends(get_analytics_engine)
 ):
     """
@@ -299,24 +392,40 @@ async def get_sales_trend(
     - Revenue
     - Average ticket
     - Completed/cancelled count
+    
+    With compare_to, each day carries deltas vs the matching day of the
+    comparison period (both windows are computed in a single query).
     """
     store_ids_list = [int(x) for x in store_ids.split(",")] if store_ids else None
     channel_ids_list = [int(x) for x in channel_ids.split(",")] if channel_ids else None
     
-    trend = await engine.get_sales_trend(
-        start_date=start_date,
-        end_date=end_date,
-        brand_id=brand_id,
-        store_ids=store_ids_list,
-        channel_ids=channel_ids_list
-    )
+    comparison_period = get_comparison_period(engine, start_date, end_date, compare_to)
+    
+    if compare_to:
+        trend = await engine.get_sales_trend_comparison(
+            compare_to=compare_to,
+            start_date=start_date,
+            end_date=end_date,
+            brand_id=brand_id,
+            store_ids=store_ids_list,
+            channel_ids=channel_ids_list
+        )
+    else:
+        trend = await engine.get_sales_trend(
+            start_date=start_date,
+            end_date=end_date,
+            brand_id=brand_id,
+            store_ids=store_ids_list,
+            channel_ids=channel_ids_list
+        )
     
     return SalesTrendResponse(
         trend=trend,
         period={
             "start_date": start_date.isoformat(),
             "end_date": end_date.isoformat()
-        }
+        },
+        comparison_period=comparison_period
     )
 
 
@@ -325,6 +434,8 @@ async def get_sales_trend(
 # ============================================================================
 
 @router.get("/sales/hourly", response_model=HourlyDistributionResponse)
+@query_budget(queries=1)
+@route_class("heavy")
 async def get_hourly_distribution(
     start_date: date = Query(..., description="Start date (YYYY-MM-DD)"),
     end_date: date = Query(..., description="End date (YYYY-MM-DD)"),
@@ -359,6 +470,8 @@ async def get_hourly_distribution(
 
 
 @router.get("/sales/weekday", response_model=WeekdayDistributionResponse)
+@query_budget(queries=1)
+@route_class("heavy")
 async def get_weekday_distribution(
     start_date: date = Query(..., description="Start date (YYYY-MM-DD)"),
     end_date: date = Query(..., description="End date (YYYY-MM-DD)"),
@@ -397,12 +510,15 @@ async def get_weekday_distribution(
 # ============================================================================
 
 @router.get("/categories", response_model=CategoriesResponse)
+@query_budget(queries=1)
+@route_class("heavy")
 async def get_category_metrics(
     start_date: date = Query(..., description="Start date (YYYY-MM-DD)"),
     end_date: date = Query(..., description="End date (YYYY-MM-DD)"),
     brand_id: Optional[int] = Query(None, description="Brand ID to filter by owner"),
     store_ids: Optional[str] = Query(None, description="Comma-separated store IDs"),
     channel_ids: Optional[str] = Query(None, description="Comma-separated channel IDs"),
+    compare_to: Optional[CompareTo] = Query(None, description="Compare with 'previous' period or 'yoy' (year over year)"),
     engine: AnalyticsEngine = Depends(get_analytics_engine)
 ):
     """
@@ -413,17 +529,32 @@ async def get_category_metrics(
     - Total revenue
     - Average price
     - Revenue share %
+    
+    With compare_to, each row carries deltas vs the comparison period
+    (both windows are computed in a single query).
     """
     store_ids_list = [int(x) for x in store_ids.split(",")] if store_ids else None
     channel_ids_list = [int(x) for x in channel_ids.split(",")] if channel_ids else None
     
-    categories = await engine.get_category_metrics(
-        start_date=start_date,
-        end_date=end_date,
-        brand_id=brand_id,
-        store_ids=store_ids_list,
-        channel_ids=channel_ids_list
-    )
+    comparison_period = get_comparison_period(engine, start_date, end_date, compare_to)
+    
+    if compare_to:
+        categories = await engine.get_category_comparison(
+            compare_to=compare_to,
+            start_date=start_date,
+            end_date=end_date,
+            brand_id=brand_id,
+            store_ids=store_ids_list,
+            channel_ids=channel_ids_list
+        )
+    else:
+        categories = await engine.get_category_metrics(
+            start_date=start_date,
+            end_date=end_date,
+            brand_id=brand_id,
+            store_ids=store_ids_list,
+            channel_ids=channel_ids_list
+        )
     
     return CategoriesResponse(
         categories=categories,
@@ -431,6 +562,7 @@ async def get_category_metrics(
         period={
             "start_date": start_date.isoformat(),
             "end_date": end_date.isoformat()
-        }
+        },
+        comparison_period=comparison_period
     )
 
@@ -1,11 +1,13 @@
 """
 Advanced Analytics API Routes - Delivery, Customer RFM, Contextual Analysis
 """
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from datetime import date
 from typing import Optional
 
 from app.core.database import get_db, Database
+from app.core.admission import route_class
+from app.core.query_budget import query_budget
 from app.services.analytics_advanced import AdvancedAnalyticsEngine
 from app.models.schemas import (
     DeliveryPerformanceResponse,
@@ -29,6 +31,8 @@ def get_advanced_engine(db: Database = Depends(get_db)) -> AdvancedAnalyticsEngi
 # ============================================================================
 
 @router.get("/delivery/performance", response_model=DeliveryPerformanceResponse)
+@query_budget(queries=3)
+@route_class("heavy")
 async def get_delivery_performance(
     start_date: date = Query(..., description="Start date (YYYY-MM-DD)"),
     end_date: date = Query(..., description="End date (YYYY-MM-DD)"),
@@ -79,11 +83,15 @@ async def get_delivery_performance(
 # ============================================================================
 
 @router.get("/customers/rfm", response_model=CustomerRFMResponse)
+@query_budget(queries=1)
+@route_class("heavy")
 async def get_customer_rfm(
     start_date: date = Query(..., description="Start date (YYYY-MM-DD)"),
     end_date: date = Query(..., description="End date (YYYY-MM-DD)"),
     brand_id: Optional[int] = Query(None, description="Brand ID to filter by owner"),
     reference_date: Optional[date] = Query(None, description="Reference date for recency calculation"),
+    page_size: int = Query(1000, ge=1, le=1000, description="Customers per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     engine: AdvancedAnalyticsEngine = Depends(get_advanced_engine)
 ):
     """
@@ -94,38 +102,44 @@ async def get_customer_rfm(
     - Regular: Consistent buyers
     - At Risk: Haven't returned in 30+ days
     - Inactive: Haven't returned in 60+ days
-    """
-    customers = await engine.get_customer_rfm(
-        start_date=start_date,
-        end_date=end_date,
-        brand_id=brand_id,
-        reference_date=reference_date
-    )
     
-    # Count by segment
-    segments = {}
-    for customer in customers:
-        segment = customer.rfm_segment
-        segments[segment] = segments.get(segment, 0) + 1
+    Paginated: pass the returned next_cursor to fetch the following page
+    (total_customers and segment counts cover every page).
+    """
+    try:
+        customers, segments, next_cursor = await engine.get_customer_rfm(
+            start_date=start_date,
+            end_date=end_date,
+            brand_id=brand_id,
+            reference_date=reference_date,
+            page_size=page_size,
+            cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     return CustomerRFMResponse(
         customers=customers,
-        total_customers=len(customers),
+        total_customers=sum(segments.values()),
         segments=segments,
         period={
             "start_date": start_date.isoformat(),
             "end_date": end_date.isoformat()
-        }
+        },
+        next_cursor=next_cursor
     )
 
 
 @router.get("/customers/churn-risk", response_model=ChurnRiskResponse)
+@query_budget(queries=1)
+@route_class("heavy")
 async def get_churn_risk_customers(
     min_purchases: int = Query(3, ge=1, description="Minimum number of purchases"),
     days_inactive: int = Query(30, ge=1, description="Days since last purchase"),
     brand_id: Optional[int] = Query(None, description="Brand ID to filter by owner"),
     store_ids: Optional[str] = Query(None, description="Comma-separated store IDs"),
-    limit: int = Query(100, ge=1, le=500, description="Maximum number of customers"),
+    limit: int = Query(100, ge=1, le=500, description="Customers per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     engine: AdvancedAnalyticsEngine = Depends(get_advanced_engine)
 ):
     """
@@ -138,19 +152,25 @@ async def get_churn_risk_customers(
     - Haven't returned in Y days
     - Their favorite channel and product
     - Can be filtered by specific stores
+    
+    Paginated: pass the returned next_cursor to fetch the following page.
     """
     # Parse store_ids from comma-separated string
     store_id_list = None
     if store_ids:
         store_id_list = [int(sid.strip()) for sid in store_ids.split(",") if sid.strip()]
     
-    customers = await engine.get_churn_risk_customers(
-        min_purchases=min_purchases,
-        days_inactive=days_inactive,
-        brand_id=brand_id,
-        store_ids=store_id_list,
-        limit=limit
-    )
+    try:
+        customers, next_cursor = await engine.get_churn_risk_customers(
+            min_purchases=min_purchases,
+            days_inactive=days_inactive,
+            brand_id=brand_id,
+            store_ids=store_id_list,
+            limit=limit,
+            cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     return ChurnRiskResponse(
         customers=customers,
@@ -161,7 +181,8 @@ async def get_churn_risk_customers(
         },
         period={
             "analysis_date": "current"
-        }
+        },
+        next_cursor=next_cursor
     )
 
 
@@ -170,6 +191,8 @@ async def get_churn_risk_customers(
 # ============================================================================
 
 @router.get("/products/by-context", response_model=ProductByContextResponse)
+@query_budget(queries=1)
+@route_class("heavy")
 async def get_products_by_context(
     start_date: date = Query(..., description="Start date (YYYY-MM-DD)"),
     end_date: date = Query(..., description="End date (YYYY-MM-DD)"),
@@ -194,7 +217,7 @@ async def get_products_by_context(
     """
     store_ids_list = [int(x) for x in store_ids.split(",")] if store_ids else None
     
-    products = await engine.get_products_by_context(
+    products, context = await engine.get_products_by_context(
         start_date=start_date,
         end_date=end_date,
         brand_id=brand_id,
@@ -206,14 +229,8 @@ async def get_products_by_context(
         limit=limit
     )
     
-    context = {}
-    if weekday is not None:
-        weekday_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-        context['weekday'] = weekday_names[weekday]
-    if hour_start is not None and hour_end is not None:
-        context['hour_range'] = f"{hour_start:02d}:00-{hour_end:02d}:00"
     if channel_id is not None:
-        context['channel_id'] = channel_id
+        context = {**context, 'channel_id': channel_id}
     
     return ProductByContextResponse(
         products=products,
@@ -231,6 +248,8 @@ async def get_products_by_context(
 # ============================================================================
 
 @router.get("/stores/performance", response_model=StoresResponse)
+@query_budget(queries=1)
+@route_class("heavy")
 async def get_store_performance(
     start_date: date = Query(..., description="Start date (YYYY-MM-DD)"),
     end_date: date = Query(..., description="End date (YYYY-MM-DD)"),
@@ -285,6 +304,8 @@ async def get_store_performance(
 # ============================================================================
 
 @router.get("/sales/heatmap", response_model=SalesHeatmapResponse)
+@query_budget(queries=1)
+@route_class("heavy")
 async def get_sales_heatmap(
     start_date: date = Query(..., description="Start date (YYYY-MM-DD)"),
     end_date: date = Query(..., description="End date (YYYY-MM-DD)"),
@@ -7,6 +7,8 @@ from datetime import date
 from typing import Optional
 
 from app.core.database import get_db, Database
+from app.core.admission import route_class
+from app.core.query_budget import query_budget
 from app.models.schemas import InsightsResponse
 from app.services.insights import InsightsEngine
 
@@ -27,6 +29,8 @@ router = APIRouter()
     Returns prioritized insights with actionable recommendations.
     """
 )
+@query_budget(queries=7)
+@route_class("heavy")
 async def get_automatic_insights(
     start_date: date = Query(..., description="Start date for analysis period"),
     end_date: date = Query(..., description="End date for analysis period"),
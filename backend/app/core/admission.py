@@ -0,0 +1,171 @@
+"""
+Admission control per route class and elastic pool sizing
+
+Routes declare a class with @route_class("light" | "heavy"). Each class has its own
+concurrency limit and statement timeout: heavy analytics can hold at most
+ADMISSION_HEAVY_CONCURRENCY requests (and so connections) at once, which keeps the
+rest of the pool free for light lookups such as /brands/list. A request that waits
+longer than ADMISSION_QUEUE_TIMEOUT_SECONDS for a slot gets a 503 with Retry-After.
+
+PoolAutoscaler raises the Database connection limit toward DB_POOL_SIZE +
+DB_MAX_OVERFLOW while acquires keep waiting, and lowers it back once the extra
+connections go unused; asyncpg closes the idle ones (DB_POOL_IDLE_SECONDS).
+"""
+import asyncio
+import functools
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+from fastapi import HTTPException
+
+from .config import settings
+from .database import ConcurrencyLimit, Database, db, statement_timeout
+from .metrics import (
+    admission_in_flight,
+    admission_rejected,
+    admission_wait,
+    admission_waiting,
+    registry,
+)
+
+
+@dataclass
+class RouteClass:
+    name: str
+    concurrency: int
+    statement_timeout: float
+    limit: ConcurrencyLimit = field(init=False)
+
+    def __post_init__(self):
+        self.limit = ConcurrencyLimit(self.concurrency)
+
+
+ROUTE_CLASSES = {
+    # Lookups that fill filters: one small query, must stay fast under any load
+    "light": RouteClass("light", settings.ADMISSION_LIGHT_CONCURRENCY, settings.LIGHT_STATEMENT_TIMEOUT_SECONDS),
+    # Aggregations over sales
+    "heavy": RouteClass("heavy", settings.ADMISSION_HEAVY_CONCURRENCY, settings.HEAVY_STATEMENT_TIMEOUT_SECONDS),
+}
+
+
+async def admit(route_class: RouteClass):
+    """Wait for a slot of `route_class`; 503 after ADMISSION_QUEUE_TIMEOUT_SECONDS"""
+    started = time.perf_counter()
+    try:
+        await asyncio.wait_for(route_class.limit.acquire(), settings.ADMISSION_QUEUE_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        admission_rejected.inc(route_class.name)
+        raise HTTPException(
+            status_code=503,
+            detail=f"Server busy: too many {route_class.name} requests in flight",
+            headers={"Retry-After": "1"}
+        )
+    finally:
+        admission_wait.observe(route_class.name, value=time.perf_counter() - started)
+
+
+def route_class(name: str):
+    """Route decorator (below @router.get) running the endpoint under its class's limit and timeout"""
+    declared = ROUTE_CLASSES[name]
+
+    def decorator(endpoint):
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            if not settings.ADMISSION_ENABLED:
+                return await endpoint(*args, **kwargs)
+            await admit(declared)
+            try:
+                with statement_timeout(declared.statement_timeout):
+                    return await endpoint(*args, **kwargs)
+            finally:
+                declared.limit.release()
+
+        wrapper.route_class = declared
+        return wrapper
+    return decorator
+
+
+async def collect_admission():
+    """Metrics collector: slots in use and waiters per class"""
+    for declared in ROUTE_CLASSES.values():
+        admission_in_flight.set(declared.name, value=declared.limit.in_use)
+        admission_waiting.set(declared.name, value=declared.limit.waiting)
+
+
+registry.add_collector(collect_admission)
+
+
+# ============================================================================
+# POOL SIZING
+# ============================================================================
+
+class PoolAutoscaler:
+    """Grows the connection limit under sustained waiters, shrinks it when the extra is idle"""
+
+    def __init__(self, db: Database, interval_seconds: float = 0.5,
+                 grow_after_seconds: float = 2.0, shrink_after_seconds: float = 60.0):
+        self.db = db
+        self.interval_seconds = interval_seconds
+        self.grow_after_seconds = grow_after_seconds
+        self.shrink_after_seconds = shrink_after_seconds
+        self._busy_since: Optional[float] = None
+        self._idle_since: Optional[float] = None
+        self._queued = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start resizing (call from the app lifespan)"""
+        if not self._task:
+            self._queued = self.db.pool_stats.queued
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            self.tick(time.monotonic())
+
+    def tick(self, now: float):
+        limit = self.db.connection_limit
+        queued, self._queued = self.db.pool_stats.queued - self._queued, self.db.pool_stats.queued
+
+        if limit.waiting or queued:
+            # Every tick since _busy_since saw waiters or queued acquires
+            self._idle_since = None
+            if self._busy_since is None:
+                self._busy_since = now
+            if now - self._busy_since >= self.grow_after_seconds and limit.limit < limit.ceiling:
+                previous, waiting = limit.limit, limit.waiting
+                limit.resize(limit.limit + max(waiting, 1))
+                self._busy_since = now
+                print(f"📈 DB connection limit {previous} -> {limit.limit} ({waiting} waiting)")
+            return
+
+        self._busy_since = None
+        if limit.limit > limit.base and limit.in_use <= limit.limit // 2:
+            if self._idle_since is None:
+                self._idle_since = now
+            if now - self._idle_since >= self.shrink_after_seconds:
+                previous = limit.limit
+                limit.resize(max(limit.in_use, (limit.limit + limit.base) // 2))
+                self._idle_since = now
+                print(f"📉 DB connection limit {previous} -> {limit.limit}")
+        else:
+            self._idle_since = None
+
+
+# Global autoscaler of the app's Database (started from the app lifespan)
+pool_autoscaler = PoolAutoscaler(
+    db,
+    grow_after_seconds=settings.DB_POOL_GROW_AFTER_SECONDS,
+    shrink_after_seconds=settings.DB_POOL_SHRINK_AFTER_SECONDS
+)
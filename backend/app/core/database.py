@@ -1,47 +1,525 @@
 """
 Database connection and session management
 """
+import asyncio
+import json
+import re
+import sys
+import time
 import asyncpg
-from typing import AsyncGenerator
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import date, datetime, time as dt_time
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, AsyncGenerator, Callable
 from .config import settings
 
 
+class ConcurrencyLimit:
+    """
+    FIFO limit on concurrent holders whose size can change at runtime
+
+    Unlike asyncio.Semaphore it is not bound to an event loop and can be resized:
+    growing wakes waiters at once, shrinking lets current holders finish.
+    """
+    
+    def __init__(self, limit: int, ceiling: int | None = None):
+        self.base = limit
+        self.limit = limit
+        self.ceiling = max(ceiling or limit, limit)
+        self.in_use = 0
+        self._waiters: deque[asyncio.Future] = deque()
+    
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+    
+    @property
+    def full(self) -> bool:
+        return self.in_use >= self.limit
+    
+    async def acquire(self):
+        if not self.full and not self._waiters:
+            self.in_use += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            # release() hands the slot over (in_use already counts it)
+            await waiter
+        except BaseException:
+            if waiter.done() and not waiter.cancelled():
+                # Granted right as we were cancelled: pass it on
+                self.release()
+            else:
+                self._waiters.remove(waiter)
+            raise
+    
+    def release(self):
+        self.in_use -= 1
+        self._wake()
+    
+    def resize(self, limit: int) -> int:
+        """Set the limit within [base, ceiling]; returns the new limit"""
+        self.limit = max(self.base, min(self.ceiling, limit))
+        self._wake()
+        return self.limit
+    
+    def _wake(self):
+        while self._waiters and not self.full:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_use += 1
+                waiter.set_result(None)
+
+
+# Per-request statement timeout (seconds), set by the route class (app/core/admission.py)
+_statement_timeout: ContextVar[float | None] = ContextVar("statement_timeout", default=None)
+
+
+@contextmanager
+def statement_timeout(seconds: float | None):
+    """Queries run inside this block time out (and are cancelled) after `seconds`"""
+    token = _statement_timeout.set(seconds)
+    try:
+        yield
+    finally:
+        _statement_timeout.reset(token)
+
+
+class PoolStats:
+    """Connection acquire counters: how long requests wait for a free pool connection"""
+    
+    def __init__(self):
+        self.acquires = 0
+        self.queued = 0
+        self.waiting = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+    
+    def record(self, wait_seconds: float, queued: bool):
+        self.acquires += 1
+        self.queued += queued
+        self.wait_seconds += wait_seconds
+        self.max_wait_seconds = max(self.max_wait_seconds, wait_seconds)
+    
+    def snapshot(self, pool: asyncpg.Pool | None = None, limit: ConcurrencyLimit | None = None) -> dict:
+        """Counters since startup, plus the current pool occupancy"""
+        stats = {
+            "acquires": self.acquires,
+            "queued": self.queued,
+            "waiting": self.waiting,
+            "wait_seconds": round(self.wait_seconds, 6),
+            "max_wait_seconds": round(self.max_wait_seconds, 6),
+        }
+        if pool:
+            stats["size"] = pool.get_size()
+            stats["idle"] = pool.get_idle_size()
+            stats["max_size"] = pool.get_max_size()
+        if limit:
+            # Connections the app may hold right now (grows toward max_size under load)
+            stats["limit"] = limit.limit
+        return stats
+
+
+# ============================================================================
+# READ REPLICAS
+# ============================================================================
+
+# Primary's WAL position when a lag check starts
+PRIMARY_LSN_SQL = "SELECT pg_current_wal_lsn()::text"
+
+# 0 on a primary, or on a replica that has replayed the primary's WAL up to $1.
+# Otherwise the age of its last replayed transaction: a replica whose WAL receiver
+# disconnected has replayed all it received, yet falls further behind every second.
+REPLICA_LAG_SQL = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() THEN 0
+    WHEN pg_last_wal_replay_lsn() >= $1::text::pg_lsn THEN 0
+    ELSE EXTRACT(EPOCH FROM now() - COALESCE(pg_last_xact_replay_timestamp(), pg_postmaster_start_time()))
+END::float8
+"""
+
+# SQL reading "now": its result depends on the latest writes
+_RECENT_SQL = re.compile(r"\b(?:CURRENT_DATE|CURRENT_TIMESTAMP|NOW\s*\()", re.IGNORECASE)
+
+
+@dataclass
+class Replica:
+    """Read-only server: its pool and how far it lags behind the primary"""
+    name: str
+    dsn: str
+    pool: asyncpg.Pool | None = None
+    # None until measured, or when the last check failed: the replica serves no reads
+    lag_seconds: float | None = None
+    stats: PoolStats = field(default_factory=PoolStats)
+    
+    def status(self) -> dict:
+        return {
+            "name": self.name,
+            "lag_seconds": None if self.lag_seconds is None else round(self.lag_seconds, 3),
+            "pool": self.stats.snapshot(self.pool),
+        }
+
+
+def _reads_recent_data(query: str, args: tuple) -> bool:
+    """
+    Whether a query may read today's data: a date/timestamp parameter reaching today
+    (engine periods are bound as parameters) or SQL relative to now
+    """
+    today = date.today()
+    for value in args:
+        if isinstance(value, datetime):
+            value = value.date()
+        if isinstance(value, date) and value >= today:
+            return True
+    return bool(_RECENT_SQL.search(query))
+
+
+_use_primary: ContextVar[bool] = ContextVar("use_primary", default=False)
+
+
+@contextmanager
+def read_from_primary():
+    """Reads inside this block go to the primary (state that writers depend on)"""
+    token = _use_primary.set(True)
+    try:
+        yield
+    finally:
+        _use_primary.reset(token)
+
+
+# ============================================================================
+# QUERY INSTRUMENTATION
+# ============================================================================
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w$.])-?\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+
+@lru_cache(maxsize=1024)
+def normalize_sql(query: str) -> str:
+    """One-line SQL with literals replaced by ? (groups queries built with inline values)"""
+    normalized = _STRING_LITERAL.sub("?", query)
+    normalized = _NUMBER_LITERAL.sub("?", normalized)
+    normalized = _IN_LIST.sub("(?)", normalized)
+    return " ".join(normalized.split())
+
+
+def _value_size(value: Any) -> int:
+    """Approximate size of a decoded value"""
+    if value is None:
+        return 0
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    if isinstance(value, (bool, int, float, Decimal, date, datetime, dt_time)):
+        return 8
+    if isinstance(value, (list, tuple)):
+        return sum(_value_size(item) for item in value)
+    return len(str(value))
+
+
+def _format_param(value: Any) -> Any:
+    """JSON-friendly parameter, long arrays and strings truncated"""
+    if isinstance(value, (list, tuple)):
+        shown = [_format_param(item) for item in value[:10]]
+        if len(value) > 10:
+            shown.append(f"... (+{len(value) - 10})")
+        return shown
+    if isinstance(value, str) and len(value) > 200:
+        return value[:200] + "..."
+    if isinstance(value, (date, datetime, dt_time, Decimal)):
+        return str(value)
+    return value
+
+
+def _calling_method() -> str:
+    """Qualified name of the first function up the stack that is not a Database method"""
+    frame = sys._getframe(1)
+    while frame and isinstance(frame.f_locals.get("self"), Database):
+        frame = frame.f_back
+    if not frame:
+        return "unknown"
+    return getattr(frame.f_code, "co_qualname", frame.f_code.co_name)
+
+
+@dataclass
+class QueryEvent:
+    """One query run through Database: who ran it and where the time went"""
+    method: str
+    operation: str
+    query: str
+    params: tuple
+    acquire_ms: float
+    execution_ms: float
+    rows: int
+    error: str | None = None
+    server: str = "primary"
+    result: Any = field(default=None, repr=False)
+    
+    @property
+    def duration_ms(self) -> float:
+        return self.acquire_ms + self.execution_ms
+    
+    @property
+    def result_bytes(self) -> int:
+        """
+        Approximate size of the decoded result (asyncpg does not expose wire bytes)
+        
+        Computed on demand: walks every value of the result.
+        """
+        if self.result is None:
+            return 0
+        records = self.result if isinstance(self.result, list) else [self.result]
+        if not records or not isinstance(records[0], asyncpg.Record):
+            return 0
+        return sum(_value_size(value) for record in records for value in record.values())
+    
+    def to_log_entry(self) -> dict:
+        return {
+            "method": self.method,
+            "operation": self.operation,
+            "server": self.server,
+            "duration_ms": round(self.duration_ms, 2),
+            "acquire_ms": round(self.acquire_ms, 2),
+            "execution_ms": round(self.execution_ms, 2),
+            "rows": self.rows,
+            "bytes": self.result_bytes,
+            "error": self.error,
+            "sql": normalize_sql(self.query),
+            "params": [_format_param(param) for param in self.params],
+        }
+
+
+class SlowQueryLog:
+    """Query hook printing a JSON line for each query slower than the threshold"""
+    
+    def __init__(self, threshold_ms: float):
+        self.threshold_ms = threshold_ms
+    
+    def __call__(self, event: QueryEvent):
+        if event.duration_ms < self.threshold_ms:
+            return
+        entry = {"event": "slow_query", "threshold_ms": self.threshold_ms, **event.to_log_entry()}
+        print(json.dumps(entry, default=str, ensure_ascii=False), flush=True)
+
+
+def _row_count(operation: str, result: Any) -> int:
+    if operation == "fetch_all":
+        return len(result)
+    if operation == "fetch_one":
+        return int(result is not None)
+    # execute() returns the command tag, e.g. "UPDATE 12" or "REFRESH MATERIALIZED VIEW"
+    count = str(result).rsplit(" ", 1)[-1]
+    return int(count) if count.isdigit() else 0
+
+
 class Database:
     """Database connection pool manager"""
     
-    def __init__(self):
+    def __init__(self, read_urls: list[str] | None = None):
         self.pool: asyncpg.Pool | None = None
+        self.pool_stats = PoolStats()
+        # Connections in use: DB_POOL_SIZE normally, up to + DB_MAX_OVERFLOW under sustained waiters
+        self.connection_limit = ConcurrencyLimit(
+            settings.DB_POOL_SIZE,
+            ceiling=settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+        )
+        self.query_hooks: list[Callable[[QueryEvent], None]] = []
+        if read_urls is None:
+            read_urls = [url.strip() for url in settings.DATABASE_READ_URLS.split(",") if url.strip()]
+        self.replicas = [Replica(f"replica-{i}", url) for i, url in enumerate(read_urls)]
+        self._next_replica = 0
+        self._replica_monitor: asyncio.Task | None = None
+        if settings.SLOW_QUERY_THRESHOLD_MS > 0:
+            self.add_query_hook(SlowQueryLog(settings.SLOW_QUERY_THRESHOLD_MS))
+    
+    def add_query_hook(self, hook: Callable[[QueryEvent], None]):
+        """Call `hook` with a QueryEvent after every query (hooks must not block)"""
+        self.query_hooks.append(hook)
     
     async def connect(self):
-        """Create database connection pool"""
+        """Create database connection pool (and one per read replica)"""
         if not self.pool:
             self.pool = await asyncpg.create_pool(
                 dsn=settings.DATABASE_URL,
-                min_size=5,
-                max_size=settings.DB_POOL_SIZE,
-                command_timeout=60,
+                min_size=settings.DB_POOL_MIN_SIZE,
+                max_size=self.connection_limit.ceiling,
+                command_timeout=settings.DB_COMMAND_TIMEOUT,
+                # Connections opened while the limit was raised close once idle
+                max_inactive_connection_lifetime=settings.DB_POOL_IDLE_SECONDS,
             )
+        for replica in self.replicas:
+            if replica.pool:
+                continue
+            try:
+                replica.pool = await asyncpg.create_pool(
+                    dsn=replica.dsn,
+                    min_size=1,
+                    max_size=settings.DB_POOL_SIZE,
+                    command_timeout=settings.DB_COMMAND_TIMEOUT,
+                    max_inactive_connection_lifetime=settings.DB_POOL_IDLE_SECONDS,
+                )
+            except (OSError, asyncpg.PostgresError) as e:
+                # Reads fall back to the primary until the next restart
+                print(f"⚠️  Read replica {replica.name} unavailable: {e}")
+        if self.replicas and not self._replica_monitor:
+            await self.check_replica_lag()
+            self._replica_monitor = asyncio.create_task(self._monitor_replicas())
     
     async def disconnect(self):
-        """Close database connection pool"""
+        """Close database connection pools"""
+        if self._replica_monitor:
+            self._replica_monitor.cancel()
+            try:
+                await self._replica_monitor
+            except asyncio.CancelledError:
+                pass
+            self._replica_monitor = None
+        for replica in self.replicas:
+            if replica.pool:
+                await replica.pool.close()
+                replica.pool = None
         if self.pool:
             await self.pool.close()
             self.pool = None
     
+    async def check_replica_lag(self):
+        """Measure each replica's replay lag against the primary; unreachable replicas stop serving reads"""
+        try:
+            primary_lsn = await self.pool.fetchval(PRIMARY_LSN_SQL, timeout=2)
+        except (OSError, asyncio.TimeoutError, asyncpg.PostgresError) as e:
+            # Lag is unknown: keep the last measurements until the next check
+            print(f"⚠️  Replica lag check skipped, primary unavailable: {e}")
+            return
+        for replica in self.replicas:
+            if not replica.pool:
+                continue
+            try:
+                replica.lag_seconds = await replica.pool.fetchval(REPLICA_LAG_SQL, primary_lsn, timeout=2)
+            except (OSError, asyncio.TimeoutError, asyncpg.PostgresError) as e:
+                if replica.lag_seconds is not None:
+                    print(f"⚠️  Read replica {replica.name} check failed: {e}")
+                replica.lag_seconds = None
+    
+    async def _monitor_replicas(self):
+        while True:
+            await asyncio.sleep(settings.REPLICA_LAG_CHECK_SECONDS)
+            await self.check_replica_lag()
+    
+    def replica_status(self) -> list[dict]:
+        return [replica.status() for replica in self.replicas]
+    
+    def _read_target(self, query: str, args: tuple) -> Replica | None:
+        """
+        Replica to run a read on, round-robin; None for the primary
+        
+        Replicas lagging more than REPLICA_MAX_LAG_SECONDS only serve reads that cannot
+        touch today's data, so the latest sales are read from the primary.
+        """
+        if not self.replicas or _use_primary.get():
+            return None
+        candidates = [r for r in self.replicas if r.pool and r.lag_seconds is not None]
+        if candidates and _reads_recent_data(query, args):
+            candidates = [r for r in candidates if r.lag_seconds <= settings.REPLICA_MAX_LAG_SECONDS]
+        if not candidates:
+            return None
+        self._next_replica = (self._next_replica + 1) % len(candidates)
+        return candidates[self._next_replica]
+    
+    @asynccontextmanager
+    async def acquire(self, replica: Replica | None = None) -> AsyncGenerator[asyncpg.Connection, None]:
+        """Connection of the primary (within the connection limit) or of `replica`, recording how long the caller waited for it"""
+        if replica:
+            pool, stats, limit = replica.pool, replica.stats, None
+        else:
+            pool, stats, limit = self.pool, self.pool_stats, self.connection_limit
+        # No free slot under the limit, or no idle connection and no room to open one: this acquire queues
+        queued = (limit is not None and limit.full) or (pool.get_idle_size() == 0 and pool.get_size() >= pool.get_max_size())
+        started = time.perf_counter()
+        stats.waiting += 1
+        try:
+            if limit:
+                await limit.acquire()
+            try:
+                connection = await pool.acquire()
+            except BaseException:
+                if limit:
+                    limit.release()
+                raise
+        finally:
+            stats.waiting -= 1
+        stats.record(time.perf_counter() - started, queued)
+        try:
+            yield connection
+        finally:
+            try:
+                await pool.release(connection)
+            finally:
+                if limit:
+                    limit.release()
+    
+    async def _run(self, operation: str, query: str, args: tuple, timeout: float | None = None):
+        """Run a query on a pool connection and report it to the query hooks"""
+        method = _calling_method() if self.query_hooks else ""
+        if timeout is None:
+            timeout = _statement_timeout.get()
+        # Writes (execute) always run on the primary
+        replica = self._read_target(query, args) if operation != "execute" else None
+        started = time.perf_counter()
+        async with self.acquire(replica) as connection:
+            acquired = time.perf_counter()
+            result = None
+            error = None
+            try:
+                if operation == "fetch_one":
+                    result = await connection.fetchrow(query, *args, timeout=timeout)
+                elif operation == "fetch_all":
+                    result = await connection.fetch(query, *args, timeout=timeout)
+                else:
+                    result = await connection.execute(query, *args, timeout=timeout)
+                return result
+            except BaseException as e:
+                error = type(e).__name__
+                raise
+            finally:
+                if self.query_hooks:
+                    self._emit(QueryEvent(
+                        method=method,
+                        operation=operation,
+                        query=query,
+                        params=args,
+                        acquire_ms=(acquired - started) * 1000,
+                        execution_ms=(time.perf_counter() - acquired) * 1000,
+                        rows=_row_count(operation, result) if error is None else 0,
+                        error=error,
+                        server=replica.name if replica else "primary",
+                        result=result
+                    ))
+    
+    def _emit(self, event: QueryEvent):
+        for hook in self.query_hooks:
+            try:
+                hook(event)
+            except Exception as e:
+                # Instrumentation must never fail a query
+                print(f"⚠️  Query hook {hook!r} failed: {e}")
+    
     async def fetch_one(self, query: str, *args):
         """Fetch single row"""
-        async with self.pool.acquire() as connection:
-            return await connection.fetchrow(query, *args)
+        return await self._run("fetch_one", query, args)
     
     async def fetch_all(self, query: str, *args):
         """Fetch all rows"""
-        async with self.pool.acquire() as connection:
-            return await connection.fetch(query, *args)
+        return await self._run("fetch_all", query, args)
     
-    async def execute(self, query: str, *args):
-        """Execute query"""
-        async with self.pool.acquire() as connection:
-            return await connection.execute(query, *args)
+    async def execute(self, query: str, *args, timeout: float | None = None):
+        """Execute query (timeout overrides the route class and pool command_timeout)"""
+        return await self._run("execute", query, args, timeout=timeout)
 
 
 # Global database instance
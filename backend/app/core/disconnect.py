@@ -0,0 +1,77 @@
+"""
+Cancel requests whose client went away
+
+The dashboard aborts in-flight requests when filters change (React Query's signal).
+Without this the server would keep running their queries up to DB_COMMAND_TIMEOUT,
+holding pool connections for nobody. DisconnectMiddleware runs the request in its
+own task and cancels it on an `http.disconnect` received before the response is
+complete (afterwards it is the normal end of the request, and background tasks may
+still be running): asyncpg answers the cancellation of a running query with a
+protocol CancelRequest (what pg_cancel_backend does), and the connection goes back
+to the pool from Database.acquire's cleanup.
+"""
+import asyncio
+
+from .metrics import http_requests_cancelled
+
+
+# nginx's "client closed request"; only seen by the middleware above (metrics, traces)
+CLIENT_CLOSED_REQUEST = 499
+
+
+class DisconnectMiddleware:
+    """ASGI middleware cancelling the request when the client disconnects"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        # The watcher owns receive(); the app reads what it forwards
+        inbox: asyncio.Queue = asyncio.Queue()
+        response_started = False
+        response_complete = False
+
+        async def receive_forwarded():
+            return await inbox.get()
+
+        async def send_tracked(message):
+            nonlocal response_started, response_complete
+            if message["type"] == "http.response.start":
+                response_started = True
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                # Servers report http.disconnect once the response is complete: from here
+                # on it is not an abort, and background tasks must be left to run
+                response_complete = True
+            await send(message)
+
+        handler = asyncio.create_task(self.app(scope, receive_forwarded, send_tracked))
+
+        async def watch():
+            while True:
+                message = await receive()
+                await inbox.put(message)
+                if message["type"] == "http.disconnect":
+                    if not response_complete:
+                        handler.cancel()
+                    return
+
+        watcher = asyncio.create_task(watch())
+        try:
+            await handler
+        except asyncio.CancelledError:
+            if not handler.cancelled():
+                # The server cancelled us: pass it on
+                raise
+            route = scope.get("route")
+            http_requests_cancelled.inc(scope["method"], getattr(route, "path", "unmatched"))
+            if not response_started:
+                # Nobody reads it; lets the outer middleware record the outcome
+                await send({"type": "http.response.start", "status": CLIENT_CLOSED_REQUEST, "headers": []})
+                await send({"type": "http.response.body", "body": b""})
+        finally:
+            watcher.cancel()
+            if not handler.done():
+                handler.cancel()
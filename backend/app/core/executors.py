@@ -0,0 +1,147 @@
+"""
+Executors for CPU-bound post-processing, off the event loop thread
+
+run_in_thread: light work (row -> model conversion, float coercion, sorting) on a
+thread pool. It still holds the GIL, but the interpreter switches threads every few
+milliseconds, so other requests' callbacks run in between instead of waiting for the
+whole conversion.
+
+run_in_process: vectorized numpy scoring on a process pool (one GIL per worker).
+ndarray arguments are copied once into shared memory and mapped by the worker, so
+columnar inputs are neither pickled nor piped.
+
+Work below CPU_OFFLOAD_MIN_ROWS / CPU_PROCESS_MIN_CELLS runs inline (or in a thread):
+for small inputs the executor hop costs more than the work itself.
+"""
+import asyncio
+import functools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Callable, Optional
+
+import numpy as np
+
+from .config import settings
+from .tracing import span
+
+
+@dataclass(frozen=True)
+class SharedArray:
+    """What a worker receives instead of an ndarray: where to map it from"""
+    name: str
+    shape: tuple
+    dtype: str
+
+
+def _share(value, segments: list):
+    if not isinstance(value, np.ndarray):
+        return value
+    segment = shared_memory.SharedMemory(create=True, size=max(value.nbytes, 1))
+    segments.append(segment)
+    np.ndarray(value.shape, value.dtype, buffer=segment.buf)[...] = value
+    return SharedArray(segment.name, value.shape, value.dtype.str)
+
+
+def _call_with_shared_arrays(function: Callable, args: tuple, kwargs: dict):
+    """
+    Worker side of run_in_process: map SharedArray arguments and call `function`
+
+    `function` must not return views of its array arguments (the mapping is closed
+    before the result is sent back).
+    """
+    segments = []
+
+    def attach(value):
+        if not isinstance(value, SharedArray):
+            return value
+        segment = shared_memory.SharedMemory(name=value.name)
+        segments.append(segment)
+        return np.ndarray(value.shape, np.dtype(value.dtype), buffer=segment.buf)
+
+    try:
+        return function(*[attach(a) for a in args], **{k: attach(v) for k, v in kwargs.items()})
+    finally:
+        for segment in segments:
+            segment.close()
+
+
+class CpuExecutors:
+    """Thread and process pools for post-processing, created on first use"""
+
+    def __init__(self, thread_workers: int = 4, process_workers: int = 2):
+        self.thread_workers = thread_workers
+        self.process_workers = process_workers
+        self._threads: Optional[ThreadPoolExecutor] = None
+        self._processes: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def threads(self) -> ThreadPoolExecutor:
+        if self._threads is None:
+            self._threads = ThreadPoolExecutor(self.thread_workers, thread_name_prefix="cpu")
+        return self._threads
+
+    @property
+    def processes(self) -> ProcessPoolExecutor:
+        if self._processes is None:
+            # spawn: forking a process that runs an event loop and threads is unsafe
+            self._processes = ProcessPoolExecutor(
+                self.process_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._processes
+
+    async def run_in_thread(self, function: Callable, *args, rows: Optional[int] = None, **kwargs):
+        """
+        Run `function(*args, **kwargs)` on the thread pool
+
+        Args:
+            rows: size of the input; below CPU_OFFLOAD_MIN_ROWS it runs inline
+        """
+        if rows is not None and rows < settings.CPU_OFFLOAD_MIN_ROWS:
+            return function(*args, **kwargs)
+        with span(function.__qualname__, "cpu", executor="thread"):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.threads, functools.partial(function, *args, **kwargs))
+
+    async def run_in_process(self, function: Callable, *args, **kwargs):
+        """
+        Run a module-level `function(*args, **kwargs)` on the process pool
+
+        ndarray arguments are handed over through shared memory. Inputs smaller than
+        CPU_PROCESS_MIN_CELLS (or CPU_PROCESS_WORKERS=0) go to the thread pool instead.
+        """
+        cells = sum(value.size for value in (*args, *kwargs.values()) if isinstance(value, np.ndarray))
+        if self.process_workers <= 0 or cells < settings.CPU_PROCESS_MIN_CELLS:
+            return await self.run_in_thread(function, *args, **kwargs)
+
+        segments = []
+        try:
+            shared_args = tuple(_share(a, segments) for a in args)
+            shared_kwargs = {k: _share(v, segments) for k, v in kwargs.items()}
+            with span(function.__qualname__, "cpu", executor="process", cells=cells):
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(
+                    self.processes,
+                    _call_with_shared_arrays, function, shared_args, shared_kwargs
+                )
+        finally:
+            for segment in segments:
+                segment.close()
+                segment.unlink()
+
+    def shutdown(self):
+        if self._threads:
+            self._threads.shutdown(wait=False, cancel_futures=True)
+            self._threads = None
+        if self._processes:
+            self._processes.shutdown(wait=False, cancel_futures=True)
+            self._processes = None
+
+
+# Global executors (shut down from the app lifespan)
+executors = CpuExecutors(
+    thread_workers=settings.CPU_THREAD_WORKERS,
+    process_workers=settings.CPU_PROCESS_WORKERS
+)
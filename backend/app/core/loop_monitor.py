@@ -0,0 +1,116 @@
+"""
+Event loop lag monitor
+
+A task sleeps `interval` in a loop and measures how late it wakes up: anything
+running on the loop without awaiting (building thousands of Pydantic models, scoring
+insights, sorting big result sets) delays it, and every other request with it. Lag
+feeds the event_loop_lag_seconds histogram; lags over the threshold count as blocks.
+With DEBUG, a watchdog thread grabs the loop thread's stack while it is still blocked,
+and the block is logged as an `event_loop_blocked` JSON line with that stack.
+"""
+import asyncio
+import json
+import sys
+import threading
+import time
+import traceback
+from typing import Optional
+
+from .config import settings
+from .metrics import event_loop_blocks, event_loop_lag
+
+
+class LoopMonitor:
+    """Measures event loop lag; optionally captures the stack of blocking code"""
+
+    def __init__(self, interval_ms: float = 100.0, threshold_ms: float = 100.0, capture_stacks: bool = False):
+        self.interval = interval_ms / 1000
+        self.threshold = threshold_ms / 1000
+        self.capture_stacks = capture_stacks
+        self.last_lag = 0.0
+        self.blocks = 0
+        self._heartbeat = 0.0
+        # (heartbeat it was captured after, stack) of the block in progress
+        self._blocked_stack: Optional[tuple[float, list[str]]] = None
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self):
+        """Start monitoring the running loop (call from the app lifespan)"""
+        if self._task:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.perf_counter()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._run())
+        if self.capture_stacks:
+            self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+            self._watchdog.start()
+
+    async def stop(self):
+        self._stop.set()
+        if self._watchdog:
+            self._watchdog.join()
+            self._watchdog = None
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            self.tick(time.perf_counter())
+
+    def tick(self, now: float) -> float:
+        """Record a wake-up at `now` (perf_counter seconds); returns its lag"""
+        lag = max(0.0, now - self._heartbeat - self.interval)
+        previous, self._heartbeat = self._heartbeat, now
+        self.last_lag = lag
+        event_loop_lag.observe(value=lag)
+        if lag >= self.threshold:
+            self.blocks += 1
+            event_loop_blocks.inc()
+            self._report_block(lag, previous)
+        return lag
+
+    def _report_block(self, lag: float, heartbeat: float):
+        captured, self._blocked_stack = self._blocked_stack, None
+        if not self.capture_stacks:
+            return
+        print(json.dumps({
+            "event": "event_loop_blocked",
+            "lag_ms": round(lag * 1000, 1),
+            # Empty when the block ended before the watchdog looked
+            "stack": captured[1] if captured and captured[0] == heartbeat else [],
+        }), flush=True)
+
+    def _watch(self):
+        """Watchdog thread: snapshot the loop thread's stack once per block, mid-block"""
+        poll = max(self.threshold / 4, 0.005)
+        while not self._stop.wait(poll):
+            heartbeat = self._heartbeat
+            overdue = time.perf_counter() - heartbeat - self.interval
+            if overdue < self.threshold:
+                continue
+            if self._blocked_stack and self._blocked_stack[0] == heartbeat:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is not None:
+                self._blocked_stack = (heartbeat, [
+                    f"{entry.filename}:{entry.lineno} in {entry.name}"
+                    for entry in traceback.extract_stack(frame)
+                ])
+
+
+# Global monitor instance (started from the app lifespan)
+loop_monitor = LoopMonitor(
+    interval_ms=settings.LOOP_MONITOR_INTERVAL_MS,
+    threshold_ms=settings.LOOP_BLOCK_THRESHOLD_MS,
+    capture_stacks=settings.DEBUG
+)
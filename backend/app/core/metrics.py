@@ -0,0 +1,308 @@
+"""
+In-process metrics in the Prometheus text exposition format (version 0.0.4)
+
+Counters, gauges and histograms live in a process-wide registry; GET /metrics
+renders them. HTTP metrics come from MetricsMiddleware, database metrics from a
+Database query hook, and pool/PostgreSQL gauges are collected at scrape time.
+"""
+import math
+import time
+from typing import Awaitable, Callable
+
+from .database import Database, QueryEvent, read_from_primary
+
+
+# Seconds; covers cached widgets (~1 ms) up to the 60 s command_timeout
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    """Base of a labelled metric family"""
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+
+    def samples(self) -> list[str]:
+        raise NotImplementedError
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}", *self.samples()]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        super().__init__(name, help, labelnames)
+        self.values: dict[tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1.0):
+        self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def mirror(self, *labels, total: float):
+        """Expose a running total kept elsewhere (e.g. PoolStats)"""
+        self.values[labels] = total
+
+    def samples(self) -> list[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in sorted(self.values.items())
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, *labels, value: float):
+        self.values[labels] = value
+
+    def dec(self, *labels, amount: float = 1.0):
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = (), buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = buckets
+        # labels -> [per-bucket counts (last = +Inf), sum]
+        self.series: dict[tuple, list] = {}
+
+    def observe(self, *labels, value: float):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        counts = series[0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+                break
+        else:
+            counts[-1] += 1
+        series[1] += value
+
+    def samples(self) -> list[str]:
+        lines = []
+        for labels, (counts, total) in sorted(self.series.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Metric families plus collectors that refresh gauges right before rendering"""
+
+    def __init__(self):
+        self.metrics: list[Metric] = []
+        self.collectors: list[Callable[[], Awaitable[None]]] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], Awaitable[None]]):
+        self.collectors.append(collector)
+
+    async def render(self) -> str:
+        for collector in self.collectors:
+            try:
+                await collector()
+            except Exception as e:
+                # A failing collector leaves its gauges stale; the rest still renders
+                print(f"⚠️  Metrics collector {collector.__name__} failed: {e}")
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+# ============================================================================
+# HTTP
+# ============================================================================
+
+http_request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ("method", "route")
+))
+http_requests = registry.register(Counter(
+    "http_requests_total", "HTTP requests by route template and status code", ("method", "route", "status")
+))
+http_in_flight = registry.register(Gauge(
+    "http_requests_in_flight", "HTTP requests being served", ("method",)
+))
+http_requests_cancelled = registry.register(Counter(
+    "http_requests_cancelled_total", "Requests cancelled because the client disconnected", ("method", "route")
+))
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, status and in-flight requests"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        method = scope["method"]
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_in_flight.inc(method)
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_in_flight.dec(method)
+            # Template (/api/v1/analytics/overview), not the raw path: bounded label set
+            route = scope.get("route")
+            route_path = getattr(route, "path", "unmatched")
+            http_request_duration.observe(method, route_path, value=time.perf_counter() - started)
+            http_requests.inc(method, route_path, str(status))
+
+
+# ============================================================================
+# EVENT LOOP
+# ============================================================================
+
+# Seconds; a healthy loop wakes up within a millisecond or two
+LAG_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+event_loop_lag = registry.register(Histogram(
+    "event_loop_lag_seconds", "Delay of the loop monitor's wake-ups (time the loop was busy without awaiting)",
+    buckets=LAG_BUCKETS
+))
+event_loop_blocks = registry.register(Counter(
+    "event_loop_blocks_total", "Wake-ups delayed past LOOP_BLOCK_THRESHOLD_MS"
+))
+
+
+# ============================================================================
+# ADMISSION
+# ============================================================================
+
+admission_in_flight = registry.register(Gauge(
+    "admission_in_flight", "Requests holding a slot of their route class", ("route_class",)
+))
+admission_waiting = registry.register(Gauge(
+    "admission_waiting", "Requests waiting for a slot of their route class", ("route_class",)
+))
+admission_wait = registry.register(Histogram(
+    "admission_wait_seconds", "Time spent waiting for a route class slot", ("route_class",)
+))
+admission_rejected = registry.register(Counter(
+    "admission_rejected_total", "Requests answered 503 after ADMISSION_QUEUE_TIMEOUT_SECONDS", ("route_class",)
+))
+
+
+# ============================================================================
+# DATABASE
+# ============================================================================
+
+db_query_duration = registry.register(Histogram(
+    "db_query_duration_seconds", "Query execution time by calling method", ("method", "operation")
+))
+db_query_errors = registry.register(Counter(
+    "db_query_errors_total", "Failed queries by calling method and error", ("method", "error")
+))
+db_pool_acquire_duration = registry.register(Histogram(
+    "db_pool_acquire_duration_seconds", "Time spent waiting for a pool connection"
+))
+db_pool_connections = registry.register(Gauge(
+    "db_pool_connections", "Pool connections by state (open, idle, limit, max)", ("state",)
+))
+db_pool_waiters = registry.register(Gauge(
+    "db_pool_waiters", "Acquires currently waiting for a pool connection"
+))
+db_pool_queued = registry.register(Counter(
+    "db_pool_queued_acquires_total", "Acquires that found the pool exhausted"
+))
+db_replica_lag = registry.register(Gauge(
+    "db_replica_lag_seconds", "Replay lag of each read replica (-1 when unreachable)", ("replica",)
+))
+pg_buffer_cache_hit_ratio = registry.register(Gauge(
+    "pg_buffer_cache_hit_ratio", "PostgreSQL shared buffer hits / (hits + reads) of this database, since stats reset"
+))
+
+
+def observe_query(event: QueryEvent):
+    """Database query hook"""
+    db_pool_acquire_duration.observe(value=event.acquire_ms / 1000)
+    db_query_duration.observe(event.method, event.operation, value=event.execution_ms / 1000)
+    if event.error:
+        db_query_errors.inc(event.method, event.error)
+
+
+class DatabaseCollector:
+    """Pool and PostgreSQL gauges, refreshed on every scrape"""
+
+    def __init__(self, db: Database):
+        self.db = db
+
+    async def collect_pool(self):
+        db_pool_waiters.set(value=self.db.pool_stats.waiting)
+        db_pool_queued.mirror(total=self.db.pool_stats.queued)
+        if self.db.pool:
+            db_pool_connections.set("open", value=self.db.pool.get_size())
+            db_pool_connections.set("idle", value=self.db.pool.get_idle_size())
+            db_pool_connections.set("max", value=self.db.pool.get_max_size())
+        db_pool_connections.set("limit", value=self.db.connection_limit.limit)
+        for replica in self.db.replicas:
+            db_replica_lag.set(replica.name, value=-1 if replica.lag_seconds is None else replica.lag_seconds)
+
+    async def collect_buffer_cache(self):
+        if not self.db.pool:
+            return
+        with read_from_primary():
+            row = await self.db.fetch_one(
+                "SELECT blks_hit, blks_read FROM pg_stat_database WHERE datname = current_database()"
+            )
+        total = row["blks_hit"] + row["blks_read"] if row else 0
+        if total:
+            pg_buffer_cache_hit_ratio.set(value=row["blks_hit"] / total)
+
+
+def instrument_database(db: Database):
+    """Feed query metrics from `db` and collect its pool gauges on every scrape"""
+    db.add_query_hook(observe_query)
+    collector = DatabaseCollector(db)
+    registry.add_collector(collector.collect_pool)
+    registry.add_collector(collector.collect_buffer_cache)
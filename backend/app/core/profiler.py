@@ -0,0 +1,130 @@
+"""
+Thread-based sampling profiler for the event loop thread
+
+A daemon thread reads the loop thread's current stack (sys._current_frames) every
+`interval` seconds and counts each distinct stack. The result is in collapsed-stack
+format ("frame;frame;frame count" per line), which flamegraph.pl, inferno and
+speedscope read directly. Nothing is installed in the profiled thread, so the
+overhead is one stack walk per sample, paid by the sampler thread holding the GIL.
+"""
+import asyncio
+import inspect
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from types import CodeType, FrameType
+
+
+# Leaf frame of the stdlib loop waiting for I/O (BaseSelector.select); dropped unless include_idle
+IDLE_FUNCTIONS = {"select"}
+
+_COROUTINE_FLAGS = inspect.CO_COROUTINE | inspect.CO_ITERABLE_COROUTINE | inspect.CO_ASYNC_GENERATOR
+
+_PATH_PREFIXES = sorted({p for p in sys.path if p and os.path.isdir(p)}, key=len, reverse=True)
+
+
+def _short_path(filename: str) -> str:
+    """Path relative to the sys.path entry it was imported from"""
+    for prefix in _PATH_PREFIXES:
+        if filename.startswith(prefix + os.sep):
+            return filename[len(prefix) + 1:]
+    return filename
+
+
+def loop_entry_code(loop: asyncio.AbstractEventLoop) -> CodeType | None:
+    """
+    Code of the Python frame that entered a loop implemented in C (uvloop)
+
+    Such a loop waits for I/O without a Python frame, so an idle sample ends on
+    whatever called run_until_complete (e.g. asyncio.Runner.run). Must be called
+    from a task of `loop`: that frame is the caller of the task's outermost
+    coroutine. None for the stdlib loop, whose idle samples end in IDLE_FUNCTIONS.
+    """
+    if inspect.isfunction(type(loop).run_forever):
+        return None
+    frame = sys._getframe(1)
+    outermost = None
+    while frame is not None:
+        if frame.f_code.co_flags & _COROUTINE_FLAGS:
+            outermost = frame
+        frame = frame.f_back
+    if outermost is None or outermost.f_back is None:
+        return None
+    return outermost.f_back.f_code
+
+
+class SamplingProfiler:
+    """Collapsed stacks of one thread, sampled from a background thread"""
+
+    def __init__(
+        self,
+        thread_id: int,
+        interval: float = 0.005,
+        include_idle: bool = False,
+        lines: bool = False,
+        idle_code: CodeType | None = None
+    ):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.include_idle = include_idle
+        self.lines = lines
+        # Leaf code of idle samples on a C loop (see loop_entry_code)
+        self.idle_code = idle_code
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.idle_samples = 0
+        self._labels: dict[CodeType, str] = {}
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _label(self, frame: FrameType) -> str:
+        code = frame.f_code
+        label = self._labels.get(code)
+        if label is None:
+            name = getattr(code, "co_qualname", code.co_name)
+            label = self._labels[code] = f"{_short_path(code.co_filename)}:{name}"
+        if self.lines:
+            return f"{label}:{frame.f_lineno}"
+        return label
+
+    def _sample(self):
+        frame = sys._current_frames().get(self.thread_id)
+        if frame is None:
+            return
+        self.samples += 1
+        if frame.f_code.co_name in IDLE_FUNCTIONS or frame.f_code is self.idle_code:
+            self.idle_samples += 1
+            if not self.include_idle:
+                return
+        stack = []
+        while frame is not None:
+            stack.append(self._label(frame))
+            frame = frame.f_back
+        self.stacks[";".join(reversed(stack))] += 1
+
+    def _run(self):
+        next_sample = time.perf_counter()
+        while not self._stop.is_set():
+            self._sample()
+            next_sample += self.interval
+            delay = next_sample - time.perf_counter()
+            if delay > 0:
+                self._stop.wait(delay)
+            else:
+                # Fell behind (GIL contention): skip missed ticks instead of bursting
+                next_sample = time.perf_counter()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def collapsed(self) -> str:
+        """Flamegraph input, heaviest stacks first"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
@@ -0,0 +1,125 @@
+"""
+Per-request query accounting and declared query budgets per route
+
+Routes declare how many queries (and optionally how much DB time) one request may
+use with @query_budget. QueryBudgetMiddleware counts every Database query of the
+request; a request over its route's budget is logged (QUERY_BUDGET_MODE=log) or,
+in tests and CI benchmarks, answered with a 500 describing the overrun
+(QUERY_BUDGET_MODE=raise) so round-trip creep fails the build.
+"""
+import json
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from .config import settings
+from .database import Database, QueryEvent
+
+
+@dataclass(frozen=True)
+class QueryBudget:
+    queries: int
+    db_ms: float | None = None
+
+
+@dataclass
+class RequestQueries:
+    """Queries of one request, by calling method"""
+    count: int = 0
+    db_ms: float = 0.0
+    by_method: Counter = field(default_factory=Counter)
+
+    def overruns(self, budget: QueryBudget) -> list[str]:
+        problems = []
+        if self.count > budget.queries:
+            problems.append(f"{self.count} queries > budget {budget.queries}")
+        if budget.db_ms is not None and self.db_ms > budget.db_ms:
+            problems.append(f"{self.db_ms:.1f}ms DB time > budget {budget.db_ms:.0f}ms")
+        return problems
+
+
+_request_queries: ContextVar[RequestQueries | None] = ContextVar("request_queries", default=None)
+
+
+def query_budget(queries: int, db_ms: float | None = None):
+    """Route decorator (below @router.get) declaring what one request may spend"""
+    def decorator(endpoint):
+        endpoint.query_budget = QueryBudget(queries, db_ms)
+        return endpoint
+    return decorator
+
+
+def current_request_queries() -> RequestQueries | None:
+    return _request_queries.get()
+
+
+def count_query(event: QueryEvent):
+    """Database query hook"""
+    usage = _request_queries.get()
+    if usage is not None:
+        usage.count += 1
+        usage.db_ms += event.duration_ms
+        usage.by_method[event.method] += 1
+
+
+def account_queries(db: Database):
+    """Count every query of `db` against the current request"""
+    db.add_query_hook(count_query)
+
+
+class QueryBudgetMiddleware:
+    """ASGI middleware accounting each request's queries and enforcing its route budget"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or settings.QUERY_BUDGET_MODE == "off":
+            return await self.app(scope, receive, send)
+
+        usage = RequestQueries()
+        token = _request_queries.set(usage)
+        replaced = False
+
+        async def send_checked(message):
+            nonlocal replaced
+            if replaced:
+                # Body of the response we replaced
+                return
+            if message["type"] == "http.response.start":
+                # Non-streaming routes: every query has run by the time the response starts
+                problems = self._check(scope, usage)
+                if problems and settings.QUERY_BUDGET_MODE == "raise":
+                    replaced = True
+                    body = json.dumps({"detail": f"Query budget exceeded: {'; '.join(problems)}"}).encode()
+                    await send({
+                        "type": "http.response.start",
+                        "status": 500,
+                        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+                    })
+                    await send({"type": "http.response.body", "body": body})
+                    return
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_checked)
+        finally:
+            _request_queries.reset(token)
+
+    def _check(self, scope, usage: RequestQueries) -> list[str]:
+        route = scope.get("route")
+        budget = getattr(getattr(route, "endpoint", None), "query_budget", None)
+        if budget is None:
+            return []
+        problems = usage.overruns(budget)
+        if problems:
+            print(json.dumps({
+                "event": "query_budget_exceeded",
+                "route": f"{scope['method']} {route.path}",
+                "queries": usage.count,
+                "budget_queries": budget.queries,
+                "db_ms": round(usage.db_ms, 2),
+                "budget_db_ms": budget.db_ms,
+                "by_method": dict(usage.by_method.most_common()),
+            }), flush=True)
+        return problems
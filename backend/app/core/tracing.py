@@ -0,0 +1,286 @@
+"""
+Request-scoped span tracing with Server-Timing and OTLP/JSON export
+
+A trace is started per HTTP request by TracingMiddleware when exporting is enabled
+(TRACE_EXPORTER) or when the request sends `X-Debug-Timings: 1`
+(DEBUG_TIMINGS_ENABLED). Spans come from the route itself, engine methods
+(@trace_methods), detectors (span()) and every Database query (query hook). With the
+debug header the response carries a Server-Timing breakdown; exported traces are
+OTLP/JSON, written as one line per trace to TRACE_FILE (readable by the OpenTelemetry
+Collector's otlpjsonfile receiver) or POSTed to TRACE_OTLP_ENDPOINT.
+"""
+import asyncio
+import functools
+import inspect
+import json
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+import httpx
+
+from .config import settings
+from .database import Database, QueryEvent
+
+
+DEBUG_HEADER = b"x-debug-timings"
+
+# Server-Timing entries beyond this are dropped (header size)
+MAX_SERVER_TIMING_ENTRIES = 50
+
+_NON_TOKEN = re.compile(r"[^!#$%&'*+\-.^_`|~0-9A-Za-z]")
+
+
+@dataclass
+class Span:
+    span_id: str
+    parent_id: str | None
+    name: str
+    kind: str
+    start_ns: int
+    end_ns: int = 0
+    attributes: dict = field(default_factory=dict)
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+
+@dataclass
+class Trace:
+    trace_id: str
+    spans: list[Span] = field(default_factory=list)
+
+
+_current_trace: ContextVar[Trace | None] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[str | None] = ContextVar("current_span", default=None)
+
+
+def _new_id(bits: int) -> str:
+    return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+
+@contextmanager
+def span(name: str, kind: str, **attributes):
+    """Record a span of the current trace (no-op outside a traced request)"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+
+    current = Span(_new_id(64), _current_span.get(), name, kind, time.time_ns(), attributes=attributes)
+    token = _current_span.set(current.span_id)
+    try:
+        yield current
+    except BaseException as e:
+        current.attributes["error"] = type(e).__name__
+        raise
+    finally:
+        current.end_ns = time.time_ns()
+        _current_span.reset(token)
+        trace.spans.append(current)
+
+
+def traced(kind: str):
+    """Decorator running an async function inside a span named after it"""
+    def decorator(function):
+        @functools.wraps(function)
+        async def wrapper(*args, **kwargs):
+            with span(function.__qualname__, kind):
+                return await function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def trace_methods(kind: str):
+    """Class decorator applying traced(kind) to every public async method"""
+    def decorator(cls):
+        for name, member in list(vars(cls).items()):
+            if not name.startswith("_") and inspect.iscoroutinefunction(member):
+                setattr(cls, name, traced(kind)(member))
+        return cls
+    return decorator
+
+
+def record_query(event: QueryEvent):
+    """Database query hook: the query as a span ending now"""
+    trace = _current_trace.get()
+    if trace is None:
+        return
+    end_ns = time.time_ns()
+    trace.spans.append(Span(
+        span_id=_new_id(64),
+        parent_id=_current_span.get(),
+        name=event.method,
+        kind="db",
+        start_ns=end_ns - int(event.duration_ms * 1e6),
+        end_ns=end_ns,
+        attributes={
+            "db.operation": event.operation,
+            "db.server": event.server,
+            "db.acquire_ms": round(event.acquire_ms, 3),
+            "db.rows": event.rows,
+            **({"error": event.error} if event.error else {}),
+        }
+    ))
+
+
+def trace_database(db: Database):
+    """Record every query of `db` as a span of the current trace"""
+    db.add_query_hook(record_query)
+
+
+# ============================================================================
+# OUTPUT
+# ============================================================================
+
+def server_timing(trace: Trace) -> str:
+    """Server-Timing header: total, then spans in start order (devtools shows desc)"""
+    root = next((s for s in trace.spans if s.parent_id is None), None)
+    entries = []
+    if root:
+        entries.append(f"total;dur={root.duration_ms:.1f}")
+    children = sorted((s for s in trace.spans if s is not root), key=lambda s: s.start_ns)
+    for index, child in enumerate(children[:MAX_SERVER_TIMING_ENTRIES], start=1):
+        description = child.name
+        if child.kind == "db":
+            description += f" [{child.attributes['db.rows']} rows; {child.attributes['db.acquire_ms']:.1f}ms pool wait]"
+        description = description.replace("\\", "").replace('"', "'")
+        entries.append(f'{_NON_TOKEN.sub("_", child.kind)}-{index};dur={child.duration_ms:.1f};desc="{description}"')
+    return ", ".join(entries)
+
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otlp(trace: Trace) -> dict:
+    """OTLP/JSON ExportTraceServiceRequest of one trace"""
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": settings.APP_NAME}}]},
+            "scopeSpans": [{
+                "scope": {"name": "app.core.tracing"},
+                "spans": [
+                    {
+                        "traceId": trace.trace_id,
+                        "spanId": s.span_id,
+                        **({"parentSpanId": s.parent_id} if s.parent_id else {}),
+                        "name": s.name,
+                        # SERVER for the route span, INTERNAL for the rest, CLIENT for queries
+                        "kind": 2 if s.parent_id is None else 3 if s.kind == "db" else 1,
+                        "startTimeUnixNano": str(s.start_ns),
+                        "endTimeUnixNano": str(s.end_ns),
+                        "attributes": [
+                            {"key": key, "value": _otlp_value(value)}
+                            for key, value in {"span.kind": s.kind, **s.attributes}.items()
+                        ],
+                        **({"status": {"code": 2}} if "error" in s.attributes else {}),
+                    }
+                    for s in trace.spans
+                ]
+            }]
+        }]
+    }
+
+
+class TraceExporter:
+    """Writes OTLP/JSON traces to a file (one per line) or an OTLP/HTTP endpoint, off the event loop"""
+
+    def __init__(self, kind: str, path: str = "", endpoint: str = ""):
+        self.kind = kind
+        self.path = path
+        self.endpoint = endpoint.rstrip("/")
+        self.lock = threading.Lock()
+
+    def export(self, trace: Trace):
+        payload = json.dumps(to_otlp(trace), separators=(",", ":"))
+        asyncio.get_running_loop().run_in_executor(None, self._write, payload)
+
+    def _write(self, payload: str):
+        try:
+            if self.kind == "file":
+                with self.lock, open(self.path, "a", encoding="utf-8") as output:
+                    output.write(payload + "\n")
+            else:
+                httpx.post(
+                    f"{self.endpoint}/v1/traces",
+                    content=payload,
+                    headers={"Content-Type": "application/json"},
+                    timeout=2.0
+                )
+        except Exception as e:
+            print(f"⚠️  Trace export failed: {e}")
+
+
+def build_exporter() -> TraceExporter | None:
+    if settings.TRACE_EXPORTER == "file":
+        return TraceExporter("file", path=settings.TRACE_FILE)
+    if settings.TRACE_EXPORTER == "otlp":
+        return TraceExporter("otlp", endpoint=settings.TRACE_OTLP_ENDPOINT)
+    return None
+
+
+# ============================================================================
+# MIDDLEWARE
+# ============================================================================
+
+class TracingMiddleware:
+    """ASGI middleware: root span per request, Server-Timing on demand, export at the end"""
+
+    def __init__(self, app):
+        self.app = app
+        self.exporter = build_exporter()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        headers = dict(scope.get("headers") or [])
+        debug = settings.DEBUG_TIMINGS_ENABLED and headers.get(DEBUG_HEADER, b"") not in (b"", b"0")
+        sampled = self.exporter is not None and random.random() < settings.TRACE_SAMPLE_RATE
+        if not (debug or sampled):
+            return await self.app(scope, receive, send)
+
+        trace = Trace(_new_id(128))
+        trace_token = _current_trace.set(trace)
+        root = Span(_new_id(64), None, f"{scope['method']} {scope['path']}", "route", time.time_ns())
+        span_token = _current_span.set(root.span_id)
+
+        async def send_with_timings(message):
+            if message["type"] == "http.response.start":
+                root.attributes["http.status_code"] = message["status"]
+                if debug:
+                    root.end_ns = time.time_ns()
+                    trace.spans.append(root)
+                    extra = [(b"server-timing", server_timing(trace).encode())]
+                    origin = headers.get(b"origin")
+                    if origin:
+                        # Cross-origin pages only see the breakdown with this header
+                        extra.append((b"timing-allow-origin", origin))
+                    message["headers"] = [*message.get("headers", []), *extra]
+                    trace.spans.remove(root)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timings)
+        finally:
+            _current_span.reset(span_token)
+            _current_trace.reset(trace_token)
+            route = scope.get("route")
+            if route is not None:
+                root.name = f"{scope['method']} {route.path}"
+            root.end_ns = time.time_ns()
+            trace.spans.append(root)
+            if sampled:
+                self.exporter.export(trace)
@@ -3,11 +3,20 @@ FastAPI application entrypoint
 """
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
 from contextlib import asynccontextmanager
 
+from app.core.admission import pool_autoscaler
 from app.core.config import settings
 from app.core.database import db
-from app.api.routes import analytics, analytics_advanced, insights
+from app.core.disconnect import DisconnectMiddleware
+from app.core.executors import executors
+from app.core.loop_monitor import loop_monitor
+from app.core.metrics import CONTENT_TYPE, MetricsMiddleware, instrument_database, registry
+from app.core.tracing import TracingMiddleware, trace_database
+from app.core.query_budget import QueryBudgetMiddleware, account_queries
+from app.api.routes import admin, analytics, analytics_advanced, insights
+from app.services.materialized_views import mv_refresher
 # from app.api.routes import sales, products
 
 
@@ -18,9 +27,23 @@ async def lifespan(app: FastAPI):
     await db.connect()
     print("✅ Database connected")
     
+    if settings.DB_MAX_OVERFLOW > 0:
+        pool_autoscaler.start()
+    
+    if settings.LOOP_MONITOR_INTERVAL_MS > 0:
+        loop_monitor.start()
+    
+    if settings.MV_REFRESH_ENABLED:
+        mv_refresher.start()
+        print(f"🔄 Materialized views refresh every {settings.MV_REFRESH_INTERVAL_SECONDS}s")
+    
     yield
     
     # Shutdown
+    await loop_monitor.stop()
+    await pool_autoscaler.stop()
+    await mv_refresher.stop()
+    executors.shutdown()
     await db.disconnect()
     print("👋 Database disconnected")
 
@@ -45,6 +68,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Inside the accounting middleware: they still see (and record) cancelled requests
+app.add_middleware(DisconnectMiddleware)
+
+app.add_middleware(QueryBudgetMiddleware)
+account_queries(db)
+
+app.add_middleware(TracingMiddleware)
+trace_database(db)
+
+# Outermost: latency includes every other middleware
+app.add_middleware(MetricsMiddleware)
+instrument_database(db)
+
 
 @app.get("/")
 async def root():
@@ -61,14 +97,24 @@ async def health_check():
     """Health check endpoint"""
     return {
         "status": "healthy",
-        "database": "connected" if db.pool else "disconnected"
+        "database": "connected" if db.pool else "disconnected",
+        "pool": db.pool_stats.snapshot(db.pool, db.connection_limit),
+        "replicas": db.replica_status(),
+        "materialized_views": mv_refresher.freshness()
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus text exposition of request, query and pool metrics"""
+    return Response(await registry.render(), media_type=CONTENT_TYPE)
+
+
 # Include routers
 app.include_router(analytics.router, prefix=f"{settings.API_V1_PREFIX}/analytics", tags=["Analytics"])
 app.include_router(analytics_advanced.router, prefix=f"{settings.API_V1_PREFIX}/analytics", tags=["Analytics Advanced"])
 app.include_router(insights.router, prefix=f"{settings.API_V1_PREFIX}/analytics/insights", tags=["Insights"])
+app.include_router(admin.router, prefix=f"{settings.API_V1_PREFIX}/admin", tags=["Admin"])
 # app.include_router(sales.router, prefix=f"{settings.API_V1_PREFIX}/sales", tags=["Sales"])
 # app.include_router(products.router, prefix=f"{settings.API_V1_PREFIX}/products", tags=["Products"])
 
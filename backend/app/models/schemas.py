@@ -3,7 +3,7 @@ Pydantic schemas for request/response validation
 """
 from pydantic import BaseModel, Field
 from datetime import date, datetime
-from typing import Optional
+from typing import Literal, Optional
 
 
 # ============================================================================
@@ -28,10 +28,33 @@ class DateRangeQuery(BaseModel):
         }
 
 
+# Comparison window for period-over-period queries:
+# previous = same number of days right before the period, yoy = same dates one year earlier
+CompareTo = Literal["previous", "yoy"]
+
+
 # ============================================================================
 # RESPONSE SCHEMAS (API Responses)
 # ============================================================================
 
+class MetricDelta(BaseModel):
+    """Value of a metric in the current and comparison periods"""
+    current: float
+    previous: float
+    absolute_change: float
+    percent_change: Optional[float] = Field(None, description="Change (%) - null when previous is 0")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "current": 1025430.50,
+                "previous": 950200.00,
+                "absolute_change": 75230.50,
+                "percent_change": 7.92
+            }
+        }
+
+
 class OverviewMetrics(BaseModel):
     """Overview KPIs and metrics"""
     total_sales: int = Field(..., description="Total number of sales")
@@ -41,6 +64,7 @@ class OverviewMetrics(BaseModel):
     cancelled_sales: int = Field(..., description="Number of cancelled sales")
     cancellation_rate: float = Field(..., description="Cancellation rate (%)")
     total_customers: int = Field(..., description="Total unique customers")
+    comparison: Optional[dict[str, MetricDelta]] = Field(None, description="Deltas vs comparison period (compare_to)")
     
     class Config:
         json_schema_extra = {
@@ -87,6 +111,7 @@ class ChannelMetrics(BaseModel):
     total_revenue: float
     average_ticket: float
     revenue_share: float = Field(..., description="Revenue share (%)")
+    comparison: Optional[dict[str, MetricDelta]] = Field(None, description="Deltas vs comparison period (compare_to)")
     
     class Config:
         json_schema_extra = {
@@ -112,6 +137,7 @@ class StoreMetrics(BaseModel):
     total_revenue: float
     average_ticket: float
     revenue_share: float = Field(..., description="Revenue share (%)")
+    comparison: Optional[dict[str, MetricDelta]] = Field(None, description="Deltas vs comparison period (compare_to)")
     
     class Config:
         json_schema_extra = {
@@ -170,6 +196,7 @@ class SalesTrend(BaseModel):
     average_ticket: float
     completed_sales: int
     cancelled_sales: int
+    comparison: Optional[dict[str, MetricDelta]] = Field(None, description="Deltas vs comparison period (compare_to)")
     
     class Config:
         json_schema_extra = {
@@ -229,6 +256,7 @@ class CategoryMetrics(BaseModel):
     total_revenue: float
     average_price: float
     revenue_share: float
+    comparison: Optional[dict[str, MetricDelta]] = Field(None, description="Deltas vs comparison period (compare_to)")
     
     class Config:
         json_schema_extra = {
@@ -250,6 +278,7 @@ class OverviewResponse(BaseModel):
     """Overview analytics response"""
     metrics: OverviewMetrics
     period: dict = Field(..., description="Query period information")
+    comparison_period: Optional[dict] = Field(None, description="Comparison period information (compare_to)")
     
     class Config:
         json_schema_extra = {
@@ -346,6 +375,7 @@ class ChannelsResponse(BaseModel):
     channels: list[ChannelMetrics]
     total_channels: int
     period: dict
+    comparison_period: Optional[dict] = Field(None, description="Comparison period information (compare_to)")
 
 
 class StoresResponse(BaseModel):
@@ -353,12 +383,14 @@ class StoresResponse(BaseModel):
     stores: list[StoreMetrics]
     total_stores: int
     period: dict
+    comparison_period: Optional[dict] = Field(None, description="Comparison period information (compare_to)")
 
 
 class SalesTrendResponse(BaseModel):
     """Sales trend response"""
     trend: list[SalesTrend]
     period: dict
+    comparison_period: Optional[dict] = Field(None, description="Comparison period information (compare_to)")
 
 
 class HourlyDistributionResponse(BaseModel):
@@ -378,6 +410,7 @@ class CategoriesResponse(BaseModel):
     categories: list[CategoryMetrics]
     total_categories: int
     period: dict
+    comparison_period: Optional[dict] = Field(None, description="Comparison period information (compare_to)")
 
 
 # ============================================================================
@@ -576,6 +609,7 @@ class CustomerRFMResponse(BaseModel):
     total_customers: int
     segments: dict = Field(..., description="Count by segment")
     period: dict
+    next_cursor: Optional[str] = Field(None, description="Cursor for the next page (null on the last page)")
 
 
 class ChurnRiskResponse(BaseModel):
@@ -584,6 +618,7 @@ class ChurnRiskResponse(BaseModel):
     total_at_risk: int
     criteria: dict
     period: dict
+    next_cursor: Optional[str] = Field(None, description="Cursor for the next page (null on the last page)")
 
 
 class ProductByContextResponse(BaseModel):
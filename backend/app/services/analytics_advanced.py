@@ -1,9 +1,15 @@
 """
 Advanced Analytics Engine - Delivery, Customer RFM, Contextual Analysis
 """
+import json
 from datetime import date, timedelta
+from decimal import Decimal
 from typing import Optional
+from app.core.config import settings
 from app.core.database import Database
+from app.core.executors import executors
+from app.core.tracing import trace_methods
+from app.services.pagination import encode_cursor, decode_cursor
 from app.models.schemas import (
     DeliveryPerformance,
     DeliveryByRegion,
@@ -16,13 +22,55 @@ from app.models.schemas import (
 )
 
 
+# Row -> model builders of the customer lists (up to 1000 rows per page); run through
+# executors.run_in_thread so large pages are built off the event loop
+
+def _customer_rfm_models(rows) -> list[CustomerRFM]:
+    return [
+        CustomerRFM(
+            customer_id=row['customer_id'],
+            customer_name=row['customer_name'],
+            recency_days=row['recency_days'],
+            frequency=row['frequency'],
+            monetary=float(row['monetary']),
+            last_purchase_date=row['last_purchase_date'],
+            rfm_segment=row['rfm_segment']
+        )
+        for row in rows
+    ]
+
+
+def _churn_risk_models(rows) -> list[ChurnRiskCustomer]:
+    return [
+        ChurnRiskCustomer(
+            customer_id=row['customer_id'],
+            customer_name=row['customer_name'],
+            email=row['email'],
+            phone_number=row['phone_number'],
+            total_purchases=row['total_purchases'],
+            total_spent=float(row['total_spent']),
+            last_purchase_date=row['last_purchase_date'],
+            days_since_last_purchase=row['days_since_last_purchase'],
+            avg_days_between_purchases=float(row['avg_days_between_purchases']) if row['avg_days_between_purchases'] else 0.0,
+            favorite_channel=row['favorite_channel'] or 'Desconhecido',
+            favorite_product=row['favorite_product']
+        )
+        for row in rows
+    ]
+
+
+@trace_methods("engine")
 class AdvancedAnalyticsEngine:
     """
     Advanced analytics for delivery, customer retention, and contextual analysis
     """
     
-    def __init__(self, db: Database):
+    def __init__(self, db: Database, use_materialized_views: Optional[bool] = None):
         self.db = db
+        # Read pre-aggregated data from database/materialized_views.sql when enabled
+        self.use_materialized_views = (
+            settings.USE_MATERIALIZED_VIEWS if use_materialized_views is None else use_materialized_views
+        )
     
     # ========================================================================
     # DELIVERY ANALYTICS - Pergunta 2: "Tempo de entrega piorou?"
@@ -167,7 +215,47 @@ class AdvancedAnalyticsEngine:
             cancellation_rate=round(cancellation_rate, 2)
         )
         
-        # By region
+        # By region (the daily view cannot answer hour-range filters)
+        if self.use_materialized_views and hour_start is None and hour_end is None:
+            by_region = await self._get_delivery_by_region_from_mv(
+                start_date, end_date, brand_id, store_ids, weekday, channel_id
+            )
+        else:
+            by_region = await self._get_delivery_by_region(where_clause, params)
+        
+        # Trend over time
+        trend_query = f"""
+        SELECT 
+            DATE(s.created_at) as date,
+            AVG(s.delivery_seconds) as avg_delivery_time,
+            AVG(s.production_seconds) as avg_production_time,
+            COUNT(*) as total_deliveries,
+            ROUND((COUNT(*) FILTER (WHERE (s.delivery_seconds + s.production_seconds) <= 2700)::NUMERIC / NULLIF(COUNT(*), 0) * 100), 2) as on_time_rate
+        FROM sales s
+        INNER JOIN stores st ON s.store_id = st.id
+        JOIN delivery_sales ds ON ds.sale_id = s.id
+        WHERE {where_clause}
+        GROUP BY DATE(s.created_at)
+        ORDER BY date ASC
+        """
+        
+        trend_results = await self.db.fetch_all(trend_query, *params)
+        
+        trend = [
+            DeliveryTrend(
+                date=row['date'],
+                avg_delivery_time=float(row['avg_delivery_time']) if row['avg_delivery_time'] else 0.0,
+                avg_production_time=float(row['avg_production_time']) if row['avg_production_time'] else 0.0,
+                total_deliveries=row['total_deliveries'],
+                on_time_rate=float(row['on_time_rate']) if row['on_time_rate'] else 0.0
+            )
+            for row in trend_results
+        ]
+        
+        return overall_metrics, by_region, trend
+    
+    async def _get_delivery_by_region(self, where_clause: str, params: list) -> list[DeliveryByRegion]:
+        """Delivery metrics by region computed from the raw sales tables"""
         region_query = f"""
         WITH current_period AS (
             SELECT 
@@ -200,7 +288,7 @@ class AdvancedAnalyticsEngine:
         
         region_results = await self.db.fetch_all(region_query, *params)
         
-        by_region = [
+        return [
             DeliveryByRegion(
                 city=row['city'],
                 state=row['state'],
@@ -212,37 +300,64 @@ class AdvancedAnalyticsEngine:
             )
             for row in region_results
         ]
+    
+    async def _get_delivery_by_region_from_mv(
+        self,
+        start_date: date,
+        end_date: date,
+        brand_id: Optional[int] = None,
+        store_ids: Optional[list[int]] = None,
+        weekday: Optional[int] = None,
+        channel_id: Optional[int] = None
+    ) -> list[DeliveryByRegion]:
+        """Delivery metrics by region read from mv_delivery_region_daily"""
+        where_clauses, params = self._mv_where_clauses(
+            start_date, end_date, brand_id, store_ids, weekday, channel_id=channel_id
+        )
+        where_clause = " AND ".join(where_clauses)
         
-        # Trend over time
-        trend_query = f"""
+        region_query = f"""
+        WITH current_period AS (
+            SELECT 
+                mv.city,
+                mv.state,
+                SUM(mv.total_deliveries)::BIGINT as total_deliveries,
+                SUM(mv.delivery_seconds_sum) / NULLIF(SUM(mv.delivery_seconds_count), 0) as avg_delivery_time,
+                SUM(mv.production_seconds_sum) / NULLIF(SUM(mv.production_seconds_count), 0) as avg_production_time,
+                SUM(mv.on_time_deliveries)::BIGINT as on_time_deliveries
+            FROM mv_delivery_region_daily mv
+            INNER JOIN stores st ON mv.store_id = st.id
+            WHERE {where_clause}
+            GROUP BY mv.city, mv.state
+        )
         SELECT 
-            DATE(s.created_at) as date,
-            AVG(s.delivery_seconds) as avg_delivery_time,
-            AVG(s.production_seconds) as avg_production_time,
-            COUNT(*) as total_deliveries,
-            ROUND((COUNT(*) FILTER (WHERE (s.delivery_seconds + s.production_seconds) <= 2700)::NUMERIC / NULLIF(COUNT(*), 0) * 100), 2) as on_time_rate
-        FROM sales s
-        INNER JOIN stores st ON s.store_id = st.id
-        JOIN delivery_sales ds ON ds.sale_id = s.id
-        WHERE {where_clause}
-        GROUP BY DATE(s.created_at)
-        ORDER BY date ASC
+            city,
+            state,
+            total_deliveries,
+            avg_delivery_time,
+            avg_production_time,
+            ROUND((on_time_deliveries::NUMERIC / NULLIF(total_deliveries, 0) * 100), 2) as on_time_rate,
+            0.0 as delivery_time_trend
+        FROM current_period
+        WHERE total_deliveries >= 10
+        ORDER BY total_deliveries DESC
+        LIMIT 20
         """
         
-        trend_results = await self.db.fetch_all(trend_query, *params)
+        region_results = await self.db.fetch_all(region_query, *params)
         
-        trend = [
-            DeliveryTrend(
-                date=row['date'],
+        return [
+            DeliveryByRegion(
+                city=row['city'],
+                state=row['state'],
+                total_deliveries=row['total_deliveries'],
                 avg_delivery_time=float(row['avg_delivery_time']) if row['avg_delivery_time'] else 0.0,
                 avg_production_time=float(row['avg_production_time']) if row['avg_production_time'] else 0.0,
-                total_deliveries=row['total_deliveries'],
-                on_time_rate=float(row['on_time_rate']) if row['on_time_rate'] else 0.0
+                on_time_rate=float(row['on_time_rate']) if row['on_time_rate'] else 0.0,
+                delivery_time_trend=float(row['delivery_time_trend'])
             )
-            for row in trend_results
+            for row in region_results
         ]
-        
-        return overall_metrics, by_region, trend
     
     # ========================================================================
     # CUSTOMER RFM ANALYTICS - Pergunta 3: "Clientes que não voltam?"
@@ -253,15 +368,51 @@ class AdvancedAnalyticsEngine:
         start_date: date,
         end_date: date,
         brand_id: Optional[int] = None,
-        reference_date: Optional[date] = None
-    ) -> list[CustomerRFM]:
+        reference_date: Optional[date] = None,
+        page_size: int = 1000,
+        cursor: Optional[str] = None
+    ) -> tuple[list[CustomerRFM], dict[str, int], Optional[str]]:
         """
         Get RFM (Recency, Frequency, Monetary) analysis for customers
+        
+        Keyset-paginated over (segment_rank ASC, monetary DESC, customer_id ASC):
+        each page filters on the previous page's last key instead of using OFFSET,
+        so deep pages cost the same as the first one. Segment counts come from the
+        same query and cover every customer of the period, not just the page.
+        
+        Returns:
+            (customers, segments, next_cursor) - segments maps each RFM segment to its
+            number of customers; next_cursor is None on the last page
+        
+        Raises:
+            ValueError: if cursor is malformed
         """
         if not reference_date:
             reference_date = end_date
         
-        brand_filter = "AND st.brand_id = $4" if brand_id else ""
+        params = [start_date, end_date + timedelta(days=1), reference_date]
+        param_count = 3
+        
+        brand_filter = ""
+        if brand_id:
+            param_count += 1
+            brand_filter = f"AND st.brand_id = ${param_count}"
+            params.append(brand_id)
+        
+        keyset_filter = ""
+        if cursor:
+            after = decode_cursor(cursor, {"segment_rank": int, "monetary": Decimal, "customer_id": int})
+            keyset_filter = f"""
+            WHERE segment_rank > ${param_count + 1}
+                OR (segment_rank = ${param_count + 1} AND monetary < ${param_count + 2}::numeric)
+                OR (segment_rank = ${param_count + 1} AND monetary = ${param_count + 2}::numeric AND customer_id > ${param_count + 3})
+            """
+            params.extend([after["segment_rank"], after["monetary"], after["customer_id"]])
+            param_count += 3
+        
+        # One extra row tells whether there is a next page
+        param_count += 1
+        params.append(page_size + 1)
         
         query = f"""
         WITH customer_stats AS (
@@ -282,52 +433,70 @@ class AdvancedAnalyticsEngine:
                 {brand_filter}
             GROUP BY c.id, c.customer_name, s.customer_name
             HAVING COUNT(*) >= 1
+        ),
+        segmented AS (
+            SELECT 
+                customer_id,
+                customer_name,
+                recency_days,
+                frequency,
+                monetary,
+                last_purchase_date,
+                CASE 
+                    WHEN recency_days <= 7 AND frequency >= 5 AND monetary >= 500 THEN 'VIP'
+                    WHEN recency_days <= 15 AND frequency >= 3 THEN 'Regular'
+                    WHEN recency_days > 30 AND frequency >= 3 THEN 'At Risk'
+                    WHEN recency_days > 60 THEN 'Inactive'
+                    ELSE 'New'
+                END as rfm_segment,
+                CASE 
+                    WHEN recency_days <= 7 AND frequency >= 5 AND monetary >= 500 THEN 1
+                    WHEN recency_days <= 15 AND frequency >= 3 THEN 2
+                    WHEN recency_days > 30 AND frequency >= 3 THEN 3
+                    WHEN recency_days > 60 THEN 4
+                    ELSE 5
+                END as segment_rank
+            FROM customer_stats
+        ),
+        segment_counts AS (
+            SELECT COALESCE(jsonb_object_agg(rfm_segment, customers), '{{}}') as segments
+            FROM (
+                SELECT rfm_segment, COUNT(*) as customers
+                FROM segmented
+                GROUP BY rfm_segment
+            ) counted
+        ),
+        page AS (
+            SELECT *
+            FROM segmented
+            {keyset_filter}
+            ORDER BY segment_rank ASC, monetary DESC, customer_id ASC
+            LIMIT ${param_count}
         )
-        SELECT 
-            customer_id,
-            customer_name,
-            recency_days,
-            frequency,
-            monetary,
-            last_purchase_date,
-            CASE 
-                WHEN recency_days <= 7 AND frequency >= 5 AND monetary >= 500 THEN 'VIP'
-                WHEN recency_days <= 15 AND frequency >= 3 THEN 'Regular'
-                WHEN recency_days > 30 AND frequency >= 3 THEN 'At Risk'
-                WHEN recency_days > 60 THEN 'Inactive'
-                ELSE 'New'
-            END as rfm_segment
-        FROM customer_stats
-        ORDER BY 
-            CASE 
-                WHEN rfm_segment = 'VIP' THEN 1
-                WHEN rfm_segment = 'Regular' THEN 2
-                WHEN rfm_segment = 'At Risk' THEN 3
-                WHEN rfm_segment = 'Inactive' THEN 4
-                ELSE 5
-            END,
-            monetary DESC
-        LIMIT 1000
+        SELECT sc.segments::text as segments, pg.*
+        FROM segment_counts sc
+        LEFT JOIN page pg ON true
+        ORDER BY pg.segment_rank ASC, pg.monetary DESC, pg.customer_id ASC
         """
         
-        params = [start_date, end_date + timedelta(days=1), reference_date]
-        if brand_id:
-            params.append(brand_id)
+        rows = await self.db.fetch_all(query, *params)
+        # segment_counts always yields a row: an empty page is a single row without customer
+        segments = json.loads(rows[0]['segments'])
+        results = [row for row in rows if row['customer_id'] is not None]
         
-        results = await self.db.fetch_all(query, *params)
+        next_cursor = None
+        if len(results) > page_size:
+            results = results[:page_size]
+            last = results[-1]
+            next_cursor = encode_cursor({
+                "segment_rank": last['segment_rank'],
+                "monetary": str(last['monetary']),
+                "customer_id": last['customer_id']
+            })
         
-        return [
-            CustomerRFM(
-                customer_id=row['customer_id'],
-                customer_name=row['customer_name'],
-                recency_days=row['recency_days'],
-                frequency=row['frequency'],
-                monetary=float(row['monetary']),
-                last_purchase_date=row['last_purchase_date'],
-                rfm_segment=row['rfm_segment']
-            )
-            for row in results
-        ]
+        customers = await executors.run_in_thread(_customer_rfm_models, results, rows=len(results))
+        
+        return customers, segments, next_cursor
     
     async def get_churn_risk_customers(
         self,
@@ -335,129 +504,152 @@ class AdvancedAnalyticsEngine:
         days_inactive: int = 30,
         brand_id: Optional[int] = None,
         store_ids: Optional[list[int]] = None,
-        limit: int = 100
-    ) -> list[ChurnRiskCustomer]:
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> tuple[list[ChurnRiskCustomer], Optional[str]]:
         """
         Get customers at risk of churning (bought X+ times but haven't returned in Y days)
         Can be filtered by brand and/or specific stores
+        
+        Single pass over the filtered sales: candidates are aggregated per customer first
+        (the average interval between purchases telescopes to (last - first) / (n - 1),
+        so no LAG window or correlated subquery is needed), the page is cut with LIMIT,
+        and favorite channel/product are only computed for the customers being returned.
+        
+        Keyset-paginated over (total_spent, days_since_last_purchase, customer_id), all DESC.
+        
+        Returns:
+            (customers, next_cursor) - next_cursor is None on the last page
+        
+        Raises:
+            ValueError: if cursor is malformed
         """
-        # Build filter conditions
         filters = []
-        param_counter = 4  # Start after min_purchases, days_inactive, limit
-        params_dict = {}
+        # One extra row tells whether there is a next page
+        params = [min_purchases, days_inactive, limit + 1]
+        param_count = 3
         
         if brand_id:
-            filters.append(f"st.brand_id = ${param_counter}")
-            params_dict[param_counter] = brand_id
-            param_counter += 1
+            param_count += 1
+            filters.append(f"st.brand_id = ${param_count}")
+            params.append(brand_id)
         
         if store_ids:
-            store_placeholders = ", ".join([f"${param_counter + i}" for i in range(len(store_ids))])
-            filters.append(f"st.id IN ({store_placeholders})")
-            for i, store_id in enumerate(store_ids):
-                params_dict[param_counter + i] = store_id
-            param_counter += len(store_ids)
+            param_count += 1
+            filters.append(f"s.store_id = ANY(${param_count})")
+            params.append(store_ids)
         
         where_filter = "AND " + " AND ".join(filters) if filters else ""
         
+        keyset_filter = ""
+        if cursor:
+            after = decode_cursor(
+                cursor,
+                {"total_spent": Decimal, "days_since_last_purchase": int, "customer_id": int}
+            )
+            keyset_filter = (
+                f"WHERE (ca.total_spent, ca.days_since_last_purchase, ca.customer_id) "
+                f"< (${param_count + 1}::numeric, ${param_count + 2}, ${param_count + 3})"
+            )
+            params.extend([after["total_spent"], after["days_since_last_purchase"], after["customer_id"]])
+            param_count += 3
+        
+        # NOT MATERIALIZED: candidates scans it once; the favorites only probe the page's customers
         query = f"""
-        WITH purchase_intervals AS (
+        WITH customer_sales AS NOT MATERIALIZED (
             SELECT 
+                s.id,
                 s.customer_id,
-                s.created_at,
-                s.created_at::date - LAG(s.created_at::date) OVER (PARTITION BY s.customer_id ORDER BY s.created_at) as days_between
+                s.channel_id,
+                s.created_at::date as sale_date,
+                s.total_amount,
+                s.customer_name
             FROM sales s
             INNER JOIN stores st ON s.store_id = st.id
             WHERE s.sale_status_desc = 'COMPLETED'
                 AND s.customer_id IS NOT NULL
                 {where_filter}
         ),
-        customer_stats AS (
+        candidates AS (
             SELECT 
-                c.id as customer_id,
-                COALESCE(c.customer_name, MAX(s.customer_name), 'Cliente Anônimo') as customer_name,
-                c.email,
-                c.phone_number,
+                cs.customer_id,
+                MAX(cs.customer_name) as sale_customer_name,
                 COUNT(*) as total_purchases,
-                SUM(s.total_amount) as total_spent,
-                MAX(s.created_at::date) as last_purchase_date,
-                CURRENT_DATE - MAX(s.created_at::date) as days_since_last_purchase,
-                COALESCE((
-                    SELECT AVG(days_between)::FLOAT
-                    FROM purchase_intervals pi
-                    WHERE pi.customer_id = c.id AND pi.days_between IS NOT NULL
-                ), 0.0) as avg_days_between_purchases
-            FROM customers c
-            JOIN sales s ON s.customer_id = c.id
-            INNER JOIN stores st ON s.store_id = st.id
-            WHERE s.sale_status_desc = 'COMPLETED'
-                AND c.id IS NOT NULL
-                {where_filter}
-            GROUP BY c.id, c.customer_name, c.email, c.phone_number
+                SUM(cs.total_amount) as total_spent,
+                MAX(cs.sale_date) as last_purchase_date,
+                CURRENT_DATE - MAX(cs.sale_date) as days_since_last_purchase,
+                COALESCE(
+                    (MAX(cs.sale_date) - MIN(cs.sale_date))::FLOAT / NULLIF(COUNT(*) - 1, 0),
+                    0.0
+                ) as avg_days_between_purchases
+            FROM customer_sales cs
+            GROUP BY cs.customer_id
             HAVING COUNT(*) >= $1
-                AND CURRENT_DATE - MAX(s.created_at::date) >= $2
+                AND CURRENT_DATE - MAX(cs.sale_date) >= $2
+        ),
+        page AS (
+            SELECT 
+                ca.customer_id,
+                COALESCE(c.customer_name, ca.sale_customer_name, 'Cliente Anônimo') as customer_name,
+                c.email,
+                c.phone_number,
+                ca.total_purchases,
+                ca.total_spent,
+                ca.last_purchase_date,
+                ca.days_since_last_purchase,
+                ca.avg_days_between_purchases
+            FROM candidates ca
+            JOIN customers c ON c.id = ca.customer_id
+            {keyset_filter}
+            ORDER BY ca.total_spent DESC, ca.days_since_last_purchase DESC, ca.customer_id DESC
+            LIMIT $3
         ),
         favorite_channel AS (
-            SELECT DISTINCT ON (s.customer_id)
-                s.customer_id,
+            SELECT DISTINCT ON (cs.customer_id)
+                cs.customer_id,
                 ch.name as channel_name
-            FROM sales s
-            INNER JOIN stores st ON s.store_id = st.id
-            JOIN channels ch ON ch.id = s.channel_id
-            WHERE s.sale_status_desc = 'COMPLETED'
-                {where_filter}
-            GROUP BY s.customer_id, ch.name
-            ORDER BY s.customer_id, COUNT(*) DESC
+            FROM customer_sales cs
+            JOIN page pg ON pg.customer_id = cs.customer_id
+            JOIN channels ch ON ch.id = cs.channel_id
+            GROUP BY cs.customer_id, ch.name
+            ORDER BY cs.customer_id, COUNT(*) DESC
         ),
         favorite_product AS (
-            SELECT DISTINCT ON (s.customer_id)
-                s.customer_id,
+            SELECT DISTINCT ON (cs.customer_id)
+                cs.customer_id,
                 p.name as product_name
-            FROM sales s
-            INNER JOIN stores st ON s.store_id = st.id
-            JOIN product_sales ps ON ps.sale_id = s.id
+            FROM customer_sales cs
+            JOIN page pg ON pg.customer_id = cs.customer_id
+            JOIN product_sales ps ON ps.sale_id = cs.id
             JOIN products p ON p.id = ps.product_id
-            WHERE s.sale_status_desc = 'COMPLETED'
-                {where_filter}
-            GROUP BY s.customer_id, p.name
-            ORDER BY s.customer_id, COUNT(*) DESC
+            GROUP BY cs.customer_id, p.name
+            ORDER BY cs.customer_id, COUNT(*) DESC
         )
         SELECT 
-            cs.*,
+            pg.*,
             fc.channel_name as favorite_channel,
             fp.product_name as favorite_product
-        FROM customer_stats cs
-        LEFT JOIN favorite_channel fc ON fc.customer_id = cs.customer_id
-        LEFT JOIN favorite_product fp ON fp.customer_id = cs.customer_id
-        ORDER BY cs.total_spent DESC, cs.days_since_last_purchase DESC
-        LIMIT $3
+        FROM page pg
+        LEFT JOIN favorite_channel fc ON fc.customer_id = pg.customer_id
+        LEFT JOIN favorite_product fp ON fp.customer_id = pg.customer_id
+        ORDER BY pg.total_spent DESC, pg.days_since_last_purchase DESC, pg.customer_id DESC
         """
         
-        # Build params list in order
-        params = [min_purchases, days_inactive, limit]
+        results = await self.db.fetch_all(query, *params)
         
-        # Add brand_id and store_ids in the order they appear in params_dict
-        for param_num in sorted(params_dict.keys()):
-            params.append(params_dict[param_num])
+        next_cursor = None
+        if len(results) > limit:
+            results = results[:limit]
+            last = results[-1]
+            next_cursor = encode_cursor({
+                "total_spent": str(last['total_spent']),
+                "days_since_last_purchase": last['days_since_last_purchase'],
+                "customer_id": last['customer_id']
+            })
         
-        results = await self.db.fetch_all(query, *params)
+        customers = await executors.run_in_thread(_churn_risk_models, results, rows=len(results))
         
-        return [
-            ChurnRiskCustomer(
-                customer_id=row['customer_id'],
-                customer_name=row['customer_name'],
-                email=row['email'],
-                phone_number=row['phone_number'],
-                total_purchases=row['total_purchases'],
-                total_spent=float(row['total_spent']),
-                last_purchase_date=row['last_purchase_date'],
-                days_since_last_purchase=row['days_since_last_purchase'],
-                avg_days_between_purchases=float(row['avg_days_between_purchases']) if row['avg_days_between_purchases'] else 0.0,
-                favorite_channel=row['favorite_channel'] or 'Desconhecido',
-                favorite_product=row['favorite_product']
-            )
-            for row in results
-        ]
+        return customers, next_cursor
     
     # ========================================================================
     # CONTEXTUAL PRODUCT ANALYTICS - Pergunta 1: "Produto mais vendido quinta à noite no iFood?"
@@ -474,9 +666,13 @@ class AdvancedAnalyticsEngine:
         channel_id: Optional[int] = None,
         store_ids: Optional[list[int]] = None,
         limit: int = 20
-    ) -> list[ProductByContext]:
+    ) -> tuple[list[ProductByContext], dict]:
         """
         Get top products by specific context (weekday, hour range, channel)
+        
+        Returns:
+            (products, context) - context names the weekday, hour range and channel,
+            also when no product matches
         """
         where_clauses = [
             "s.created_at >= $1",
@@ -487,6 +683,8 @@ class AdvancedAnalyticsEngine:
         param_count = 2
         
         context_info = {}
+        # One row with the context's channel name (or none), outer-joined to the products
+        context_row = "(SELECT NULL::varchar as channel_name) context_channel"
         
         if brand_id:
             param_count += 1
@@ -513,12 +711,8 @@ class AdvancedAnalyticsEngine:
             param_count += 1
             where_clauses.append(f"s.channel_id = ${param_count}")
             params.append(channel_id)
-            
-            # Get channel name
-            channel_query = "SELECT name FROM channels WHERE id = $1"
-            channel_result = await self.db.fetch_one(channel_query, channel_id)
-            if channel_result:
-                context_info['channel'] = channel_result['name']
+            # Channel name for the context, in the same round trip
+            context_row = f"(SELECT MAX(name) as channel_name FROM channels WHERE id = ${param_count}) context_channel"
         
         if store_ids:
             param_count += 1
@@ -528,31 +722,41 @@ class AdvancedAnalyticsEngine:
         where_clause = " AND ".join(where_clauses)
         
         query = f"""
-        SELECT 
-            p.id as product_id,
-            p.name as product_name,
-            c.name as category,
-            COUNT(DISTINCT ps.sale_id) as times_sold,
-            SUM(ps.total_price) as total_revenue,
-            AVG(ps.total_price / ps.quantity) as avg_price
-        FROM product_sales ps
-        JOIN products p ON p.id = ps.product_id
-        JOIN sales s ON s.id = ps.sale_id
-        INNER JOIN stores st ON s.store_id = st.id
-        LEFT JOIN categories c ON c.id = p.category_id
-        WHERE {where_clause}
-        GROUP BY p.id, p.name, c.name
-        ORDER BY total_revenue DESC
-        LIMIT ${{limit_param}}
+        WITH top_products AS (
+            SELECT 
+                p.id as product_id,
+                p.name as product_name,
+                c.name as category,
+                COUNT(DISTINCT ps.sale_id) as times_sold,
+                SUM(ps.total_price) as total_revenue,
+                AVG(ps.total_price / ps.quantity) as avg_price
+            FROM product_sales ps
+            JOIN products p ON p.id = ps.product_id
+            JOIN sales s ON s.id = ps.sale_id
+            INNER JOIN stores st ON s.store_id = st.id
+            LEFT JOIN categories c ON c.id = p.category_id
+            WHERE {where_clause}
+            GROUP BY p.id, p.name, c.name
+            ORDER BY total_revenue DESC
+            LIMIT ${{limit_param}}
+        )
+        SELECT context_channel.channel_name, tp.*
+        FROM {context_row}
+        LEFT JOIN top_products tp ON true
+        ORDER BY tp.total_revenue DESC
         """
         
         param_count += 1
         params.append(limit)
         query = query.replace('{limit_param}', str(param_count))
         
-        results = await self.db.fetch_all(query, *params)
+        rows = await self.db.fetch_all(query, *params)
+        # Always one row at least: the channel name survives an empty result
+        if rows[0]['channel_name']:
+            context_info['channel'] = rows[0]['channel_name']
+        results = [row for row in rows if row['product_id'] is not None]
         
-        return [
+        products = [
             ProductByContext(
                 product_id=row['product_id'],
                 product_name=row['product_name'],
@@ -564,6 +768,7 @@ class AdvancedAnalyticsEngine:
             )
             for row in results
         ]
+        return products, context_info
     
     # ========================================================================
     # SALES HEATMAP
@@ -580,6 +785,11 @@ class AdvancedAnalyticsEngine:
         """
         Get sales heatmap (weekday x hour)
         """
+        if self.use_materialized_views:
+            return await self._get_sales_heatmap_from_mv(
+                start_date, end_date, brand_id, store_ids, channel_ids
+            )
+        
         where_clauses = [
             "s.created_at >= $1",
             "s.created_at < $2",
@@ -656,6 +866,11 @@ class AdvancedAnalyticsEngine:
         Note: revenue_share is always calculated against ALL stores in the network,
         regardless of store_ids filter, so participation % is meaningful network-wide.
         """
+        if self.use_materialized_views:
+            return await self._get_store_performance_from_mv(
+                start_date, end_date, brand_id, weekday, hour_start, hour_end, channel_id, store_ids
+            )
+        
         # WHERE clause for ALL stores (to calculate total revenue for participation %)
         where_clauses_all = [
             "s.created_at >= $1",
@@ -744,4 +959,185 @@ class AdvancedAnalyticsEngine:
             )
             for row in results
         ]
-
+    
+    # ========================================================================
+    # MATERIALIZED VIEW READS (database/materialized_views.sql)
+    # ========================================================================
+    
+    def _mv_where_clauses(
+        self,
+        start_date: date,
+        end_date: date,
+        brand_id: Optional[int] = None,
+        store_ids: Optional[list[int]] = None,
+        weekday: Optional[int] = None,
+        hour_start: Optional[int] = None,
+        hour_end: Optional[int] = None,
+        channel_id: Optional[int] = None,
+        channel_ids: Optional[list[int]] = None
+    ) -> tuple[list[str], list]:
+        """
+        Build WHERE clauses for a materialized view aliased as "mv" (joined to stores as "st").
+        Same filter semantics as the live queries, applied to the pre-aggregated columns.
+        """
+        where_clauses = [
+            "mv.sale_date >= $1",
+            "mv.sale_date <= $2"
+        ]
+        params = [start_date, end_date]
+        param_count = 2
+        
+        if brand_id:
+            param_count += 1
+            where_clauses.append(f"st.brand_id = ${param_count}")
+            params.append(brand_id)
+        
+        if store_ids:
+            param_count += 1
+            where_clauses.append(f"mv.store_id = ANY(${param_count})")
+            params.append(store_ids)
+        
+        if weekday is not None:
+            param_count += 1
+            where_clauses.append(f"EXTRACT(DOW FROM mv.sale_date)::INT = ${param_count}")
+            params.append(weekday)
+        
+        if hour_start is not None:
+            param_count += 1
+            where_clauses.append(f"mv.hour >= ${param_count}")
+            params.append(hour_start)
+        
+        if hour_end is not None:
+            param_count += 1
+            where_clauses.append(f"mv.hour < ${param_count}")
+            params.append(hour_end)
+        
+        if channel_id is not None:
+            param_count += 1
+            where_clauses.append(f"mv.channel_id = ${param_count}")
+            params.append(channel_id)
+        
+        if channel_ids:
+            param_count += 1
+            where_clauses.append(f"mv.channel_id = ANY(${param_count})")
+            params.append(channel_ids)
+        
+        return where_clauses, params
+    
+    async def _get_sales_heatmap_from_mv(
+        self,
+        start_date: date,
+        end_date: date,
+        brand_id: Optional[int] = None,
+        store_ids: Optional[list[int]] = None,
+        channel_ids: Optional[list[int]] = None
+    ) -> list[SalesHeatmapCell]:
+        """Sales heatmap (weekday x hour) read from mv_sales_hourly"""
+        where_clauses, params = self._mv_where_clauses(
+            start_date, end_date, brand_id, store_ids, channel_ids=channel_ids
+        )
+        where_clause = " AND ".join(where_clauses)
+        
+        weekday_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+        
+        query = f"""
+        SELECT 
+            EXTRACT(DOW FROM mv.sale_date)::INT as weekday,
+            mv.hour,
+            SUM(mv.total_sales)::BIGINT as total_sales,
+            SUM(mv.total_revenue) as total_revenue,
+            SUM(mv.total_revenue) / NULLIF(SUM(mv.total_sales), 0) as avg_ticket
+        FROM mv_sales_hourly mv
+        INNER JOIN stores st ON mv.store_id = st.id
+        WHERE {where_clause}
+        GROUP BY weekday, mv.hour
+        ORDER BY weekday, mv.hour
+        """
+        
+        results = await self.db.fetch_all(query, *params)
+        
+        return [
+            SalesHeatmapCell(
+                weekday=row['weekday'],
+                weekday_name=weekday_names[row['weekday']],
+                hour=row['hour'],
+                total_sales=row['total_sales'],
+                total_revenue=float(row['total_revenue']),
+                avg_ticket=float(row['avg_ticket'])
+            )
+            for row in results
+        ]
+    
+    async def _get_store_performance_from_mv(
+        self,
+        start_date: date,
+        end_date: date,
+        brand_id: Optional[int] = None,
+        weekday: Optional[int] = None,
+        hour_start: Optional[int] = None,
+        hour_end: Optional[int] = None,
+        channel_id: Optional[int] = None,
+        store_ids: Optional[list[int]] = None
+    ) -> list[StoreMetrics]:
+        """Store performance read from mv_sales_hourly (same revenue_share semantics)"""
+        has_hour_range = hour_start is not None and hour_end is not None
+        where_clauses_all, params = self._mv_where_clauses(
+            start_date, end_date, brand_id,
+            weekday=weekday,
+            hour_start=hour_start if has_hour_range else None,
+            hour_end=hour_end if has_hour_range else None,
+            channel_id=channel_id
+        )
+        
+        where_clauses_filtered = where_clauses_all.copy()
+        if store_ids:
+            where_clauses_filtered.append(f"mv.store_id = ANY(${len(params) + 1})")
+            params.append(store_ids)
+        
+        where_clause_all = " AND ".join(where_clauses_all)
+        where_clause_filtered = " AND ".join(where_clauses_filtered)
+        
+        query = f"""
+        WITH all_store_revenue AS (
+            SELECT SUM(mv.total_revenue) as total_revenue_all
+            FROM mv_sales_hourly mv
+            JOIN stores st ON st.id = mv.store_id
+            WHERE {where_clause_all}
+        ),
+        store_stats AS (
+            SELECT 
+                st.id as store_id,
+                st.name as store_name,
+                st.city,
+                st.state,
+                SUM(mv.total_sales)::BIGINT as total_sales,
+                SUM(mv.total_revenue) as total_revenue,
+                SUM(mv.total_revenue) / NULLIF(SUM(mv.total_sales), 0) as average_ticket
+            FROM mv_sales_hourly mv
+            JOIN stores st ON st.id = mv.store_id
+            WHERE {where_clause_filtered}
+            GROUP BY st.id, st.name, st.city, st.state
+        )
+        SELECT 
+            ss.*,
+            ROUND((ss.total_revenue / NULLIF(ar.total_revenue_all, 0) * 100), 2) as revenue_share
+        FROM store_stats ss
+        CROSS JOIN all_store_revenue ar
+        ORDER BY ss.total_revenue DESC
+        """
+        
+        results = await self.db.fetch_all(query, *params)
+        
+        return [
+            StoreMetrics(
+                store_id=row['store_id'],
+                store_name=row['store_name'],
+                city=row['city'],
+                state=row['state'],
+                total_sales=row['total_sales'],
+                total_revenue=float(row['total_revenue']),
+                average_ticket=float(row['average_ticket']),
+                revenue_share=float(row['revenue_share']) if row['revenue_share'] else 0.0
+            )
+            for row in results
+        ]
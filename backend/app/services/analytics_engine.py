@@ -4,6 +4,7 @@ Analytics Engine - Core business logic for data analysis
 from datetime import date, timedelta
 from typing import Optional
 from app.core.database import Database
+from app.core.tracing import trace_methods
 from app.models.schemas import (
     OverviewMetrics,
     ProductRanking,
@@ -20,9 +21,16 @@ from app.models.schemas import (
     ChurnRiskCustomer,
     ProductByContext,
     SalesHeatmapCell,
+    MetricDelta,
+    CompareTo,
 )
 
 
+# Current period condition in comparison queries ($1/$2 = current window, $3/$4 = comparison window)
+CURRENT_PERIOD = "s.created_at >= $1 AND s.created_at < $2"
+
+
+@trace_methods("engine")
 class AnalyticsEngine:
     """
     Core analytics engine for querying and aggregating restaurant data
@@ -587,7 +595,7 @@ class AnalyticsEngine:
         )
         SELECT 
             cs.*,
-            ROUND((cs.total_revenue / NULLIF(trs.total, 0) * 100), 2) as revenue_share
+            ROUND((cs.total_revenue / NULLIF(trs.total, 0) * 100)::NUMERIC, 2) as revenue_share
         FROM category_stats cs
         CROSS JOIN total_revenue_sum trs
         ORDER BY cs.total_revenue DESC
@@ -605,4 +613,490 @@ class AnalyticsEngine:
             )
             for row in results
         ]
+    
+    # ========================================================================
+    # PERIOD-OVER-PERIOD COMPARISON
+    # ========================================================================
+    # Both windows are read in a single scan over their union and split with
+    # conditional aggregation (FILTER), instead of one request per period.
+    
+    def get_comparison_window(
+        self,
+        start_date: date,
+        end_date: date,
+        compare_to: CompareTo
+    ) -> tuple[date, date]:
+        """
+        Get the comparison window for a period
+        
+        - previous: same number of days immediately before start_date
+        - yoy: same dates one year earlier (Feb 29 maps to Feb 28)
+        
+        Raises:
+            ValueError: if a yoy window would overlap the period (longer than a year):
+                the single-scan queries would count the overlapping sales in one window only
+        """
+        if compare_to == "yoy":
+            previous_end = _one_year_before(end_date)
+            if previous_end >= start_date:
+                raise ValueError("compare_to=yoy requires a period of at most one year")
+            return _one_year_before(start_date), previous_end
+        
+        days = (end_date - start_date).days + 1
+        return start_date - timedelta(days=days), start_date - timedelta(days=1)
+    
+    def _comparison_filters(
+        self,
+        start_date: date,
+        end_date: date,
+        compare_to: CompareTo
+    ) -> tuple[list[str], list]:
+        """
+        Date filters covering both windows
+        
+        Params start with [current start, current end] so queries can reference
+        CURRENT_PERIOD, followed by the comparison bounds the filter needs: only the
+        comparison start for adjacent windows, start and end for yoy. Callers number
+        their own filters from len(params).
+        """
+        previous_start, previous_end = self.get_comparison_window(start_date, end_date, compare_to)
+        params = [start_date, end_date + timedelta(days=1), previous_start]
+        
+        if compare_to == "previous":
+            # Adjacent windows (the comparison ends where the current one starts): one contiguous range
+            where_clauses = ["s.created_at >= $3", "s.created_at < $2"]
+        else:
+            params.append(previous_end + timedelta(days=1))
+            where_clauses = [
+                "((s.created_at >= $1 AND s.created_at < $2) OR (s.created_at >= $3 AND s.created_at < $4))"
+            ]
+        
+        return where_clauses, params
+    
+    async def get_overview_comparison(
+        self,
+        start_date: date,
+        end_date: date,
+        compare_to: CompareTo,
+        brand_id: Optional[int] = None,
+        store_ids: Optional[list[int]] = None,
+        channel_ids: Optional[list[int]] = None
+    ) -> OverviewMetrics:
+        """
+        Get overview metrics for the period with deltas vs the comparison window
+        """
+        where_clauses, params = self._comparison_filters(start_date, end_date, compare_to)
+        param_count = len(params)
+        
+        if brand_id:
+            param_count += 1
+            where_clauses.append(f"st.brand_id = ${param_count}")
+            params.append(brand_id)
+        
+        if store_ids:
+            param_count += 1
+            where_clauses.append(f"s.store_id = ANY(${param_count})")
+            params.append(store_ids)
+        
+        if channel_ids:
+            param_count += 1
+            where_clauses.append(f"s.channel_id = ANY(${param_count})")
+            params.append(channel_ids)
+        
+        where_clause = " AND ".join(where_clauses)
+        
+        query = f"""
+        WITH flagged AS (
+            SELECT 
+                s.total_amount,
+                s.sale_status_desc,
+                s.customer_id,
+                ({CURRENT_PERIOD}) as is_current
+            FROM sales s
+            INNER JOIN stores st ON s.store_id = st.id
+            WHERE {where_clause}
+        )
+        SELECT 
+            COUNT(*) FILTER (WHERE is_current) as total_sales,
+            COALESCE(SUM(total_amount) FILTER (WHERE is_current AND sale_status_desc = 'COMPLETED'), 0) as total_revenue,
+            COALESCE(AVG(total_amount) FILTER (WHERE is_current AND sale_status_desc = 'COMPLETED'), 0) as average_ticket,
+            COUNT(*) FILTER (WHERE is_current AND sale_status_desc = 'COMPLETED') as completed_sales,
+            COUNT(*) FILTER (WHERE is_current AND sale_status_desc = 'CANCELLED') as cancelled_sales,
+            COUNT(DISTINCT customer_id) FILTER (WHERE is_current AND customer_id IS NOT NULL) as total_customers,
+            COUNT(*) FILTER (WHERE NOT is_current) as previous_total_sales,
+            COALESCE(SUM(total_amount) FILTER (WHERE NOT is_current AND sale_status_desc = 'COMPLETED'), 0) as previous_total_revenue,
+            COALESCE(AVG(total_amount) FILTER (WHERE NOT is_current AND sale_status_desc = 'COMPLETED'), 0) as previous_average_ticket,
+            COUNT(*) FILTER (WHERE NOT is_current AND sale_status_desc = 'COMPLETED') as previous_completed_sales,
+            COUNT(*) FILTER (WHERE NOT is_current AND sale_status_desc = 'CANCELLED') as previous_cancelled_sales,
+            COUNT(DISTINCT customer_id) FILTER (WHERE NOT is_current AND customer_id IS NOT NULL) as previous_total_customers
+        FROM flagged
+        """
+        
+        result = await self.db.fetch_one(query, *params)
+        
+        cancellation_rate = _rate(result['cancelled_sales'], result['total_sales'])
+        previous_cancellation_rate = _rate(result['previous_cancelled_sales'], result['previous_total_sales'])
+        
+        return OverviewMetrics(
+            total_sales=result['total_sales'],
+            total_revenue=float(result['total_revenue']),
+            average_ticket=float(result['average_ticket']),
+            completed_sales=result['completed_sales'],
+            cancelled_sales=result['cancelled_sales'],
+            cancellation_rate=cancellation_rate,
+            total_customers=result['total_customers'],
+            comparison={
+                "total_sales": _metric_delta(result['total_sales'], result['previous_total_sales']),
+                "total_revenue": _metric_delta(result['total_revenue'], result['previous_total_revenue']),
+                "average_ticket": _metric_delta(result['average_ticket'], result['previous_average_ticket']),
+                "completed_sales": _metric_delta(result['completed_sales'], result['previous_completed_sales']),
+                "cancelled_sales": _metric_delta(result['cancelled_sales'], result['previous_cancelled_sales']),
+                "cancellation_rate": _metric_delta(cancellation_rate, previous_cancellation_rate),
+                "total_customers": _metric_delta(result['total_customers'], result['previous_total_customers'])
+            }
+        )
+    
+    async def get_channel_comparison(
+        self,
+        start_date: date,
+        end_date: date,
+        compare_to: CompareTo,
+        brand_id: Optional[int] = None,
+        store_ids: Optional[list[int]] = None
+    ) -> list[ChannelMetrics]:
+        """
+        Get sales metrics by channel with deltas vs the comparison window
+        
+        Channels that only sold in the comparison window are kept (with zero current sales).
+        """
+        where_clauses, params = self._comparison_filters(start_date, end_date, compare_to)
+        where_clauses.append("s.sale_status_desc = 'COMPLETED'")
+        param_count = len(params)
+        
+        if brand_id:
+            param_count += 1
+            where_clauses.append(f"st.brand_id = ${param_count}")
+            params.append(brand_id)
+        
+        if store_ids:
+            param_count += 1
+            where_clauses.append(f"s.store_id = ANY(${param_count})")
+            params.append(store_ids)
+        
+        where_clause = " AND ".join(where_clauses)
+        
+        query = f"""
+        WITH channel_stats AS (
+            SELECT 
+                c.id as channel_id,
+                c.name as channel_name,
+                c.type as channel_type,
+                COUNT(*) FILTER (WHERE {CURRENT_PERIOD}) as total_sales,
+                COALESCE(SUM(s.total_amount) FILTER (WHERE {CURRENT_PERIOD}), 0) as total_revenue,
+                COALESCE(AVG(s.total_amount) FILTER (WHERE {CURRENT_PERIOD}), 0) as average_ticket,
+                COUNT(*) FILTER (WHERE NOT ({CURRENT_PERIOD})) as previous_total_sales,
+                COALESCE(SUM(s.total_amount) FILTER (WHERE NOT ({CURRENT_PERIOD})), 0) as previous_total_revenue,
+                COALESCE(AVG(s.total_amount) FILTER (WHERE NOT ({CURRENT_PERIOD})), 0) as previous_average_ticket
+            FROM sales s
+            INNER JOIN stores st ON s.store_id = st.id
+            JOIN channels c ON c.id = s.channel_id
+            WHERE {where_clause}
+            GROUP BY c.id, c.name, c.type
+        )
+        SELECT 
+            cs.*,
+            ROUND((cs.total_revenue / NULLIF(SUM(cs.total_revenue) OVER (), 0) * 100), 2) as revenue_share,
+            ROUND((cs.previous_total_revenue / NULLIF(SUM(cs.previous_total_revenue) OVER (), 0) * 100), 2) as previous_revenue_share
+        FROM channel_stats cs
+        ORDER BY cs.total_revenue DESC
+        """
+        
+        results = await self.db.fetch_all(query, *params)
+        
+        return [
+            ChannelMetrics(
+                channel_id=row['channel_id'],
+                channel_name=row['channel_name'],
+                channel_type=row['channel_type'],
+                total_sales=row['total_sales'],
+                total_revenue=float(row['total_revenue']),
+                average_ticket=float(row['average_ticket']),
+                revenue_share=float(row['revenue_share']) if row['revenue_share'] else 0.0,
+                comparison=_row_deltas(row, ("total_sales", "total_revenue", "average_ticket", "revenue_share"))
+            )
+            for row in results
+        ]
+    
+    async def get_store_comparison(
+        self,
+        start_date: date,
+        end_date: date,
+        compare_to: CompareTo,
+        brand_id: Optional[int] = None,
+        channel_ids: Optional[list[int]] = None
+    ) -> list[StoreMetrics]:
+        """
+        Get sales metrics by store with deltas vs the comparison window
+        """
+        where_clauses, params = self._comparison_filters(start_date, end_date, compare_to)
+        where_clauses.append("s.sale_status_desc = 'COMPLETED'")
+        param_count = len(params)
+        
+        if brand_id:
+            param_count += 1
+            where_clauses.append(f"st.brand_id = ${param_count}")
+            params.append(brand_id)
+        
+        if channel_ids:
+            param_count += 1
+            where_clauses.append(f"s.channel_id = ANY(${param_count})")
+            params.append(channel_ids)
+        
+        where_clause = " AND ".join(where_clauses)
+        
+        query = f"""
+        WITH store_stats AS (
+            SELECT 
+                st.id as store_id,
+                st.name as store_name,
+                st.city,
+                st.state,
+                COUNT(*) FILTER (WHERE {CURRENT_PERIOD}) as total_sales,
+                COALESCE(SUM(s.total_amount) FILTER (WHERE {CURRENT_PERIOD}), 0) as total_revenue,
+                COALESCE(AVG(s.total_amount) FILTER (WHERE {CURRENT_PERIOD}), 0) as average_ticket,
+                COUNT(*) FILTER (WHERE NOT ({CURRENT_PERIOD})) as previous_total_sales,
+                COALESCE(SUM(s.total_amount) FILTER (WHERE NOT ({CURRENT_PERIOD})), 0) as previous_total_revenue,
+                COALESCE(AVG(s.total_amount) FILTER (WHERE NOT ({CURRENT_PERIOD})), 0) as previous_average_ticket
+            FROM sales s
+            JOIN stores st ON st.id = s.store_id
+            WHERE {where_clause}
+            GROUP BY st.id, st.name, st.city, st.state
+        )
+        SELECT 
+            ss.*,
+            ROUND((ss.total_revenue / NULLIF(SUM(ss.total_revenue) OVER (), 0) * 100), 2) as revenue_share,
+            ROUND((ss.previous_total_revenue / NULLIF(SUM(ss.previous_total_revenue) OVER (), 0) * 100), 2) as previous_revenue_share
+        FROM store_stats ss
+        ORDER BY ss.total_revenue DESC
+        """
+        
+        results = await self.db.fetch_all(query, *params)
+        
+        return [
+            StoreMetrics(
+                store_id=row['store_id'],
+                store_name=row['store_name'],
+                city=row['city'],
+                state=row['state'],
+                total_sales=row['total_sales'],
+                total_revenue=float(row['total_revenue']),
+                average_ticket=float(row['average_ticket']),
+                revenue_share=float(row['revenue_share']) if row['revenue_share'] else 0.0,
+                comparison=_row_deltas(row, ("total_sales", "total_revenue", "average_ticket", "revenue_share"))
+            )
+            for row in results
+        ]
+    
+    async def get_sales_trend_comparison(
+        self,
+        start_date: date,
+        end_date: date,
+        compare_to: CompareTo,
+        brand_id: Optional[int] = None,
+        store_ids: Optional[list[int]] = None,
+        channel_ids: Optional[list[int]] = None
+    ) -> list[SalesTrend]:
+        """
+        Get daily sales trend with each day aligned to its counterpart in the comparison window
+        
+        Comparison days are shifted forward (by the window length, or by one year for yoy)
+        and aggregated into the same row as the current day they correspond to. For yoy,
+        a Feb 29 in the comparison window has no counterpart and is not aligned.
+        """
+        where_clauses, params = self._comparison_filters(start_date, end_date, compare_to)
+        
+        param_count = len(params)
+        
+        # Date of the current day a comparison day is aggregated into
+        if compare_to == "yoy":
+            # Feb 29 has no counterpart one year later: adding a year would fold it onto
+            # Feb 28 and count that day twice, so it is left out of the alignment
+            shifted_date = """
+                    CASE 
+                        WHEN EXTRACT(MONTH FROM s.created_at) = 2 AND EXTRACT(DAY FROM s.created_at) = 29 THEN NULL
+                        ELSE (DATE(s.created_at) + INTERVAL '1 year')::date
+                    END"""
+        else:
+            param_count += 1
+            shifted_date = f"DATE(s.created_at) + ${param_count}::int"
+            params.append((end_date - start_date).days + 1)
+        
+        if brand_id:
+            param_count += 1
+            where_clauses.append(f"st.brand_id = ${param_count}")
+            params.append(brand_id)
+        
+        if store_ids:
+            param_count += 1
+            where_clauses.append(f"s.store_id = ANY(${param_count})")
+            params.append(store_ids)
+        
+        if channel_ids:
+            param_count += 1
+            where_clauses.append(f"s.channel_id = ANY(${param_count})")
+            params.append(channel_ids)
+        
+        where_clause = " AND ".join(where_clauses)
+        
+        query = f"""
+        WITH flagged AS (
+            SELECT 
+                s.total_amount,
+                s.sale_status_desc,
+                ({CURRENT_PERIOD}) as is_current,
+                CASE 
+                    WHEN {CURRENT_PERIOD} THEN DATE(s.created_at)
+                    ELSE {shifted_date}
+                END as date
+            FROM sales s
+            INNER JOIN stores st ON s.store_id = st.id
+            WHERE {where_clause}
+        )
+        SELECT 
+            date,
+            COUNT(*) FILTER (WHERE is_current) as total_sales,
+            COALESCE(SUM(total_amount) FILTER (WHERE is_current AND sale_status_desc = 'COMPLETED'), 0) as total_revenue,
+            COALESCE(AVG(total_amount) FILTER (WHERE is_current AND sale_status_desc = 'COMPLETED'), 0) as average_ticket,
+            COUNT(*) FILTER (WHERE is_current AND sale_status_desc = 'COMPLETED') as completed_sales,
+            COUNT(*) FILTER (WHERE is_current AND sale_status_desc = 'CANCELLED') as cancelled_sales,
+            COUNT(*) FILTER (WHERE NOT is_current) as previous_total_sales,
+            COALESCE(SUM(total_amount) FILTER (WHERE NOT is_current AND sale_status_desc = 'COMPLETED'), 0) as previous_total_revenue,
+            COALESCE(AVG(total_amount) FILTER (WHERE NOT is_current AND sale_status_desc = 'COMPLETED'), 0) as previous_average_ticket,
+            COUNT(*) FILTER (WHERE NOT is_current AND sale_status_desc = 'COMPLETED') as previous_completed_sales,
+            COUNT(*) FILTER (WHERE NOT is_current AND sale_status_desc = 'CANCELLED') as previous_cancelled_sales
+        FROM flagged
+        WHERE date >= $1 AND date < $2
+        GROUP BY date
+        ORDER BY date ASC
+        """
+        
+        results = await self.db.fetch_all(query, *params)
+        
+        return [
+            SalesTrend(
+                date=row['date'],
+                total_sales=row['total_sales'],
+                total_revenue=float(row['total_revenue']),
+                average_ticket=float(row['average_ticket']),
+                completed_sales=row['completed_sales'],
+                cancelled_sales=row['cancelled_sales'],
+                comparison=_row_deltas(
+                    row,
+                    ("total_sales", "total_revenue", "average_ticket", "completed_sales", "cancelled_sales")
+                )
+            )
+            for row in results
+        ]
+    
+    async def get_category_comparison(
+        self,
+        start_date: date,
+        end_date: date,
+        compare_to: CompareTo,
+        brand_id: Optional[int] = None,
+        store_ids: Optional[list[int]] = None,
+        channel_ids: Optional[list[int]] = None
+    ) -> list[CategoryMetrics]:
+        """
+        Get sales metrics by product category with deltas vs the comparison window
+        """
+        where_clauses, params = self._comparison_filters(start_date, end_date, compare_to)
+        where_clauses.append("s.sale_status_desc = 'COMPLETED'")
+        param_count = len(params)
+        
+        if brand_id:
+            param_count += 1
+            where_clauses.append(f"st.brand_id = ${param_count}")
+            params.append(brand_id)
+        
+        if store_ids:
+            param_count += 1
+            where_clauses.append(f"s.store_id = ANY(${param_count})")
+            params.append(store_ids)
+        
+        if channel_ids:
+            param_count += 1
+            where_clauses.append(f"s.channel_id = ANY(${param_count})")
+            params.append(channel_ids)
+        
+        where_clause = " AND ".join(where_clauses)
+        
+        query = f"""
+        WITH category_stats AS (
+            SELECT 
+                COALESCE(c.name, 'Sem Categoria') as category_name,
+                COUNT(*) FILTER (WHERE {CURRENT_PERIOD}) as total_sales,
+                COALESCE(SUM(ps.total_price) FILTER (WHERE {CURRENT_PERIOD}), 0) as total_revenue,
+                COALESCE(AVG(ps.total_price) FILTER (WHERE {CURRENT_PERIOD}), 0) as average_price,
+                COUNT(*) FILTER (WHERE NOT ({CURRENT_PERIOD})) as previous_total_sales,
+                COALESCE(SUM(ps.total_price) FILTER (WHERE NOT ({CURRENT_PERIOD})), 0) as previous_total_revenue,
+                COALESCE(AVG(ps.total_price) FILTER (WHERE NOT ({CURRENT_PERIOD})), 0) as previous_average_price
+            FROM product_sales ps
+            JOIN products p ON p.id = ps.product_id
+            JOIN sales s ON s.id = ps.sale_id
+            INNER JOIN stores st ON s.store_id = st.id
+            LEFT JOIN categories c ON c.id = p.category_id
+            WHERE {where_clause}
+            GROUP BY c.name
+        )
+        SELECT 
+            cs.*,
+            ROUND((cs.total_revenue / NULLIF(SUM(cs.total_revenue) OVER (), 0) * 100)::NUMERIC, 2) as revenue_share,
+            ROUND((cs.previous_total_revenue / NULLIF(SUM(cs.previous_total_revenue) OVER (), 0) * 100)::NUMERIC, 2) as previous_revenue_share
+        FROM category_stats cs
+        ORDER BY cs.total_revenue DESC
+        """
+        
+        results = await self.db.fetch_all(query, *params)
+        
+        return [
+            CategoryMetrics(
+                category_name=row['category_name'],
+                total_sales=row['total_sales'],
+                total_revenue=float(row['total_revenue']),
+                average_price=float(row['average_price']),
+                revenue_share=float(row['revenue_share']) if row['revenue_share'] else 0.0,
+                comparison=_row_deltas(row, ("total_sales", "total_revenue", "average_price", "revenue_share"))
+            )
+            for row in results
+        ]
+
+
+def _one_year_before(day: date) -> date:
+    """Same calendar day one year earlier (Feb 29 -> Feb 28)"""
+    try:
+        return day.replace(year=day.year - 1)
+    except ValueError:
+        return day.replace(year=day.year - 1, day=28)
+
+
+def _rate(part: int, total: int) -> float:
+    """Percentage rounded to 2 decimals (0 when total is 0)"""
+    return round(part / total * 100, 2) if total else 0.0
+
+
+def _row_deltas(row, metrics: tuple[str, ...]) -> dict[str, MetricDelta]:
+    """Deltas for metrics selected as <metric> and previous_<metric>"""
+    return {metric: _metric_delta(row[metric], row[f'previous_{metric}']) for metric in metrics}
+
 
+def _metric_delta(current, previous) -> MetricDelta:
+    """Absolute and relative change of a metric between two periods"""
+    current = float(current or 0)
+    previous = float(previous or 0)
+    return MetricDelta(
+        current=current,
+        previous=previous,
+        absolute_change=round(current - previous, 2),
+        percent_change=round((current - previous) / previous * 100, 2) if previous else None
+    )
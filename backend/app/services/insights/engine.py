@@ -4,14 +4,18 @@ Main Insights Engine - orchestrates all insight detectors
 from datetime import date, datetime
 from typing import Optional
 from app.core.database import Database
+from app.core.executors import executors
+from app.core.tracing import span, trace_methods
 from app.models.schemas import Insight, InsightsResponse
 
 from .cancellation_detector import CancellationDetector
 from .product_opportunity_detector import ProductOpportunityDetector
 from .churn_risk_detector import ChurnRiskDetector
 from .store_outlier_detector import StoreOutlierDetector
+from .revenue_anomaly_detector import RevenueAnomalyDetector
 
 
+@trace_methods("engine")
 class InsightsEngine:
     """
     Main engine for generating insights from analytics data.
@@ -50,36 +54,22 @@ class InsightsEngine:
             ProductOpportunityDetector(self.db, brand_id, start_date, end_date, store_ids),
             ChurnRiskDetector(self.db, brand_id, start_date, end_date, store_ids),
             StoreOutlierDetector(self.db, brand_id, start_date, end_date, store_ids),
-            # Add more detectors here in future:
-            # RevenueTrendDetector(...),
-            # etc.
+            RevenueAnomalyDetector(self.db, brand_id, start_date, end_date, store_ids),
+            # Add more detectors here in future
         ]
         
         for detector in detectors:
             try:
-                insights = await detector.detect()
+                with span(detector.__class__.__name__, "detector"):
+                    insights = await detector.detect()
                 all_insights.extend(insights)
             except Exception as e:
                 # Log error but don't fail entire insight generation
                 print(f"Error in {detector.__class__.__name__}: {str(e)}")
                 continue
         
-        # 2. Score and prioritize insights
-        scored_insights = self._score_insights(all_insights)
-        
-        # 3. Sort by priority and score
-        sorted_insights = sorted(
-            scored_insights,
-            key=lambda x: (
-                self._priority_value(x.priority),  # Critical > Attention > Positive
-                -x.impact.value,  # Higher impact first
-                -x.confidence_score  # Higher confidence first
-            ),
-            reverse=True
-        )
-        
-        # 4. Limit results
-        top_insights = sorted_insights[:limit]
+        # 2-4. Score, prioritize and limit (off the event loop for large batches)
+        top_insights = await executors.run_in_thread(self._rank_insights, all_insights, limit, rows=len(all_insights))
         
         # 5. Build response
         period_days = (end_date - start_date).days + 1
@@ -95,6 +85,22 @@ class InsightsEngine:
             }
         )
     
+    def _rank_insights(self, insights: list[Insight], limit: int) -> list[Insight]:
+        """Top `limit` insights by priority, impact and confidence"""
+        scored_insights = self._score_insights(insights)
+        
+        sorted_insights = sorted(
+            scored_insights,
+            key=lambda x: (
+                self._priority_value(x.priority),  # Critical > Attention > Positive
+                -x.impact.value,  # Higher impact first
+                -x.confidence_score  # Higher confidence first
+            ),
+            reverse=True
+        )
+        
+        return sorted_insights[:limit]
+    
     def _score_insights(self, insights: list[Insight]) -> list[Insight]:
         """
         Calculate priority score for each insight.
@@ -0,0 +1,173 @@
+"""
+Detector for revenue anomalies
+Identifies days where a store/channel sold far below its own baseline
+"""
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from app.core.executors import executors
+from app.models.schemas import Insight, InsightImpact, InsightContext, InsightRecommendation
+from .anomaly_engine import score_revenue_anomalies
+from .base_detector import BaseInsightDetector
+
+
+class RevenueAnomalyDetector(BaseInsightDetector):
+    """Detects revenue drops per store and channel against rolling and weekday baselines"""
+
+    # Thresholds
+    BASELINE_WINDOW_DAYS = 28  # Rolling median/MAD window
+    SEASONAL_WEEKS = 4  # Same-weekday history used as expected value
+    MIN_ANOMALY_SCORE = 3.5  # Robust z-score below -3.5 is an anomalous drop
+    MIN_EXPECTED_REVENUE = 100.0  # Ignore series expected to sell < R$ 100/day
+    MIN_MONTHLY_LOSS = 1000.0  # Only worth if lost revenue > R$ 1,000/month
+
+    async def detect(self) -> list[Insight]:
+        """Detect revenue anomaly insights"""
+        insights = []
+
+        revenue_drop = await self._detect_revenue_drops()
+        if revenue_drop:
+            insights.append(revenue_drop)
+
+        return insights
+
+    async def _detect_revenue_drops(self) -> Insight | None:
+        """
+        Detect: Days where a store/channel revenue fell well below its expected value
+        Critical alert: Sudden drop in a specific store or channel
+        """
+        store_filter = self._get_store_filter()
+
+        # History needed before the period to build baselines for its first day
+        history_days = max(self.BASELINE_WINDOW_DAYS, 7 * self.SEASONAL_WEEKS)
+        first_day = self.start_date - timedelta(days=history_days)
+
+        query = f"""
+            SELECT
+                s.store_id,
+                st.name as store_name,
+                s.channel_id,
+                ch.name as channel_name,
+                s.created_at::date as day,
+                SUM(s.total_amount) as revenue
+            FROM sales s
+            INNER JOIN stores st ON s.store_id = st.id
+            INNER JOIN channels ch ON ch.id = s.channel_id
+            WHERE st.brand_id = $1
+                AND s.sale_status_desc = 'COMPLETED'
+                AND s.created_at >= $2
+                AND s.created_at < $3
+                {store_filter}
+            GROUP BY s.store_id, st.name, s.channel_id, ch.name, s.created_at::date
+        """
+
+        rows = await self.db.fetch_all(
+            query,
+            self.brand_id,
+            first_day,
+            self.end_date + timedelta(days=1)
+        )
+
+        if not rows:
+            return None
+
+        # Dense [series, day] matrix; days without sales stay at 0
+        n_days = (self.end_date - first_day).days + 1
+        keys = np.array([(row['store_id'], row['channel_id']) for row in rows])
+        series_keys, series_idx = np.unique(keys, axis=0, return_inverse=True)
+        day_idx = np.array([(row['day'] - first_day).days for row in rows])
+        values = np.zeros((len(series_keys), n_days))
+        values[series_idx.ravel(), day_idx] = [float(row['revenue']) for row in rows]
+
+        # Many stores x channels x days: scored in a worker process, `values` via shared memory
+        scores = await executors.run_in_process(
+            score_revenue_anomalies,
+            values,
+            window=self.BASELINE_WINDOW_DAYS,
+            seasonal_weeks=self.SEASONAL_WEEKS
+        )
+
+        # Only days inside the analysis period are reported
+        period = slice(history_days, None)
+        score = np.nan_to_num(scores.score[:, period], nan=0.0)
+        delta = np.nan_to_num(scores.delta[:, period], nan=0.0)
+        expected = np.nan_to_num(scores.expected[:, period], nan=0.0)
+
+        anomalous = (score <= -self.MIN_ANOMALY_SCORE) & (expected >= self.MIN_EXPECTED_REVENUE)
+        lost_by_series = np.where(anomalous, -delta, 0.0).sum(axis=1)
+
+        total_lost = float(lost_by_series.sum())
+        monthly_loss = self._extrapolate_to_monthly(total_lost)
+
+        # Only create insight if meaningful amount
+        if monthly_loss < self.MIN_MONTHLY_LOSS:
+            return None
+
+        worst = int(np.argmax(lost_by_series))
+        worst_store_id, worst_channel_id = (int(key) for key in series_keys[worst])
+        names = {
+            (row['store_id'], row['channel_id']): (row['store_name'], row['channel_name'])
+            for row in rows
+        }
+        store_name, channel_name = names[(worst_store_id, worst_channel_id)]
+
+        worst_days = np.flatnonzero(anomalous[worst])
+        worst_lost = float(lost_by_series[worst])
+        worst_expected = float(expected[worst, worst_days].sum())
+        drop_pct = worst_lost / worst_expected * 100 if worst_expected else 0.0
+
+        affected = series_keys[lost_by_series > 0]
+        anomalous_dates = [self.start_date + timedelta(days=int(day)) for day in worst_days]
+        # Python weekday() is Monday=0; _format_weekday expects Sunday=0
+        affected_weekdays = sorted({(day.weekday() + 1) % 7 for day in anomalous_dates})
+
+        # More anomalous days = more confidence it is not noise
+        confidence = min(0.6 + len(worst_days) * 0.05, 0.9)
+
+        # Estimate ROI (assuming half of the drop can be recovered)
+        estimated_roi = monthly_loss * 0.5
+
+        priority = "critical" if monthly_loss > 10000 else "attention"
+
+        other_series = len(affected) - 1
+        others_text = (
+            f" Outras {other_series} combinações loja/canal também tiveram quedas anômalas."
+            if other_series > 0 else ""
+        )
+
+        return Insight(
+            id=f"revenue_anomaly_{worst_store_id}_{worst_channel_id}_{self.brand_id}",
+            type="revenue_anomaly",
+            priority=priority,
+            title=f"Queda anômala de receita: {store_name[:40]} no {channel_name}",
+            description=(
+                f"Em {len(worst_days)} dia(s) do período, a receita de {store_name} no canal {channel_name} "
+                f"ficou {drop_pct:.1f}% abaixo do esperado para o dia da semana "
+                f"(R$ {worst_lost:,.2f} a menos).{others_text}"
+            ),
+            impact=InsightImpact(
+                metric="revenue_loss",
+                value=monthly_loss,
+                currency="BRL",
+                period="monthly"
+            ),
+            context=InsightContext(
+                affected_stores=sorted({int(store_id) for store_id, _ in affected}),
+                affected_channels=sorted({int(channel_id) for _, channel_id in affected}),
+                affected_days=[self._format_weekday(dow) for dow in affected_weekdays],
+                data_points=len(rows)
+            ),
+            recommendation=InsightRecommendation(
+                action=(
+                    f"Verificar o que aconteceu em {store_name} no {channel_name} nos dias "
+                    f"{', '.join(day.strftime('%d/%m') for day in anomalous_dates[:5])}: "
+                    f"loja fechada, indisponibilidade no app, ruptura de estoque ou problema operacional."
+                ),
+                estimated_roi=estimated_roi,
+                difficulty="easy",
+                link_to="/advanced"
+            ),
+            detected_at=datetime.now(),
+            confidence_score=confidence
+        )
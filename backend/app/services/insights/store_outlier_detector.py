@@ -70,7 +70,8 @@ class StoreOutlierDetector(BaseInsightDetector):
                     am.avg_orders as am_avg_orders,
                     am.avg_ticket as am_avg_ticket,
                     ((sp.revenue - am.avg_revenue) / NULLIF(am.avg_revenue, 0) * 100) as revenue_diff_pct,
-                    (sp.revenue - am.avg_revenue) as revenue_gap
+                    (sp.revenue - am.avg_revenue) as revenue_gap,
+                    {self._active_stores_sql()} as active_stores
                 FROM store_performance sp, avg_metrics am
                 WHERE am.avg_revenue > 0
                     AND ((sp.revenue - am.avg_revenue) / NULLIF(am.avg_revenue, 0) * 100) < -{self.MIN_REVENUE_DIFF_PCT}
@@ -105,7 +106,7 @@ class StoreOutlierDetector(BaseInsightDetector):
             return None
         
         # Calculate confidence based on how many stores we're comparing against
-        num_stores = await self._count_active_stores()
+        num_stores = row['active_stores']
         confidence = min(0.5 + (num_stores / 10) * 0.5, 1.0) if num_stores >= self.MIN_STORES_REQUIRED else 0.4
         
         # Estimate ROI (assuming we can recover 50% of the gap with improvements)
@@ -188,7 +189,8 @@ class StoreOutlierDetector(BaseInsightDetector):
                     am.avg_orders as am_avg_orders,
                     am.avg_ticket as am_avg_ticket,
                     ((sp.revenue - am.avg_revenue) / NULLIF(am.avg_revenue, 0) * 100) as revenue_diff_pct,
-                    (sp.revenue - am.avg_revenue) as revenue_surplus
+                    (sp.revenue - am.avg_revenue) as revenue_surplus,
+                    {self._active_stores_sql()} as active_stores
                 FROM store_performance sp, avg_metrics am
                 WHERE am.avg_revenue > 0
                     AND ((sp.revenue - am.avg_revenue) / NULLIF(am.avg_revenue, 0) * 100) > {self.MIN_REVENUE_DIFF_PCT}
@@ -223,7 +225,7 @@ class StoreOutlierDetector(BaseInsightDetector):
             return None
         
         # Calculate confidence
-        num_stores = await self._count_active_stores()
+        num_stores = row['active_stores']
         confidence = min(0.5 + (num_stores / 10) * 0.5, 1.0) if num_stores >= self.MIN_STORES_REQUIRED else 0.4
         
         # Estimate ROI (assuming we can replicate 40% of the advantage in other stores)
@@ -262,18 +264,22 @@ class StoreOutlierDetector(BaseInsightDetector):
             confidence_score=confidence
         )
     
-    async def _count_active_stores(self) -> int:
-        """Helper to count active stores for confidence calculation"""
-        store_filter = self._get_store_filter()
+    def _active_stores_sql(self) -> str:
+        """
+        Scalar subquery counting the brand's active stores (confidence calculation)
         
-        query = f"""
-            SELECT COUNT(*) as total
-            FROM stores st
-            WHERE st.brand_id = $1
-                AND st.is_active = true
-                {store_filter}
+        Embedded in the outlier query instead of a separate round trip.
         """
+        # No sales join here: filter on the stores table itself
+        store_filter = ""
+        if self.store_ids:
+            store_list = ", ".join(map(str, self.store_ids))
+            store_filter = f"AND st_count.id IN ({store_list})"
         
-        result = await self.db.fetch_one(query, self.brand_id)
-        return result['total'] if result else 0
-
+        return f"""(
+                        SELECT COUNT(*)
+                        FROM stores st_count
+                        WHERE st_count.brand_id = $1
+                            AND st_count.is_active = true
+                            {store_filter}
+                    )"""
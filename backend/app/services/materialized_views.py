@@ -0,0 +1,121 @@
+"""
+Materialized Views - periodic concurrent refresh and freshness tracking
+"""
+import asyncio
+import time
+from datetime import datetime
+from typing import Optional
+from app.core.config import settings
+from app.core.database import Database, db, read_from_primary
+
+
+# Views defined in database/materialized_views.sql, refreshed in this order
+MATERIALIZED_VIEWS = [
+    "mv_sales_hourly",
+    "mv_delivery_region_daily",
+]
+
+
+class MaterializedViewRefresher:
+    """
+    Background scheduler that refreshes the analytics materialized views
+    with REFRESH MATERIALIZED VIEW CONCURRENTLY, so readers are never blocked.
+    """
+
+    def __init__(self, db: Database, interval_seconds: int = 300, timeout_seconds: int = 600):
+        self.db = db
+        self.interval_seconds = interval_seconds
+        self.timeout_seconds = timeout_seconds
+        self.last_refresh: dict[str, dict] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start the refresh loop on the running event loop"""
+        if not self._task:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the refresh loop"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        """Refresh all views, then sleep for the configured interval"""
+        while True:
+            try:
+                await self.refresh_all()
+            except Exception as e:
+                # Catalog read, freshness upsert or lost connection: retry next cycle
+                print(f"Error refreshing materialized views: {str(e)}")
+            await asyncio.sleep(self.interval_seconds)
+
+    async def refresh_all(self):
+        """Refresh every existing view and record its freshness"""
+        # The refresh runs on the primary: decide from its catalog, not a replica's
+        with read_from_primary():
+            existing = await self.db.fetch_all(
+                "SELECT matviewname, ispopulated FROM pg_matviews WHERE matviewname = ANY($1)",
+                MATERIALIZED_VIEWS
+            )
+        populated = {row['matviewname']: row['ispopulated'] for row in existing}
+
+        for view_name in MATERIALIZED_VIEWS:
+            if view_name not in populated:
+                print(f"⚠️  Materialized view {view_name} not found (run database/materialized_views.sql)")
+                continue
+
+            # CONCURRENTLY is only allowed once the view has been populated
+            concurrently = "CONCURRENTLY " if populated[view_name] else ""
+
+            started = time.perf_counter()
+            try:
+                await self.db.execute(
+                    f"REFRESH MATERIALIZED VIEW {concurrently}{view_name}",
+                    timeout=self.timeout_seconds
+                )
+            except Exception as e:
+                # Keep serving the previous snapshot; try again next cycle
+                print(f"Error refreshing {view_name}: {str(e)}")
+                continue
+            duration_ms = int((time.perf_counter() - started) * 1000)
+            refreshed_at = datetime.now()
+
+            await self.db.execute(
+                """
+                INSERT INTO materialized_view_refreshes (view_name, refreshed_at, duration_ms)
+                VALUES ($1, $2, $3)
+                ON CONFLICT (view_name) DO UPDATE
+                SET refreshed_at = EXCLUDED.refreshed_at, duration_ms = EXCLUDED.duration_ms
+                """,
+                view_name, refreshed_at, duration_ms
+            )
+
+            self.last_refresh[view_name] = {
+                "refreshed_at": refreshed_at,
+                "duration_ms": duration_ms
+            }
+
+    def freshness(self) -> dict:
+        """Age of each view as seen by this process"""
+        now = datetime.now()
+        return {
+            view_name: {
+                "refreshed_at": info["refreshed_at"].isoformat(),
+                "age_seconds": int((now - info["refreshed_at"]).total_seconds()),
+                "duration_ms": info["duration_ms"]
+            }
+            for view_name, info in self.last_refresh.items()
+        }
+
+
+# Global refresher instance (started from the app lifespan)
+mv_refresher = MaterializedViewRefresher(
+    db,
+    interval_seconds=settings.MV_REFRESH_INTERVAL_SECONDS,
+    timeout_seconds=settings.MV_REFRESH_TIMEOUT_SECONDS
+)
@@ -0,0 +1,60 @@
+"""
+Keyset (cursor) pagination helpers
+
+A cursor is the sort key of the last row of a page, serialized as url-safe base64 JSON.
+Clients treat it as opaque and send it back unchanged to get the next page.
+"""
+import base64
+import binascii
+import json
+from decimal import Decimal, InvalidOperation
+
+
+def encode_cursor(values: dict) -> str:
+    """Serialize the sort key of the last returned row"""
+    payload = json.dumps(values, separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def _parse_key(kind: type, value):
+    """Cursor value back to its sort-key type (ints as JSON numbers, decimals as strings)"""
+    if kind is int:
+        if type(value) is not int:
+            raise ValueError("Invalid pagination cursor")
+        return value
+    if kind is Decimal:
+        if not isinstance(value, str):
+            raise ValueError("Invalid pagination cursor")
+        try:
+            parsed = Decimal(value)
+        except InvalidOperation as e:
+            raise ValueError("Invalid pagination cursor") from e
+        if not parsed.is_finite():
+            raise ValueError("Invalid pagination cursor")
+        return parsed
+    raise TypeError(f"Unsupported cursor key type {kind.__name__}")
+
+
+def decode_cursor(cursor: str, keys: dict[str, type]) -> dict:
+    """
+    Parse a cursor produced by encode_cursor.
+
+    Args:
+        keys: expected sort keys and their types (int or Decimal)
+
+    Returns:
+        The sort key, each value converted to its type
+
+    Raises:
+        ValueError: if the cursor is malformed, does not carry the expected keys
+            or a value does not have the expected type
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ValueError("Invalid pagination cursor") from e
+
+    if not isinstance(values, dict) or set(values) != set(keys):
+        raise ValueError("Invalid pagination cursor")
+    return {key: _parse_key(kind, values[key]) for key, kind in keys.items()}
@@ -0,0 +1 @@
+"""Performance benchmarks (most require a PostgreSQL instance)"""
@@ -0,0 +1,69 @@
+"""
+Representative requests for every analytics route, against the seeded benchmark dataset
+
+Dates are relative to today because benchmarks/seed.py spreads sales over the
+days before now(). Brand 2 owns stores 2, 9, 16, ... and channels 7-12.
+"""
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+
+from app.core.config import settings
+
+
+API_PREFIX = f"{settings.API_V1_PREFIX}/analytics"
+
+
+@dataclass(frozen=True)
+class ApiCase:
+    """One benchmarked request"""
+    name: str
+    path: str
+    params: dict = field(default_factory=dict)
+
+    @property
+    def url(self) -> str:
+        return f"{API_PREFIX}{self.path}"
+
+
+def period(days: int) -> dict:
+    """start_date/end_date covering the last `days` days"""
+    end = date.today()
+    return {
+        "start_date": (end - timedelta(days=days - 1)).isoformat(),
+        "end_date": end.isoformat()
+    }
+
+
+MONTH = period(30)
+QUARTER = period(90)
+BRAND = {"brand_id": 2}
+
+API_CASES = [
+    # analytics.py
+    ApiCase("brands_list", "/brands/list"),
+    ApiCase("stores_list", "/stores/list", BRAND),
+    ApiCase("overview", "/overview", {**MONTH, **BRAND}),
+    ApiCase("overview_all_brands", "/overview", MONTH),
+    ApiCase("overview_stores", "/overview", {**MONTH, **BRAND, "store_ids": "2,9,16"}),
+    ApiCase("overview_compare_previous", "/overview", {**MONTH, **BRAND, "compare_to": "previous"}),
+    ApiCase("products_top", "/products/top", {**MONTH, **BRAND}),
+    ApiCase("channels", "/channels", {**MONTH, **BRAND}),
+    ApiCase("channels_compare_yoy", "/channels", {**MONTH, **BRAND, "compare_to": "yoy"}),
+    ApiCase("stores", "/stores", {**MONTH, **BRAND}),
+    ApiCase("stores_compare_previous", "/stores", {**MONTH, **BRAND, "compare_to": "previous"}),
+    ApiCase("sales_trend", "/sales/trend", {**QUARTER, **BRAND}),
+    ApiCase("sales_trend_compare_previous", "/sales/trend", {**QUARTER, **BRAND, "compare_to": "previous"}),
+    ApiCase("sales_hourly", "/sales/hourly", {**MONTH, **BRAND}),
+    ApiCase("sales_weekday", "/sales/weekday", {**MONTH, **BRAND}),
+    ApiCase("categories", "/categories", {**MONTH, **BRAND}),
+    ApiCase("categories_compare_yoy", "/categories", {**MONTH, **BRAND, "compare_to": "yoy"}),
+    # analytics_advanced.py
+    ApiCase("delivery_performance", "/delivery/performance", {**MONTH, **BRAND}),
+    ApiCase("customers_rfm", "/customers/rfm", {**QUARTER, **BRAND}),
+    ApiCase("customers_churn_risk", "/customers/churn-risk", BRAND),
+    ApiCase("products_by_context", "/products/by-context", {**MONTH, **BRAND, "weekday": 4, "hour_start": 19, "hour_end": 22}),
+    ApiCase("stores_performance", "/stores/performance", {**MONTH, **BRAND}),
+    ApiCase("sales_heatmap", "/sales/heatmap", {**MONTH, **BRAND}),
+    # insights.py
+    ApiCase("insights_automatic", "/insights/automatic", {**MONTH, **BRAND}),
+]
@@ -0,0 +1,188 @@
+"""
+Churn-risk query benchmark: legacy correlated-subquery SQL vs current engine
+
+Usage (from backend/):
+    python -m benchmarks.bench_churn_risk --dsn postgresql://... --customers 100000
+
+Seeds a deterministic dataset in a separate schema (see benchmarks/seed.py), checks
+that both queries return the same customers, then reports latency percentiles.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import asyncpg
+
+from app.core.config import settings
+from app.core.database import Database
+from app.services.analytics_advanced import AdvancedAnalyticsEngine
+from benchmarks.seed import seed_dataset, create_pool
+
+
+# Query shipped before the single-pass rewrite (no store filter variant)
+LEGACY_CHURN_QUERY = """
+WITH purchase_intervals AS (
+    SELECT
+        s.customer_id,
+        s.created_at,
+        s.created_at::date - LAG(s.created_at::date) OVER (PARTITION BY s.customer_id ORDER BY s.created_at) as days_between
+    FROM sales s
+    INNER JOIN stores st ON s.store_id = st.id
+    WHERE s.sale_status_desc = 'COMPLETED'
+        AND s.customer_id IS NOT NULL
+        {where_filter}
+),
+customer_stats AS (
+    SELECT
+        c.id as customer_id,
+        COALESCE(c.customer_name, MAX(s.customer_name), 'Cliente Anônimo') as customer_name,
+        c.email,
+        c.phone_number,
+        COUNT(*) as total_purchases,
+        SUM(s.total_amount) as total_spent,
+        MAX(s.created_at::date) as last_purchase_date,
+        CURRENT_DATE - MAX(s.created_at::date) as days_since_last_purchase,
+        COALESCE((
+            SELECT AVG(days_between)::FLOAT
+            FROM purchase_intervals pi
+            WHERE pi.customer_id = c.id AND pi.days_between IS NOT NULL
+        ), 0.0) as avg_days_between_purchases
+    FROM customers c
+    JOIN sales s ON s.customer_id = c.id
+    INNER JOIN stores st ON s.store_id = st.id
+    WHERE s.sale_status_desc = 'COMPLETED'
+        AND c.id IS NOT NULL
+        {where_filter}
+    GROUP BY c.id, c.customer_name, c.email, c.phone_number
+    HAVING COUNT(*) >= $1
+        AND CURRENT_DATE - MAX(s.created_at::date) >= $2
+),
+favorite_channel AS (
+    SELECT DISTINCT ON (s.customer_id)
+        s.customer_id,
+        ch.name as channel_name
+    FROM sales s
+    INNER JOIN stores st ON s.store_id = st.id
+    JOIN channels ch ON ch.id = s.channel_id
+    WHERE s.sale_status_desc = 'COMPLETED'
+        {where_filter}
+    GROUP BY s.customer_id, ch.name
+    ORDER BY s.customer_id, COUNT(*) DESC
+),
+favorite_product AS (
+    SELECT DISTINCT ON (s.customer_id)
+        s.customer_id,
+        p.name as product_name
+    FROM sales s
+    INNER JOIN stores st ON s.store_id = st.id
+    JOIN product_sales ps ON ps.sale_id = s.id
+    JOIN products p ON p.id = ps.product_id
+    WHERE s.sale_status_desc = 'COMPLETED'
+        {where_filter}
+    GROUP BY s.customer_id, p.name
+    ORDER BY s.customer_id, COUNT(*) DESC
+)
+SELECT
+    cs.*,
+    fc.channel_name as favorite_channel,
+    fp.product_name as favorite_product
+FROM customer_stats cs
+LEFT JOIN favorite_channel fc ON fc.customer_id = cs.customer_id
+LEFT JOIN favorite_product fp ON fp.customer_id = cs.customer_id
+ORDER BY cs.total_spent DESC, cs.days_since_last_purchase DESC
+LIMIT $3
+"""
+
+SCENARIOS = [
+    {"name": "all brands", "brand_id": None},
+    {"name": "brand 2", "brand_id": 2},
+]
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def time_call(factory, iterations: int) -> tuple[list[float], object]:
+    """Run factory() iterations times (after one warm-up) and return latencies in ms"""
+    result = await factory()
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        result = await factory()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples, result
+
+
+async def main(args):
+    conn = await asyncpg.connect(args.dsn)
+    print(f"🌱 Seeding schema '{args.schema}' ({args.customers:,} customers, {args.sales:,} sales)...")
+    started = time.perf_counter()
+    counts = await seed_dataset(
+        conn, args.schema,
+        customers=args.customers,
+        sales=args.sales,
+        reseed=args.reseed
+    )
+    await conn.close()
+    print(f"   {counts} ({time.perf_counter() - started:.1f}s)")
+
+    db = Database()
+    db.pool = await create_pool(args.dsn, args.schema, min_size=1, max_size=2, command_timeout=600)
+    engine = AdvancedAnalyticsEngine(db)
+
+    params = [args.min_purchases, args.days_inactive, args.limit]
+
+    print()
+    print(f"{'scenario':<12} {'query':<8} {'p50 ms':>10} {'p95 ms':>10} {'max ms':>10}")
+    for scenario in SCENARIOS:
+        brand_id = scenario["brand_id"]
+        where_filter = "AND st.brand_id = $4" if brand_id else ""
+        legacy_params = params + ([brand_id] if brand_id else [])
+
+        legacy_samples, legacy_rows = await time_call(
+            lambda: db.fetch_all(LEGACY_CHURN_QUERY.format(where_filter=where_filter), *legacy_params),
+            args.iterations
+        )
+        current_samples, (current_rows, _) = await time_call(
+            lambda: engine.get_churn_risk_customers(
+                min_purchases=args.min_purchases,
+                days_inactive=args.days_inactive,
+                brand_id=brand_id,
+                limit=args.limit
+            ),
+            args.iterations
+        )
+
+        # Same customers, same stats (favorites may differ only on ties)
+        legacy_stats = [(r['customer_id'], r['total_purchases'], round(r['avg_days_between_purchases'], 6)) for r in legacy_rows]
+        current_stats = [(c.customer_id, c.total_purchases, round(c.avg_days_between_purchases, 6)) for c in current_rows]
+        match = "✓" if legacy_stats == current_stats else "✗ MISMATCH"
+
+        for label, samples in (("legacy", legacy_samples), ("current", current_samples)):
+            print(
+                f"{scenario['name']:<12} {label:<8} "
+                f"{statistics.median(samples):>10.1f} {percentile(samples, 95):>10.1f} {max(samples):>10.1f}"
+            )
+        speedup = statistics.median(legacy_samples) / statistics.median(current_samples)
+        print(f"{'':<12} speedup x{speedup:.1f}, results {match} ({len(current_rows)} customers)")
+
+    await db.pool.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark churn-risk query")
+    parser.add_argument("--dsn", default=settings.DATABASE_URL, help="PostgreSQL connection URL")
+    parser.add_argument("--schema", default="bench_churn", help="Schema holding the benchmark dataset")
+    parser.add_argument("--customers", type=int, default=100_000, help="Number of customers")
+    parser.add_argument("--sales", type=int, default=600_000, help="Number of sales")
+    parser.add_argument("--reseed", action="store_true", help="Drop and recreate the dataset")
+    parser.add_argument("--iterations", type=int, default=5, help="Timed runs per query")
+    parser.add_argument("--min-purchases", type=int, default=3)
+    parser.add_argument("--days-inactive", type=int, default=30)
+    parser.add_argument("--limit", type=int, default=100)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,99 @@
+"""
+Revenue anomaly engine benchmark: batched NumPy scoring vs per-series Python loop
+
+Usage (from backend/):
+    python -m benchmarks.bench_revenue_anomaly --stores 50 --channels 6 --days 365
+
+Runs on synthetic weekly-seasonal series with injected drops (no database needed),
+checks that both implementations flag the same days, then reports latency percentiles.
+"""
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from app.services.insights.anomaly_engine import MAD_TO_STD, score_revenue_anomalies
+from benchmarks.bench_churn_risk import percentile
+
+
+def synthetic_series(n_series: int, n_days: int, seed: int) -> tuple[np.ndarray, np.ndarray]:
+    """Weekly-seasonal noisy revenue with ~1% of days dropped to 20% of normal"""
+    rng = np.random.default_rng(seed)
+    level = rng.uniform(500, 5000, size=(n_series, 1))
+    weekly = np.array([0.8, 0.85, 0.9, 1.0, 1.3, 1.5, 1.1])
+    seasonal = weekly[np.arange(n_days) % 7]
+    values = level * seasonal * rng.normal(1.0, 0.08, size=(n_series, n_days))
+    drops = rng.random((n_series, n_days)) < 0.01
+    values[drops] *= 0.2
+    return values, drops
+
+
+def score_loop(values: np.ndarray, window: int, seasonal_weeks: int) -> np.ndarray:
+    """Reference implementation: one series and one day at a time"""
+    n_series, n_days = values.shape
+    span = 7 * seasonal_weeks
+    score = np.full(values.shape, np.nan)
+    for i in range(n_series):
+        for t in range(window, n_days):
+            history = values[i, t - window:t]
+            median = np.median(history)
+            mad = np.median(np.abs(history - median))
+            expected = np.median(values[i, t - span:t:7]) if t >= span else median
+            scale = max(MAD_TO_STD * mad, 0.1 * abs(median), 1.0)
+            score[i, t] = (values[i, t] - expected) / scale
+    return score
+
+
+def time_call(func, iterations: int) -> tuple[list[float], object]:
+    """Run func() iterations times (after one warm-up) and return latencies in ms"""
+    result = func()
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        result = func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples, result
+
+
+def main(args):
+    n_series = args.stores * args.channels
+    values, drops = synthetic_series(n_series, args.days, args.seed)
+    print(f"📈 {args.stores} stores x {args.channels} channels x {args.days} days = {values.size:,} points")
+
+    vectorized_samples, scores = time_call(
+        lambda: score_revenue_anomalies(values, window=args.window, seasonal_weeks=args.seasonal_weeks),
+        args.iterations
+    )
+    loop_samples, loop_score = time_call(
+        lambda: score_loop(values, args.window, args.seasonal_weeks),
+        max(1, args.iterations // 10)
+    )
+
+    flagged = np.nan_to_num(scores.score, nan=0.0) <= -args.threshold
+    loop_flagged = np.nan_to_num(loop_score, nan=0.0) <= -args.threshold
+    match = "✓" if np.array_equal(flagged, loop_flagged) else "✗ MISMATCH"
+    recall = (flagged & drops).sum() / max(drops[:, 7 * args.seasonal_weeks:].sum(), 1)
+
+    print()
+    print(f"{'engine':<12} {'p50 ms':>10} {'p95 ms':>10} {'max ms':>10}")
+    for label, samples in (("vectorized", vectorized_samples), ("loop", loop_samples)):
+        print(
+            f"{label:<12} {statistics.median(samples):>10.2f} "
+            f"{percentile(samples, 95):>10.2f} {max(samples):>10.2f}"
+        )
+    speedup = statistics.median(loop_samples) / statistics.median(vectorized_samples)
+    print(f"speedup x{speedup:.0f}, flagged days {match} ({flagged.sum()} flagged, recall {recall:.0%})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark revenue anomaly engine")
+    parser.add_argument("--stores", type=int, default=50)
+    parser.add_argument("--channels", type=int, default=6)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--window", type=int, default=28, help="Rolling median/MAD window (days)")
+    parser.add_argument("--seasonal-weeks", type=int, default=4, help="Same-weekday history (weeks)")
+    parser.add_argument("--threshold", type=float, default=3.5, help="Robust z-score threshold")
+    parser.add_argument("--iterations", type=int, default=20, help="Timed runs of the vectorized engine")
+    parser.add_argument("--seed", type=int, default=42)
+    main(parser.parse_args())
@@ -0,0 +1,200 @@
+"""
+Fixtures of the end-to-end API benchmark suite (pytest-benchmark)
+
+Usage (from backend/):
+    pytest benchmarks --no-cov --bench-dsn postgresql://... --bench-scale small,medium
+    pytest benchmarks --no-cov --update-baseline    # (re)record benchmarks/baselines/api_<scale>.json
+    pytest benchmarks --no-cov --check-latency      # also gate p95 (baseline recorded on this machine)
+
+Each scale is a deterministic dataset seeded once in its own schema (see
+benchmarks/seed.py). Requests go through the real app via httpx's ASGI transport,
+with the global Database pointed at that schema. Every case records p50/p95/p99
+and the number of SQL queries it ran; against a recorded baseline, a case fails
+when it runs more queries. Latencies depend on the hardware, so the committed
+baseline only gates them with --check-latency, meant for a baseline re-recorded
+on the same machine: p95 may then grow at most --regression-threshold.
+"""
+import asyncio
+import json
+from pathlib import Path
+
+import asyncpg
+import httpx
+import pytest
+
+from app.core.config import settings
+from app.core.database import db
+from app.main import app
+from benchmarks.api_cases import ApiCase
+from benchmarks.query_plans import PlanSnapshot
+from benchmarks.seed import seed_dataset, create_pool
+
+
+BASELINE_DIR = Path(__file__).resolve().parent / "baselines"
+
+SCALES = {
+    "small": {"customers": 10_000, "sales": 60_000},
+    "medium": {"customers": 100_000, "sales": 600_000},
+    "large": {"customers": 1_000_000, "sales": 6_000_000},
+}
+
+# p95 changes below this many ms are noise, whatever the threshold says
+MIN_REGRESSION_MS = 2.0
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("api benchmarks")
+    group.addoption("--bench-dsn", default=settings.DATABASE_URL, help="PostgreSQL holding the benchmark schemas")
+    group.addoption("--bench-scale", default="small", help=f"Comma-separated scales: {', '.join(SCALES)}")
+    group.addoption("--bench-rounds", type=int, default=20, help="Timed requests per case")
+    group.addoption("--reseed", action="store_true", help="Drop and recreate the benchmark datasets")
+    group.addoption("--update-baseline", action="store_true", help="Write results as the new baseline")
+    group.addoption("--check-latency", action="store_true",
+                    help="Also fail on p95 regressions (compare against a baseline recorded on this machine)")
+    group.addoption("--regression-threshold", type=float, default=0.25,
+                    help="With --check-latency, fail when p95 exceeds the baseline by more than this fraction")
+    group.addoption("--replica-dsn", default="",
+                    help="Streaming replica of --bench-dsn (or a second instance) for test_replicas.py")
+    group.addoption("--buffer-slack", type=float, default=0.25,
+                    help="Buffer budget recorded with --update-baseline, as a fraction above the measured buffers")
+
+
+def pytest_generate_tests(metafunc):
+    if "scale" in metafunc.fixturenames:
+        scales = [s.strip() for s in metafunc.config.getoption("--bench-scale").split(",") if s.strip()]
+        unknown = set(scales) - set(SCALES)
+        if unknown:
+            raise pytest.UsageError(f"Unknown --bench-scale {', '.join(sorted(unknown))}")
+        metafunc.parametrize("scale", scales, scope="session")
+
+
+class QueryCounter:
+    """Counts queries run through the app's Database (query hook)"""
+
+    def __init__(self):
+        self.count = 0
+
+    def record(self, _event):
+        self.count += 1
+
+
+class ApiRunner:
+    """Sends benchmark requests through the ASGI app on a dedicated event loop"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, client: httpx.AsyncClient, counter: QueryCounter):
+        self.loop = loop
+        self.client = client
+        self.counter = counter
+
+    def request(self, case: ApiCase) -> httpx.Response:
+        return self.loop.run_until_complete(self.client.get(case.url, params=case.params))
+
+    def count_queries(self, case: ApiCase) -> tuple[httpx.Response, int]:
+        """One request and the number of queries it ran"""
+        before = self.counter.count
+        response = self.request(case)
+        return response, self.counter.count - before
+
+
+class Baseline:
+    """Per-scale JSON baseline: {case: {p50_ms, p95_ms, p99_ms, queries}}"""
+
+    def __init__(self, path: Path, threshold: float, update: bool, check_latency: bool = False):
+        self.path = path
+        self.threshold = threshold
+        self.update = update
+        self.check_latency = check_latency
+        self.recorded = json.loads(path.read_text()) if path.exists() else {}
+        self.results = {}
+
+    def check(self, name: str, result: dict):
+        self.results[name] = result
+        expected = self.recorded.get(name)
+        if self.update or expected is None:
+            return
+
+        problems = []
+        limit = max(expected["p95_ms"] * (1 + self.threshold), expected["p95_ms"] + MIN_REGRESSION_MS)
+        if self.check_latency and result["p95_ms"] > limit:
+            problems.append(f"p95 {result['p95_ms']:.1f}ms > {limit:.1f}ms (baseline {expected['p95_ms']:.1f}ms)")
+        if result["queries"] > expected["queries"]:
+            problems.append(f"{result['queries']} queries per request (baseline {expected['queries']})")
+        if problems:
+            pytest.fail(f"{name} regressed: " + "; ".join(problems))
+
+    def save(self):
+        if not self.update:
+            return
+        self.path.parent.mkdir(exist_ok=True)
+        merged = {**self.recorded, **self.results}
+        self.path.write_text(json.dumps(dict(sorted(merged.items())), indent=2) + "\n")
+
+
+@pytest.fixture(scope="session")
+def bench_loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture(scope="session")
+def bench_pool(request, bench_loop, scale):
+    """Pool on the seeded dataset of `scale`"""
+    dsn = request.config.getoption("--bench-dsn")
+    schema = f"bench_api_{scale}"
+
+    async def setup():
+        conn = await asyncpg.connect(dsn)
+        try:
+            await seed_dataset(conn, schema, reseed=request.config.getoption("--reseed"), **SCALES[scale])
+        finally:
+            await conn.close()
+        return await create_pool(dsn, schema, min_size=1, max_size=settings.DB_POOL_SIZE, command_timeout=600)
+
+    pool = bench_loop.run_until_complete(setup())
+    yield pool
+    bench_loop.run_until_complete(pool.close())
+
+
+@pytest.fixture(scope="session")
+def api(bench_loop, bench_pool):
+    """
+    App client whose database is the seeded dataset of `scale`
+
+    Query budgets are enforced: a route over its @query_budget answers 500.
+    """
+    counter = QueryCounter()
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://benchmark")
+    previous_pool, db.pool = db.pool, bench_pool
+    previous_mode, settings.QUERY_BUDGET_MODE = settings.QUERY_BUDGET_MODE, "raise"
+    db.add_query_hook(counter.record)
+    yield ApiRunner(bench_loop, client, counter)
+
+    db.query_hooks.remove(counter.record)
+    settings.QUERY_BUDGET_MODE = previous_mode
+    db.pool = previous_pool
+    bench_loop.run_until_complete(client.aclose())
+
+
+@pytest.fixture(scope="session")
+def baseline(request, scale):
+    recorded = Baseline(
+        BASELINE_DIR / f"api_{scale}.json",
+        threshold=request.config.getoption("--regression-threshold"),
+        update=request.config.getoption("--update-baseline"),
+        check_latency=request.config.getoption("--check-latency")
+    )
+    yield recorded
+    recorded.save()
+
+
+
+@pytest.fixture(scope="session")
+def plan_snapshot(request, scale):
+    snapshot = PlanSnapshot(
+        BASELINE_DIR / f"plans_{scale}.json",
+        slack=request.config.getoption("--buffer-slack"),
+        update=request.config.getoption("--update-baseline")
+    )
+    yield snapshot
+    snapshot.save()
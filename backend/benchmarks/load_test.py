@@ -0,0 +1,376 @@
+"""
+Concurrent load test: virtual users replaying dashboard sessions
+
+Usage (from backend/):
+    python -m benchmarks.load_test --dsn postgresql://... --users 1,5,10,20,40
+    python -m benchmarks.load_test --base-url http://localhost:8000 --users 10,50
+    python -m benchmarks.load_test --dsn postgresql://... --scenario isolation --users 0,10,20,40
+
+A session is one filter change on a dashboard tab: every widget of the tab fires its
+request at once (as the frontend's useQuery hooks do), the user waits for all of them,
+then "thinks" before the next change. Each concurrency level runs for --duration
+seconds and reports throughput, request/session latency percentiles, error rate and
+how long requests waited for a pool connection (from /health), so the saturation knee
+shows up as throughput flattening while latency and pool wait climb.
+
+--scenario isolation checks admission control (app/core/admission.py): --users heavy
+users fire RFM / churn / insights / heatmap requests back to back while --light-users
+keep loading the filter lookups (/brands/list, /stores/list). Light p99 should stay
+flat as heavy load saturates; --no-admission shows the same run without route classes.
+
+Without --base-url the app runs in-process (ASGI transport) on the seeded benchmark
+schema with the production pool settings (min 5, max DB_POOL_SIZE); client and app
+then share one event loop, so prefer --base-url for CPU-bound levels.
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+
+import asyncpg
+import httpx
+
+from app.core.config import settings
+from app.core.database import db
+from app.main import app
+from benchmarks.bench_churn_risk import percentile
+from benchmarks.seed import NUM_BRANDS, seed_dataset, create_pool
+
+
+API_PREFIX = f"{settings.API_V1_PREFIX}/analytics"
+
+# Share of sessions per tab (components/dashboard/Dashboard.tsx, AdvancedDashboard.tsx)
+TAB_WEIGHTS = {"overview": 0.7, "advanced": 0.3}
+PERIOD_DAYS = [7, 30, 30, 90]
+# Stores of brand b are b, b + 7, b + 14, ... (benchmarks/seed.py)
+STORES_PER_BRAND = 7
+
+
+# ============================================================================
+# SESSIONS
+# ============================================================================
+
+def random_filters(rng: random.Random) -> dict:
+    """Filter state after a change in DateFilter / StoreFilter / AdvancedFilters"""
+    days = rng.choice(PERIOD_DAYS)
+    end = date.today()
+    brand_id = rng.randint(1, NUM_BRANDS)
+    filters = {
+        "brand_id": brand_id,
+        "start_date": (end - timedelta(days=days - 1)).isoformat(),
+        "end_date": end.isoformat(),
+    }
+    if rng.random() < 0.3:
+        stores = rng.sample(range(STORES_PER_BRAND), rng.randint(1, 3))
+        filters["store_ids"] = ",".join(str(brand_id + NUM_BRANDS * i) for i in sorted(stores))
+    return filters
+
+
+def overview_requests(filters: dict, rng: random.Random) -> list[tuple[str, dict]]:
+    """Widgets of 'Dashboard Geral'"""
+    return [
+        ("/overview", filters),
+        ("/sales/trend", filters),
+        ("/channels", filters),
+        ("/products/top", {**filters, "limit": 5}),
+        ("/insights/automatic", {**filters, "limit": 5}),
+    ]
+
+
+def advanced_requests(filters: dict, rng: random.Random) -> list[tuple[str, dict]]:
+    """Widgets of the advanced tab; ProductsByContext only queries with context filters"""
+    context = {}
+    if rng.random() < 0.5:
+        hour_start = rng.choice([11, 18, 19])
+        context = {"weekday": rng.randint(0, 6), "hour_start": hour_start, "hour_end": hour_start + 3}
+    churn = {"brand_id": filters["brand_id"], "min_purchases": 3, "days_inactive": 30}
+    if "store_ids" in filters:
+        churn["store_ids"] = filters["store_ids"]
+
+    requests = [
+        ("/delivery/performance", {**filters, **context}),
+        ("/stores/performance", {**filters, **context}),
+        ("/customers/churn-risk", churn),
+    ]
+    if context:
+        requests.append(("/products/by-context", {**filters, **context, "limit": 5}))
+    return requests
+
+
+SESSION_BUILDERS = {"overview": overview_requests, "advanced": advanced_requests}
+
+
+def heavy_request(rng: random.Random) -> tuple[str, dict]:
+    """One of the slowest analytics requests (@route_class("heavy"))"""
+    filters = random_filters(rng)
+    return rng.choice([
+        ("/customers/rfm", filters),
+        ("/customers/churn-risk", {"brand_id": filters["brand_id"], "min_purchases": 3, "days_inactive": 30}),
+        ("/insights/automatic", {**filters, "limit": 5}),
+        ("/sales/heatmap", filters),
+    ])
+
+
+def light_request(rng: random.Random) -> tuple[str, dict]:
+    """Filter lookups (@route_class("light"))"""
+    if rng.random() < 0.5:
+        return "/brands/list", {}
+    return "/stores/list", {"brand_id": rng.randint(1, NUM_BRANDS)}
+
+
+# ============================================================================
+# LOAD LEVELS
+# ============================================================================
+
+@dataclass
+class LevelResult:
+    """Samples of one concurrency level (latencies in ms)"""
+    users: int
+    requests: list[float] = field(default_factory=list)
+    sessions: list[float] = field(default_factory=list)
+    errors: dict = field(default_factory=dict)
+    elapsed: float = 0.0
+    pool: dict = field(default_factory=dict)
+
+    @property
+    def error_count(self) -> int:
+        return sum(self.errors.values())
+
+    @property
+    def error_rate(self) -> float:
+        total = len(self.requests) + self.error_count
+        return self.error_count / total if total else 0.0
+
+    @property
+    def throughput(self) -> float:
+        return len(self.requests) / self.elapsed if self.elapsed else 0.0
+
+
+async def timed_get(client: httpx.AsyncClient, path: str, params: dict, result: LevelResult):
+    started = time.perf_counter()
+    try:
+        response = await client.get(f"{API_PREFIX}{path}", params=params)
+    except httpx.HTTPError as e:
+        key = f"{path} {type(e).__name__}"
+        result.errors[key] = result.errors.get(key, 0) + 1
+        return
+    if response.status_code >= 400:
+        key = f"{path} {response.status_code}"
+        result.errors[key] = result.errors.get(key, 0) + 1
+        return
+    result.requests.append((time.perf_counter() - started) * 1000)
+
+
+async def virtual_user(client: httpx.AsyncClient, rng: random.Random, deadline: float, think_time: float, result: LevelResult):
+    tabs, weights = zip(*TAB_WEIGHTS.items())
+    while time.perf_counter() < deadline:
+        tab = rng.choices(tabs, weights)[0]
+        requests = SESSION_BUILDERS[tab](random_filters(rng), rng)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(timed_get(client, path, params, result) for path, params in requests))
+        if time.perf_counter() < deadline:
+            result.sessions.append((time.perf_counter() - started) * 1000)
+
+        if think_time:
+            await asyncio.sleep(min(rng.expovariate(1 / think_time), max(0.0, deadline - time.perf_counter())))
+
+
+async def request_loop(client: httpx.AsyncClient, build, rng: random.Random, deadline: float, think_time: float, result: LevelResult):
+    """One request at a time until `deadline` (isolation scenario)"""
+    while time.perf_counter() < deadline:
+        path, params = build(rng)
+        await timed_get(client, path, params, result)
+        if think_time:
+            await asyncio.sleep(min(think_time, max(0.0, deadline - time.perf_counter())))
+
+
+async def pool_snapshot(client: httpx.AsyncClient) -> dict:
+    response = await client.get("/health")
+    return response.json().get("pool", {})
+
+
+def pool_delta(before: dict, after: dict) -> dict:
+    """Pool acquire counters accumulated during a level"""
+    if not before or not after:
+        return {}
+    acquires = after["acquires"] - before["acquires"]
+    return {
+        "acquires": acquires,
+        "queued": after["queued"] - before["queued"],
+        "avg_wait_ms": (after["wait_seconds"] - before["wait_seconds"]) * 1000 / acquires if acquires else 0.0,
+        # Lifetime max: only meaningful when levels run in increasing order
+        "max_wait_ms": after["max_wait_seconds"] * 1000,
+    }
+
+
+async def run_level(client: httpx.AsyncClient, users: int, args) -> LevelResult:
+    # Warm-up at this concurrency (connections opened, plans cached) is not measured
+    if args.warmup:
+        await asyncio.gather(*(
+            virtual_user(client, random.Random(f"warmup-{users}-{i}"), time.perf_counter() + args.warmup, args.think_time, LevelResult(users))
+            for i in range(users)
+        ))
+
+    result = LevelResult(users)
+    before = await pool_snapshot(client)
+    started = time.perf_counter()
+    deadline = started + args.duration
+    await asyncio.gather(*(
+        virtual_user(client, random.Random(f"{args.seed}-{users}-{i}"), deadline, args.think_time, result)
+        for i in range(users)
+    ))
+    result.elapsed = time.perf_counter() - started
+    result.pool = pool_delta(before, await pool_snapshot(client))
+    return result
+
+
+async def run_isolation_level(client: httpx.AsyncClient, users: int, args) -> tuple[LevelResult, LevelResult]:
+    """(heavy, light) samples with `users` heavy users and args.light_users light users"""
+    heavy, light = LevelResult(users), LevelResult(args.light_users)
+    before = await pool_snapshot(client)
+    started = time.perf_counter()
+    deadline = started + args.duration
+    await asyncio.gather(
+        *(request_loop(client, heavy_request, random.Random(f"{args.seed}-heavy-{users}-{i}"), deadline, 0.0, heavy)
+          for i in range(users)),
+        *(request_loop(client, light_request, random.Random(f"{args.seed}-light-{users}-{i}"), deadline, 0.1, light)
+          for i in range(args.light_users)),
+    )
+    heavy.elapsed = light.elapsed = time.perf_counter() - started
+    heavy.pool = pool_delta(before, await pool_snapshot(client))
+    return heavy, light
+
+
+def print_isolation_level(heavy: LevelResult, light: LevelResult):
+    heavy_latency = heavy.requests or [0.0]
+    light_latency = light.requests or [0.0]
+    wait = f"{heavy.pool['avg_wait_ms']:>9.1f}" if heavy.pool else f"{'-':>9}"
+    print(
+        f"{heavy.users:>6} {heavy.throughput:>8.1f} {percentile(heavy_latency, 95):>8.1f} {heavy.error_rate:>7.1%} "
+        f"{statistics.median(light_latency):>8.1f} {percentile(light_latency, 95):>8.1f} {percentile(light_latency, 99):>8.1f} "
+        f"{light.error_rate:>7.1%} {wait}"
+    )
+
+
+def print_level(result: LevelResult):
+    requests = result.requests or [0.0]
+    sessions = result.sessions or [0.0]
+    pool = result.pool
+    pool_columns = (
+        f"{pool['avg_wait_ms']:>9.1f} {pool['max_wait_ms']:>9.1f} {pool['queued'] / max(pool['acquires'], 1):>8.0%}"
+        if pool else f"{'-':>9} {'-':>9} {'-':>8}"
+    )
+    print(
+        f"{result.users:>6} {result.throughput:>8.1f} "
+        f"{statistics.median(requests):>8.1f} {percentile(requests, 95):>8.1f} {percentile(requests, 99):>8.1f} "
+        f"{percentile(sessions, 95):>9.1f} {result.error_rate:>7.1%} {pool_columns}"
+    )
+
+
+def saturation_knee(results: list[LevelResult], min_gain: float) -> LevelResult | None:
+    """First level after which adding users raises throughput by less than `min_gain`"""
+    for current, following in zip(results, results[1:]):
+        if current.throughput and following.throughput < current.throughput * (1 + min_gain):
+            return current
+    return None
+
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+async def close(client: httpx.AsyncClient, args):
+    await client.aclose()
+    if not args.base_url:
+        await db.pool.close()
+        db.pool = None
+
+
+async def main(args):
+    levels = sorted(int(u) for u in args.users.split(","))
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    timeout = httpx.Timeout(args.timeout)
+
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=timeout)
+        print(f"🎯 Target: {args.base_url}")
+    else:
+        conn = await asyncpg.connect(args.dsn)
+        print(f"🌱 Seeding schema '{args.schema}' ({args.customers:,} customers, {args.sales:,} sales)...")
+        counts = await seed_dataset(conn, args.schema, customers=args.customers, sales=args.sales, reseed=args.reseed)
+        await conn.close()
+        print(f"   {counts}")
+        db.pool = await create_pool(args.dsn, args.schema, min_size=5, max_size=args.pool_size, command_timeout=60)
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadtest", timeout=timeout)
+        print(f"🎯 Target: in-process app, pool max_size={args.pool_size}")
+
+    if args.no_admission:
+        settings.ADMISSION_ENABLED = False
+    print(f"   {args.duration:.0f}s per level, think time {args.think_time:.1f}s, levels {levels}")
+    print()
+
+    if args.scenario == "isolation":
+        print(f"   {args.light_users} light users, admission {'on' if settings.ADMISSION_ENABLED else 'off'}")
+        print(
+            f"{'heavy':>6} {'req/s':>8} {'p95 ms':>8} {'errors':>7} "
+            f"{'light p50':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7} {'wait avg':>9}"
+        )
+        try:
+            for users in levels:
+                heavy, light = await run_isolation_level(client, users, args)
+                print_isolation_level(heavy, light)
+                for key, count in sorted({**heavy.errors, **light.errors}.items()):
+                    print(f"{'':>6} ⚠️  {count}x {key}")
+        finally:
+            await close(client, args)
+        return
+
+    print(
+        f"{'users':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+        f"{'sess p95':>9} {'errors':>7} {'wait avg':>9} {'wait max':>9} {'queued':>8}"
+    )
+
+    results = []
+    try:
+        for users in levels:
+            result = await run_level(client, users, args)
+            results.append(result)
+            print_level(result)
+            for key, count in sorted(result.errors.items()):
+                print(f"{'':>6} ⚠️  {count}x {key}")
+    finally:
+        await close(client, args)
+
+    knee = saturation_knee(results, args.min_gain)
+    print()
+    if knee:
+        print(f"📉 Saturation knee ≈ {knee.users} users ({knee.throughput:.1f} req/s): more users add latency, not throughput")
+    else:
+        print("📈 Throughput still growing at the highest level: add levels to find the knee")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the API with concurrent dashboard sessions")
+    parser.add_argument("--base-url", help="Running API (default: in-process app on the benchmark schema)")
+    parser.add_argument("--dsn", default=settings.DATABASE_URL, help="PostgreSQL connection URL (in-process mode)")
+    parser.add_argument("--schema", default="bench_load", help="Schema holding the benchmark dataset")
+    parser.add_argument("--customers", type=int, default=100_000, help="Number of customers")
+    parser.add_argument("--sales", type=int, default=600_000, help="Number of sales")
+    parser.add_argument("--reseed", action="store_true", help="Drop and recreate the dataset")
+    parser.add_argument("--pool-size", type=int, default=settings.DB_POOL_SIZE, help="Pool max_size (in-process mode)")
+    parser.add_argument("--scenario", choices=["sessions", "isolation"], default="sessions",
+                        help="Dashboard sessions, or heavy users against light lookups (admission control)")
+    parser.add_argument("--users", default="1,5,10,20,40", help="Comma-separated concurrency levels (heavy users with isolation)")
+    parser.add_argument("--light-users", type=int, default=2, help="Users loading filter lookups (isolation)")
+    parser.add_argument("--no-admission", action="store_true", help="Disable route classes (in-process mode)")
+    parser.add_argument("--duration", type=float, default=30, help="Measured seconds per level")
+    parser.add_argument("--warmup", type=float, default=5, help="Unmeasured seconds before each level")
+    parser.add_argument("--think-time", type=float, default=1.0, help="Mean pause between filter changes (s)")
+    parser.add_argument("--timeout", type=float, default=60, help="Request timeout (s)")
+    parser.add_argument("--min-gain", type=float, default=0.1, help="Throughput gain below which a level is past the knee")
+    parser.add_argument("--seed", type=int, default=42)
+    asyncio.run(main(parser.parse_args()))
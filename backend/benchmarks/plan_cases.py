@@ -0,0 +1,112 @@
+"""
+Representative filter combinations for every engine method and insight detector
+
+Each public method of AnalyticsEngine and AdvancedAnalyticsEngine gets one case per
+filter combination it accepts, so a new method or parameter is covered without
+touching this file. Detectors run their whole detect() (several queries each).
+"""
+import inspect
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+
+from app.services.analytics_advanced import AdvancedAnalyticsEngine
+from app.services.analytics_engine import AnalyticsEngine
+from app.services.insights.cancellation_detector import CancellationDetector
+from app.services.insights.churn_risk_detector import ChurnRiskDetector
+from app.services.insights.product_opportunity_detector import ProductOpportunityDetector
+from app.services.insights.revenue_anomaly_detector import RevenueAnomalyDetector
+from app.services.insights.store_outlier_detector import StoreOutlierDetector
+
+
+END = date.today()
+MONTH_START = END - timedelta(days=29)
+
+# Brand 2 owns stores 2, 9, 16, ... and channels 7-12 (benchmarks/seed.py)
+FILTERS = {
+    "brand": {"brand_id": 2},
+    "all_brands": {},
+    "stores": {"brand_id": 2, "store_ids": [2, 9, 16]},
+    "channels": {"brand_id": 2, "channel_ids": [7, 8]},
+    "context": {"brand_id": 2, "weekday": 5, "hour_start": 19, "hour_end": 22, "channel_id": 8},
+}
+
+# Arguments that only some methods take, set to a representative value
+METHOD_ARGS = {
+    "start_date": MONTH_START,
+    "end_date": END,
+    "compare_to": "previous",
+}
+
+
+@dataclass(frozen=True)
+class PlanCase:
+    """One engine call whose queries are explained"""
+    name: str
+    target: str
+    method: str
+    kwargs: dict = field(default_factory=dict)
+    allow_seq_scan: bool = False
+
+    def call(self, db):
+        if self.target == "detector":
+            detector_class = DETECTORS[self.method]
+            return detector_class(db, **self.kwargs).detect()
+        engine = ENGINES[self.target](db)
+        return getattr(engine, self.method)(**self.kwargs)
+
+
+ENGINES = {"analytics": AnalyticsEngine, "advanced": AdvancedAnalyticsEngine}
+
+
+# Churn risk reads each customer's whole purchase history: there is no date range
+# to index, and scanning sales is cheaper than an index over a brand's share of it
+SEQ_SCAN_ALLOWED = {"get_churn_risk_customers", "ChurnRiskDetector"}
+
+# Detectors run by InsightsEngine.generate_insights
+DETECTORS = {
+    detector.__name__: detector for detector in (
+        CancellationDetector,
+        ChurnRiskDetector,
+        ProductOpportunityDetector,
+        RevenueAnomalyDetector,
+        StoreOutlierDetector,
+    )
+}
+
+
+def engine_cases() -> list[PlanCase]:
+    cases = []
+    for target, engine_class in ENGINES.items():
+        for method, function in inspect.getmembers(engine_class, inspect.iscoroutinefunction):
+            if method.startswith("_"):
+                continue
+            parameters = inspect.signature(function).parameters
+            base = {name: value for name, value in METHOD_ARGS.items() if name in parameters}
+            for label, filters in FILTERS.items():
+                if not set(filters) <= set(parameters):
+                    continue
+                # "context" only differs from "brand" where context filters exist
+                if label == "context" and not {"weekday", "hour_start"} <= set(parameters):
+                    continue
+                cases.append(PlanCase(
+                    f"{method}[{label}]", target, method, {**base, **filters},
+                    allow_seq_scan=method in SEQ_SCAN_ALLOWED
+                ))
+    return cases
+
+
+def detector_cases() -> list[PlanCase]:
+    cases = []
+    for name in sorted(DETECTORS):
+        for label in ("brand", "stores"):
+            kwargs = {"brand_id": 2, "start_date": MONTH_START, "end_date": END}
+            if label == "stores":
+                kwargs["store_ids"] = FILTERS["stores"]["store_ids"]
+            cases.append(PlanCase(
+                f"{name}[{label}]", "detector", name, kwargs,
+                allow_seq_scan=name in SEQ_SCAN_ALLOWED
+            ))
+    return cases
+
+
+PLAN_CASES = engine_cases() + detector_cases()
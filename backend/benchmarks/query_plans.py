@@ -0,0 +1,122 @@
+"""
+EXPLAIN (ANALYZE, BUFFERS) capture for the engines' dynamically built SQL
+
+PlanRecorder is a Database that explains every query before running it, so engine
+methods and detectors execute unchanged while their plans are collected. Plans are
+reduced to a normalized shape (node types, relations, indexes, join types; no costs,
+row counts or timings) whose hash is stable across runs on the same dataset.
+"""
+import hashlib
+import json
+from pathlib import Path
+
+from app.core.database import Database
+
+
+# Node attributes that identify a plan; everything else (costs, rows, timing) varies
+SHAPE_KEYS = ("Relation Name", "Index Name", "Join Type", "Strategy", "CTE Name", "Subplan Name")
+
+# Relations that must always be reached through an index
+INDEXED_RELATIONS = ("sales",)
+
+
+class PlanRecorder(Database):
+    """Database that records EXPLAIN (ANALYZE, BUFFERS) of each query it runs"""
+
+    def __init__(self, pool):
+        super().__init__()
+        self.pool = pool
+        self.plans: list[dict] = []
+
+    async def _explain(self, query: str, args: tuple):
+        async with self.acquire() as connection:
+            explained = await connection.fetchval(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {query}", *args)
+        self.plans.append(json.loads(explained)[0])
+
+    async def fetch_one(self, query: str, *args):
+        await self._explain(query, args)
+        return await super().fetch_one(query, *args)
+
+    async def fetch_all(self, query: str, *args):
+        await self._explain(query, args)
+        return await super().fetch_all(query, *args)
+
+
+def plan_shape(node: dict) -> str:
+    """Normalized plan tree, e.g. 'Hash Join[Inner](Seq Scan[stores], Hash(...))'"""
+    attributes = [str(node[key]) for key in SHAPE_KEYS if key in node]
+    if node.get("Parallel Aware"):
+        attributes.insert(0, "parallel")
+    shape = node["Node Type"]
+    if attributes:
+        shape += f"[{' '.join(attributes)}]"
+    children = node.get("Plans", [])
+    if children:
+        shape += "(" + ", ".join(plan_shape(child) for child in children) + ")"
+    return shape
+
+
+def seq_scans(node: dict, relations=INDEXED_RELATIONS) -> list[str]:
+    """Relations in `relations` read by a sequential scan anywhere in the plan"""
+    found = []
+    if node["Node Type"] == "Seq Scan" and node.get("Relation Name") in relations:
+        found.append(node["Relation Name"])
+    for child in node.get("Plans", []):
+        found.extend(seq_scans(child, relations))
+    return found
+
+
+def summarize(explained: dict) -> dict:
+    """Snapshot entry of one EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) result"""
+    root = explained["Plan"]
+    shape = plan_shape(root)
+    return {
+        "fingerprint": hashlib.sha1(shape.encode()).hexdigest()[:12],
+        # Cumulative over the tree; hit + read does not depend on what is cached
+        "buffers": root.get("Shared Hit Blocks", 0) + root.get("Shared Read Blocks", 0),
+        "temp_buffers": root.get("Temp Read Blocks", 0) + root.get("Temp Written Blocks", 0),
+        "execution_ms": round(explained.get("Execution Time", 0.0), 2),
+        "seq_scans": seq_scans(root),
+        "shape": shape,
+    }
+
+
+class PlanSnapshot:
+    """Per-scale JSON snapshot: {query: {fingerprint, shape, buffers, buffer_budget}}"""
+
+    def __init__(self, path: Path, slack: float, update: bool):
+        self.path = path
+        self.slack = slack
+        self.update = update
+        self.recorded = json.loads(path.read_text()) if path.exists() else {}
+        self.results = {}
+
+    def check(self, key: str, plan: dict, allow_seq_scan: bool = False) -> tuple[list[str], list[str]]:
+        """(failures, warnings) of a captured plan against the snapshot"""
+        expected = self.recorded.get(key)
+        budget = expected["buffer_budget"] if expected and not self.update else round(plan["buffers"] * (1 + self.slack))
+        self.results[key] = {
+            "fingerprint": plan["fingerprint"],
+            "buffers": plan["buffers"],
+            "buffer_budget": budget,
+            "shape": plan["shape"],
+        }
+
+        failures, warnings = [], []
+        if plan["seq_scans"] and not allow_seq_scan:
+            failures.append(f"{key}: seq scan on {', '.join(sorted(set(plan['seq_scans'])))}")
+        if expected is None or self.update:
+            return failures, warnings
+
+        if plan["buffers"] > budget:
+            failures.append(f"{key}: {plan['buffers']} buffers > budget {budget}")
+        if plan["fingerprint"] != expected["fingerprint"]:
+            warnings.append(f"{key}: plan changed\n  was: {expected['shape']}\n  now: {plan['shape']}")
+        return failures, warnings
+
+    def save(self):
+        if not self.update:
+            return
+        self.path.parent.mkdir(exist_ok=True)
+        merged = {**self.recorded, **self.results}
+        self.path.write_text(json.dumps(dict(sorted(merged.items())), indent=2) + "\n")
@@ -0,0 +1,217 @@
+"""
+Deterministic benchmark dataset seeded entirely in SQL (generate_series + setseed)
+
+The dataset lives in its own schema so it never touches the application data:
+benchmarks connect with search_path set to that schema.
+"""
+from pathlib import Path
+
+import asyncpg
+
+
+DATABASE_DIR = Path(__file__).resolve().parents[2] / "database"
+
+CHANNELS = [
+    ('Presencial', 'P'),
+    ('iFood', 'D'),
+    ('Rappi', 'D'),
+    ('Uber Eats', 'D'),
+    ('WhatsApp', 'D'),
+    ('App Próprio', 'D'),
+]
+NUM_BRANDS = 7
+
+
+async def seed_dataset(
+    conn: asyncpg.Connection,
+    schema: str,
+    customers: int = 100_000,
+    sales: int = 600_000,
+    stores: int = 50,
+    products: int = 490,
+    days: int = 180,
+    seed: float = 0.42,
+    reseed: bool = False
+) -> dict:
+    """
+    Create `schema` with the application tables and fill it with a deterministic dataset.
+
+    Customer purchase counts are skewed (power distribution) so churn/RFM queries see
+    a realistic mix of one-off and recurrent customers. Returns row counts per table.
+    """
+    exists = await conn.fetchval(
+        "SELECT EXISTS (SELECT 1 FROM information_schema.tables WHERE table_schema = $1 AND table_name = 'sales')",
+        schema
+    )
+    if exists and not reseed:
+        return await _table_counts(conn, schema)
+
+    # One transaction: a failed seed must not leave a half-filled schema behind
+    async with conn.transaction():
+        await _seed(conn, schema, customers, sales, stores, products, days, seed)
+    return await _table_counts(conn, schema)
+
+
+async def _seed(
+    conn: asyncpg.Connection,
+    schema: str,
+    customers: int,
+    sales: int,
+    stores: int,
+    products: int,
+    days: int,
+    seed: float
+):
+    await conn.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+    await conn.execute(f"CREATE SCHEMA {schema}")
+    await conn.execute(f"SET search_path TO {schema}")
+    await conn.execute((DATABASE_DIR / "schema.sql").read_text())
+
+    # random() is only reproducible when every row is produced by this backend, in order
+    await conn.execute("SET max_parallel_workers_per_gather = 0")
+    await conn.execute("SELECT setseed($1)", seed)
+
+    channel_names = [name for name, _ in CHANNELS]
+    channel_types = [ch_type for _, ch_type in CHANNELS]
+
+    await conn.execute(
+        "INSERT INTO brands (name) SELECT 'Brand ' || g FROM generate_series(1, $1) g",
+        NUM_BRANDS
+    )
+    # Store g belongs to brand 1 + (g - 1) % 7
+    await conn.execute(
+        """
+        INSERT INTO stores (brand_id, name, city, state, is_active)
+        SELECT 1 + (g - 1) % $2, 'Store ' || g, 'City ' || (g % 20), 'SP', random() > 0.1
+        FROM generate_series(1, $1) g
+        """,
+        stores, NUM_BRANDS
+    )
+    # Channel of brand b at position k (0-based) has id (b - 1) * 6 + k + 1
+    await conn.execute(
+        """
+        INSERT INTO channels (brand_id, name, description, type)
+        SELECT 1 + (g - 1) / $2, ($3::text[])[1 + (g - 1) % $2], 'Canal', ($4::text[])[1 + (g - 1) % $2]
+        FROM generate_series(1, $1::int * $2::int) g
+        """,
+        NUM_BRANDS, len(CHANNELS), channel_names, channel_types
+    )
+    await conn.execute(
+        """
+        INSERT INTO categories (brand_id, name, type)
+        SELECT 1 + (g - 1) / 6, 'Categoria ' || (1 + (g - 1) % 6), 'P'
+        FROM generate_series(1, $1 * 6) g
+        """,
+        NUM_BRANDS
+    )
+    # Product g belongs to brand 1 + (g - 1) % 7
+    await conn.execute(
+        """
+        INSERT INTO products (brand_id, category_id, name)
+        SELECT 1 + (g - 1) % $2, ((g - 1) % $2) * 6 + 1 + (g % 6), 'Produto ' || g
+        FROM generate_series(1, $1) g
+        """,
+        products, NUM_BRANDS
+    )
+    await conn.execute(
+        """
+        INSERT INTO customers (customer_name, email, phone_number, created_at)
+        SELECT 'Cliente ' || g, 'cliente' || g || '@example.com', '11' || lpad(g::text, 9, '0'),
+               TIMESTAMP '2024-01-01' + (g % 720) * INTERVAL '1 day'
+        FROM generate_series(1, $1) g
+        """,
+        customers
+    )
+
+    await conn.execute(
+        """
+        INSERT INTO sales (
+            store_id, customer_id, channel_id, created_at, sale_status_desc,
+            total_amount_items, total_amount, value_paid,
+            production_seconds, delivery_seconds
+        )
+        SELECT
+            st.id,
+            CASE WHEN r.r_anon < 0.3 THEN NULL ELSE 1 + floor(power(r.r_customer, 2) * $2)::int END,
+            (st.brand_id - 1) * 6 + 1 + r.channel_pos,
+            date_trunc('day', now()) - (r.r_time * $4) * INTERVAL '1 day',
+            CASE WHEN r.r_status < 0.95 THEN 'COMPLETED' ELSE 'CANCELLED' END,
+            r.amount,
+            r.amount,
+            CASE WHEN r.r_status < 0.95 THEN r.amount ELSE 0 END,
+            CASE WHEN r.r_status < 0.95 THEN 300 + floor(r.r_prod * 2100)::int END,
+            CASE WHEN r.r_status < 0.95 AND r.channel_pos > 0 THEN 600 + floor(r.r_deliv * 3000)::int END
+        FROM (
+            SELECT
+                g,
+                1 + floor(random() * $3)::int as store_id,
+                random() as r_anon,
+                random() as r_customer,
+                floor(power(random(), 1.5) * 6)::int as channel_pos,
+                random() as r_time,
+                random() as r_status,
+                round((15 + random() * 185)::numeric, 2) as amount,
+                random() as r_prod,
+                random() as r_deliv
+            FROM generate_series(1, $1) g
+        ) r
+        JOIN stores st ON st.id = r.store_id
+        ORDER BY r.g
+        """,
+        sales, customers, stores, days
+    )
+
+    products_per_brand = products // NUM_BRANDS
+    await conn.execute(
+        """
+        INSERT INTO product_sales (sale_id, product_id, quantity, base_price, total_price)
+        SELECT
+            s.id,
+            st.brand_id + $1 * floor(random() * $2)::int,
+            1,
+            s.total_amount_items / (1 + s.id % 3),
+            s.total_amount_items / (1 + s.id % 3)
+        FROM sales s
+        JOIN stores st ON st.id = s.store_id
+        CROSS JOIN LATERAL generate_series(1, 1 + s.id % 3) n
+        ORDER BY s.id, n
+        """,
+        NUM_BRANDS, products_per_brand
+    )
+    await conn.execute(
+        """
+        INSERT INTO delivery_sales (sale_id, status, delivery_type, courier_type)
+        SELECT id, 'DELIVERED', 'DELIVERY', 'PLATFORM'
+        FROM sales
+        WHERE delivery_seconds IS NOT NULL
+        ORDER BY id
+        """
+    )
+    await conn.execute(
+        """
+        INSERT INTO delivery_addresses (sale_id, delivery_sale_id, city, state)
+        SELECT sale_id, id, 'Bairro ' || (sale_id % 40), 'SP'
+        FROM delivery_sales
+        ORDER BY id
+        """
+    )
+
+    await conn.execute((DATABASE_DIR / "add_indexes.sql").read_text())
+    await conn.execute("ANALYZE")
+
+
+async def _table_counts(conn: asyncpg.Connection, schema: str) -> dict:
+    """Row counts of the seeded fact and dimension tables"""
+    counts = {}
+    for table in ("customers", "stores", "products", "sales", "product_sales", "delivery_sales"):
+        counts[table] = await conn.fetchval(f"SELECT COUNT(*) FROM {schema}.{table}")
+    return counts
+
+
+async def create_pool(dsn: str, schema: str, **kwargs) -> asyncpg.Pool:
+    """Pool whose connections resolve unqualified table names to the benchmark schema"""
+    return await asyncpg.create_pool(
+        dsn=dsn,
+        server_settings={"search_path": schema},
+        **kwargs
+    )
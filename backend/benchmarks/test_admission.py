@@ -0,0 +1,210 @@
+"""
+ConcurrencyLimit (app/core/database.py) and PoolAutoscaler (app/core/admission.py)
+
+Deterministic: waiters are real tasks on the test's event loop, and the autoscaler
+is driven through tick(now) with fake timestamps. No database needed.
+"""
+import asyncio
+from types import SimpleNamespace
+
+from app.core.admission import PoolAutoscaler
+from app.core.database import ConcurrencyLimit, PoolStats
+
+
+async def queue_waiters(limit: ConcurrencyLimit, count: int) -> list[asyncio.Task]:
+    """`count` acquire() tasks, already queued on the limit"""
+    tasks = [asyncio.create_task(limit.acquire()) for _ in range(count)]
+    await asyncio.sleep(0)
+    return tasks
+
+
+# ============================================================================
+# CONCURRENCY LIMIT
+# ============================================================================
+
+async def test_release_hands_the_slot_to_the_first_waiter():
+    limit = ConcurrencyLimit(1)
+    await limit.acquire()
+    first, second = await queue_waiters(limit, 2)
+    assert limit.waiting == 2
+
+    limit.release()
+    await asyncio.sleep(0)
+    assert first.done() and not second.done()
+    assert limit.in_use == 1 and limit.waiting == 1
+
+    limit.release()
+    await second
+    assert limit.in_use == 1 and limit.waiting == 0
+
+
+async def test_resize_grows_to_the_ceiling_and_wakes_waiters():
+    limit = ConcurrencyLimit(2, ceiling=4)
+    await limit.acquire()
+    await limit.acquire()
+    waiters = await queue_waiters(limit, 3)
+
+    assert limit.resize(10) == 4
+    await asyncio.sleep(0)
+    assert sum(task.done() for task in waiters) == 2
+    assert limit.in_use == 4 and limit.waiting == 1
+
+    # Shrinking keeps current holders: the last waiter runs once enough of them left
+    assert limit.resize(0) == 2
+    for _ in range(2):
+        limit.release()
+    await asyncio.sleep(0)
+    assert not waiters[2].done() and limit.in_use == 2
+    limit.release()
+    await waiters[2]
+    assert limit.in_use == 2 and limit.waiting == 0
+
+
+async def test_cancelled_waiter_leaves_the_queue():
+    limit = ConcurrencyLimit(1)
+    await limit.acquire()
+    first, second = await queue_waiters(limit, 2)
+
+    first.cancel()
+    await asyncio.sleep(0)
+    assert first.cancelled() and limit.waiting == 1
+
+    limit.release()
+    await second
+    assert limit.in_use == 1 and limit.waiting == 0
+
+
+async def test_waiter_cancelled_after_its_grant_passes_the_slot_on():
+    limit = ConcurrencyLimit(1)
+    await limit.acquire()
+    first, second = await queue_waiters(limit, 2)
+
+    # The slot is granted to `first`, which is cancelled before it gets to run
+    limit.release()
+    first.cancel()
+    await asyncio.sleep(0)
+    assert first.cancelled()
+
+    await second
+    assert limit.in_use == 1 and limit.waiting == 0
+    limit.release()
+    assert limit.in_use == 0
+
+
+# ============================================================================
+# POOL AUTOSCALER
+# ============================================================================
+
+def autoscaler(base: int = 2, ceiling: int = 6) -> PoolAutoscaler:
+    db = SimpleNamespace(connection_limit=ConcurrencyLimit(base, ceiling), pool_stats=PoolStats())
+    return PoolAutoscaler(db, grow_after_seconds=2.0, shrink_after_seconds=60.0)
+
+
+async def test_grows_after_sustained_waiters_up_to_the_ceiling():
+    scaler = autoscaler()
+    limit = scaler.db.connection_limit
+    for _ in range(2):
+        await limit.acquire()
+    await queue_waiters(limit, 3)
+
+    scaler.tick(0.0)
+    scaler.tick(1.9)
+    assert limit.limit == 2
+
+    # Grows by the number of waiters, which are woken right away
+    scaler.tick(2.0)
+    await asyncio.sleep(0)
+    assert limit.limit == 5 and limit.in_use == 5 and limit.waiting == 0
+
+    await queue_waiters(limit, 4)
+    scaler.tick(3.0)
+    scaler.tick(4.0)
+    assert limit.limit == 6
+
+
+async def test_queued_pool_acquires_count_as_busy():
+    scaler = autoscaler()
+    stats = scaler.db.pool_stats
+
+    for now in (0.0, 1.0, 2.0):
+        stats.record(0.01, queued=True)
+        scaler.tick(now)
+    assert scaler.db.connection_limit.limit == 3
+
+    # A tick without new queued acquires resets the busy streak
+    scaler.tick(3.0)
+    stats.record(0.01, queued=True)
+    scaler.tick(4.0)
+    assert scaler.db.connection_limit.limit == 3
+
+
+async def test_interrupted_busy_streak_does_not_grow():
+    scaler = autoscaler()
+    limit = scaler.db.connection_limit
+    for _ in range(2):
+        await limit.acquire()
+    (waiter,) = await queue_waiters(limit, 1)
+
+    scaler.tick(0.0)
+    limit.release()
+    await waiter
+    scaler.tick(1.0)
+    await queue_waiters(limit, 1)
+    scaler.tick(2.5)
+    assert limit.limit == 2
+
+
+async def test_shrinks_halfway_to_base_once_the_extra_is_idle():
+    scaler = autoscaler(base=2, ceiling=10)
+    limit = scaler.db.connection_limit
+    limit.resize(10)
+    for _ in range(6):
+        await limit.acquire()
+
+    # Over half of the limit in use: no shrinking however long it lasts
+    scaler.tick(0.0)
+    scaler.tick(120.0)
+    assert limit.limit == 10
+
+    limit.release()
+    scaler.tick(130.0)
+    scaler.tick(189.0)
+    assert limit.limit == 10
+    scaler.tick(190.0)
+    assert limit.limit == 6
+
+    # Each further idle interval halves the distance to base, down to base
+    for _ in range(2):
+        limit.release()
+    scaler.tick(250.0)
+    assert limit.limit == 4
+    for _ in range(3):
+        limit.release()
+    scaler.tick(310.0)
+    assert limit.limit == 3
+    scaler.tick(370.0)
+    scaler.tick(430.0)
+    assert limit.limit == 2 and limit.in_use == 0
+
+
+async def test_waiters_reset_the_idle_timer():
+    scaler = autoscaler(base=2, ceiling=6)
+    limit = scaler.db.connection_limit
+    limit.resize(6)
+
+    scaler.tick(0.0)
+    scaler.tick(50.0)
+    for _ in range(6):
+        await limit.acquire()
+    (waiter,) = await queue_waiters(limit, 1)
+    scaler.tick(55.0)
+    for _ in range(6):
+        limit.release()
+    await waiter
+    limit.release()
+
+    scaler.tick(70.0)
+    scaler.tick(100.0)
+    assert limit.limit == 6
+    scaler.tick(130.0)
+    assert limit.limit == 4
@@ -0,0 +1,44 @@
+"""
+Vectorized revenue anomaly scoring (app/services/insights/anomaly_engine.py)
+against the per-series loop of bench_revenue_anomaly.py; no database needed.
+"""
+import numpy as np
+
+from app.services.insights.anomaly_engine import score_revenue_anomalies
+from benchmarks.bench_revenue_anomaly import score_loop, synthetic_series
+
+
+WINDOW = 28
+SEASONAL_WEEKS = 4
+THRESHOLD = 3.5
+
+
+def planted_spike_series() -> tuple[np.ndarray, tuple[int, int]]:
+    """Weekly-seasonal series without drops, one day of one series tripled"""
+    rng = np.random.default_rng(7)
+    weekly = np.array([0.8, 0.85, 0.9, 1.0, 1.3, 1.5, 1.1])
+    values = 1000 * weekly[np.arange(70) % 7] * rng.normal(1.0, 0.03, size=(3, 70))
+    spike = (1, 60)
+    values[spike] *= 3
+    return values, spike
+
+
+def test_scores_match_loop_reference():
+    values, _ = synthetic_series(n_series=6, n_days=90, seed=42)
+
+    scores = score_revenue_anomalies(values, window=WINDOW, seasonal_weeks=SEASONAL_WEEKS)
+    expected = score_loop(values, WINDOW, SEASONAL_WEEKS)
+
+    np.testing.assert_allclose(scores.score, expected, equal_nan=True)
+    assert np.isnan(scores.score[:, :WINDOW]).all()
+
+
+def test_planted_spike_is_the_only_anomaly():
+    values, spike = planted_spike_series()
+
+    scores = score_revenue_anomalies(values, window=WINDOW, seasonal_weeks=SEASONAL_WEEKS)
+    np.testing.assert_allclose(scores.score, score_loop(values, WINDOW, SEASONAL_WEEKS), equal_nan=True)
+
+    flagged = np.argwhere(np.abs(np.nan_to_num(scores.score, nan=0.0)) >= THRESHOLD)
+    assert [tuple(index) for index in flagged] == [spike]
+    assert scores.delta[spike] > 0
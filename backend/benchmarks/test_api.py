@@ -0,0 +1,67 @@
+"""
+End-to-end latency and query-count benchmarks of every analytics route (see conftest.py)
+"""
+import statistics
+
+import pytest
+
+from app.main import app
+from benchmarks.api_cases import API_CASES, API_PREFIX
+from benchmarks.bench_churn_risk import percentile
+
+
+def latency_summary(samples_s: list[float], queries: int) -> dict:
+    """Baseline entry from pytest-benchmark samples (seconds)"""
+    samples_ms = [s * 1000 for s in samples_s]
+    return {
+        "p50_ms": round(statistics.median(samples_ms), 2),
+        "p95_ms": round(percentile(samples_ms, 95), 2),
+        "p99_ms": round(percentile(samples_ms, 99), 2),
+        "queries": queries
+    }
+
+
+def test_every_route_is_benchmarked():
+    """New analytics routes must get a case in benchmarks/api_cases.py"""
+    routes = {
+        route.path for route in app.routes
+        if route.path.startswith(API_PREFIX) and "GET" in getattr(route, "methods", set())
+    }
+    covered = {case.url for case in API_CASES}
+    assert routes - covered == set()
+
+
+def test_every_route_has_a_query_budget():
+    """Analytics routes must declare @query_budget (app/core/query_budget.py)"""
+    missing = {
+        route.path for route in app.routes
+        if route.path.startswith(API_PREFIX) and not hasattr(route.endpoint, "query_budget")
+    }
+    assert missing == set()
+
+
+def test_every_route_has_a_route_class():
+    """Analytics routes must declare @route_class (app/core/admission.py)"""
+    missing = {
+        route.path for route in app.routes
+        if route.path.startswith(API_PREFIX) and not hasattr(route.endpoint, "route_class")
+    }
+    assert missing == set()
+
+
+@pytest.mark.parametrize("case", API_CASES, ids=lambda case: case.name)
+def test_endpoint(benchmark, request, api, baseline, case):
+    # Warm-up request: checks the response and counts the queries it runs
+    response, queries = api.count_queries(case)
+    assert response.status_code == 200, response.text
+
+    benchmark.pedantic(
+        api.request,
+        args=(case,),
+        rounds=request.config.getoption("--bench-rounds"),
+        iterations=1
+    )
+
+    result = latency_summary(benchmark.stats.stats.data, queries)
+    benchmark.extra_info.update(result)
+    baseline.check(case.name, result)
@@ -0,0 +1,137 @@
+"""
+DisconnectMiddleware (app/core/disconnect.py) at the ASGI level; no database needed
+
+A client that goes away mid-request cancels the handler; the http.disconnect that
+servers report once a response is complete must not.
+"""
+import asyncio
+
+import httpx
+from fastapi import BackgroundTasks, FastAPI
+from fastapi.responses import StreamingResponse
+
+from app.core.disconnect import CLIENT_CLOSED_REQUEST, DisconnectMiddleware
+from app.core.metrics import http_requests_cancelled
+
+
+class Handlers:
+    """What the test app's handlers got to do"""
+
+    def __init__(self):
+        self.background_ran = asyncio.Event()
+        self.started = asyncio.Event()
+        self.cancelled = False
+
+
+def disconnect_app(handlers: Handlers) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/background")
+    async def background(tasks: BackgroundTasks):
+        async def after_response():
+            await asyncio.sleep(0.01)
+            handlers.background_ran.set()
+
+        tasks.add_task(after_response)
+        return {"ok": True}
+
+    @app.get("/slow")
+    async def slow():
+        handlers.started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            handlers.cancelled = True
+            raise
+        return {"ok": True}
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            yield b"first"
+            handlers.started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                handlers.cancelled = True
+                raise
+            yield b"never"
+
+        return StreamingResponse(chunks())
+
+    app.add_middleware(DisconnectMiddleware)
+    return app
+
+
+async def request_then_disconnect(app, path: str, disconnect: asyncio.Event) -> list[dict]:
+    """Run one GET through `app`; the client disconnects once `disconnect` is set"""
+    sent = []
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await disconnect.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+        "query_string": b"", "headers": [], "server": ("test", 80), "client": ("client", 1),
+    }
+    await asyncio.wait_for(app(scope, receive, send), 5)
+    return sent
+
+
+def cancelled_count(route: str) -> float:
+    return http_requests_cancelled.values.get(("GET", route), 0.0)
+
+
+async def test_completed_request_is_not_cancelled():
+    handlers = Handlers()
+    before = cancelled_count("/background")
+
+    # httpx's ASGI transport answers receive() with http.disconnect once the response is complete
+    transport = httpx.ASGITransport(app=disconnect_app(handlers))
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get("/background")
+
+    assert response.status_code == 200
+    await asyncio.wait_for(handlers.background_ran.wait(), 1)
+    assert cancelled_count("/background") == before
+
+
+async def test_disconnect_cancels_the_running_request():
+    handlers = Handlers()
+    disconnect = asyncio.Event()
+    before = cancelled_count("/slow")
+
+    request = asyncio.create_task(request_then_disconnect(disconnect_app(handlers), "/slow", disconnect))
+    await asyncio.wait_for(handlers.started.wait(), 1)
+    disconnect.set()
+    sent = await request
+
+    assert handlers.cancelled
+    assert [m["status"] for m in sent if m["type"] == "http.response.start"] == [CLIENT_CLOSED_REQUEST]
+    assert cancelled_count("/slow") == before + 1
+
+
+async def test_disconnect_mid_stream_cancels_without_a_second_response():
+    handlers = Handlers()
+    disconnect = asyncio.Event()
+    before = cancelled_count("/stream")
+
+    request = asyncio.create_task(request_then_disconnect(disconnect_app(handlers), "/stream", disconnect))
+    await asyncio.wait_for(handlers.started.wait(), 1)
+    disconnect.set()
+    sent = await request
+
+    assert handlers.cancelled
+    assert [m["status"] for m in sent if m["type"] == "http.response.start"] == [200]
+    assert [m.get("body") for m in sent if m["type"] == "http.response.body"][0] == b"first"
+    assert cancelled_count("/stream") == before + 1
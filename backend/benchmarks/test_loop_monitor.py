@@ -0,0 +1,69 @@
+"""
+Event loop lag monitor (app/core/loop_monitor.py); no database needed
+
+Lag and block counting are driven through tick(now) with fake timestamps; only the
+watchdog test blocks the real loop, to check the stack it captures mid-block.
+"""
+import asyncio
+import json
+import time
+
+from app.core.loop_monitor import LoopMonitor
+from app.core.metrics import event_loop_blocks, event_loop_lag
+
+
+def lag_observations() -> int:
+    return sum(sum(counts) for counts, _ in event_loop_lag.series.values())
+
+
+def blocks_total() -> float:
+    return event_loop_blocks.values.get((), 0.0)
+
+
+def test_lag_is_the_delay_past_the_interval():
+    monitor = LoopMonitor(interval_ms=100, threshold_ms=50)
+    observations = lag_observations()
+
+    # On time, early (clamped to 0), then 30 ms late
+    lags = [monitor.tick(now) for now in (0.1, 0.15, 0.28)]
+
+    assert [round(lag, 6) for lag in lags] == [0.0, 0.0, 0.03]
+    assert monitor.last_lag == lags[-1]
+    assert monitor.blocks == 0
+    assert lag_observations() == observations + 3
+
+
+def test_lags_over_the_threshold_count_as_blocks(capsys):
+    monitor = LoopMonitor(interval_ms=100, threshold_ms=50)
+    blocks = blocks_total()
+
+    monitor.tick(0.149)  # 49 ms late
+    monitor.tick(0.31)   # 61 ms
+    monitor.tick(0.41)
+    monitor.tick(1.0)    # 490 ms
+
+    assert monitor.blocks == 2
+    assert blocks_total() == blocks + 2
+    # Stacks are only logged with capture_stacks (DEBUG)
+    assert capsys.readouterr().out == ""
+
+
+async def test_watchdog_logs_the_blocking_stack(capsys):
+    monitor = LoopMonitor(interval_ms=10, threshold_ms=50, capture_stacks=True)
+
+    def blocking_call():
+        time.sleep(0.3)
+
+    monitor.start()
+    try:
+        await asyncio.sleep(0.05)
+        blocking_call()
+        await asyncio.sleep(0.05)
+    finally:
+        await monitor.stop()
+
+    reports = [json.loads(line) for line in capsys.readouterr().out.splitlines() if "event_loop_blocked" in line]
+    assert monitor.blocks >= 1
+    blocked = max(reports, key=lambda report: report["lag_ms"])
+    assert blocked["lag_ms"] >= 250
+    assert any(entry.endswith("in blocking_call") for entry in blocked["stack"])
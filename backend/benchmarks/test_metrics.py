@@ -0,0 +1,78 @@
+"""
+Prometheus text exposition of the metrics registry (app/core/metrics.py); no database needed
+"""
+from app.core.metrics import Counter, Gauge, Histogram, MetricsRegistry
+
+
+async def test_histogram_buckets_are_cumulative_up_to_inf():
+    registry = MetricsRegistry()
+    latency = registry.register(Histogram("latency_seconds", "Request latency", ("route",), buckets=(0.1, 0.5)))
+    for value in (0.05, 0.1, 0.3, 2.0):
+        latency.observe("/a", value=value)
+
+    assert await registry.render() == (
+        "# HELP latency_seconds Request latency\n"
+        "# TYPE latency_seconds histogram\n"
+        'latency_seconds_bucket{route="/a",le="0.1"} 2\n'
+        'latency_seconds_bucket{route="/a",le="0.5"} 3\n'
+        'latency_seconds_bucket{route="/a",le="+Inf"} 4\n'
+        'latency_seconds_sum{route="/a"} 2.45\n'
+        'latency_seconds_count{route="/a"} 4\n'
+    )
+
+
+async def test_unlabelled_histogram_without_observations_renders_no_samples():
+    registry = MetricsRegistry()
+    registry.register(Histogram("empty_seconds", "Nothing yet", buckets=(1.0,)))
+    registry.register(Histogram("lag_seconds", "Loop lag", buckets=(1.0,))).observe(value=1.0)
+
+    assert (await registry.render()).splitlines() == [
+        "# HELP empty_seconds Nothing yet",
+        "# TYPE empty_seconds histogram",
+        "# HELP lag_seconds Loop lag",
+        "# TYPE lag_seconds histogram",
+        'lag_seconds_bucket{le="1"} 1',
+        'lag_seconds_bucket{le="+Inf"} 1',
+        "lag_seconds_sum 1",
+        "lag_seconds_count 1",
+    ]
+
+
+async def test_label_values_are_escaped():
+    registry = MetricsRegistry()
+    errors = registry.register(Counter("errors_total", "Errors", ("method", "error")))
+    errors.inc("Engine.run", 'relation "x"\\y\nmissing')
+    errors.inc("Engine.run", 'relation "x"\\y\nmissing', amount=2)
+
+    assert (await registry.render()).splitlines()[-1] == (
+        'errors_total{method="Engine.run",error="relation \\"x\\"\\\\y\\nmissing"} 3'
+    )
+
+
+async def test_gauges_and_failing_collectors():
+    registry = MetricsRegistry()
+    connections = registry.register(Gauge("connections", "Pool connections", ("state",)))
+    ratio = registry.register(Gauge("hit_ratio", "Buffer cache hit ratio"))
+
+    async def collect_pool():
+        connections.set("open", value=4)
+        connections.inc("idle", amount=3)
+        connections.dec("idle")
+
+    async def collect_buffer_cache():
+        raise ConnectionError("database is down")
+
+    registry.add_collector(collect_buffer_cache)
+    registry.add_collector(collect_pool)
+    ratio.set(value=0.75)
+
+    # The failing collector keeps its last value; the others still run
+    assert (await registry.render()).splitlines() == [
+        "# HELP connections Pool connections",
+        "# TYPE connections gauge",
+        'connections{state="idle"} 2',
+        'connections{state="open"} 4',
+        "# HELP hit_ratio Buffer cache hit ratio",
+        "# TYPE hit_ratio gauge",
+        "hit_ratio 0.75",
+    ]
@@ -0,0 +1,44 @@
+"""
+Idle detection of the sampling profiler (app/core/profiler.py); no database needed
+
+Idle samples must be recognized on the stdlib loop (leaf in BaseSelector.select)
+and on uvloop, which waits for I/O in C below the frame that entered the loop.
+"""
+import asyncio
+import threading
+
+import pytest
+
+from app.core.profiler import SamplingProfiler, loop_entry_code
+
+
+async def profile_sleeping_loop() -> SamplingProfiler:
+    """Samples the current loop while it only waits"""
+    profiler = SamplingProfiler(
+        threading.get_ident(),
+        interval=0.002,
+        idle_code=loop_entry_code(asyncio.get_running_loop())
+    )
+    profiler.start()
+    await asyncio.sleep(0.2)
+    profiler.stop()
+    return profiler
+
+
+def assert_mostly_idle(profiler: SamplingProfiler):
+    # Only the samples taken while start() and stop() run are not idle
+    assert profiler.samples > 20
+    assert profiler.samples - profiler.idle_samples <= 2
+    assert sum(profiler.stacks.values()) == profiler.samples - profiler.idle_samples
+
+
+def test_idle_stdlib_loop():
+    profiler = asyncio.run(profile_sleeping_loop())
+    assert_mostly_idle(profiler)
+
+
+def test_idle_uvloop():
+    uvloop = pytest.importorskip("uvloop")
+    profiler = uvloop.run(profile_sleeping_loop())
+    assert profiler.idle_code is not None
+    assert_mostly_idle(profiler)
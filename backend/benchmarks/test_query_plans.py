@@ -0,0 +1,30 @@
+"""
+Query plan regression checks of every engine method and detector (see query_plans.py)
+
+Fails on sequential scans of `sales` and on plans reading more buffers than the
+snapshot's budget; plan shape changes are reported as warnings.
+"""
+import warnings
+
+import pytest
+
+from benchmarks.plan_cases import PLAN_CASES
+from benchmarks.query_plans import PlanRecorder, summarize
+
+
+@pytest.mark.parametrize("case", PLAN_CASES, ids=lambda case: case.name)
+def test_query_plan(bench_loop, bench_pool, plan_snapshot, case):
+    recorder = PlanRecorder(bench_pool)
+    bench_loop.run_until_complete(case.call(recorder))
+    assert recorder.plans, f"{case.name} ran no query"
+
+    failures = []
+    for index, explained in enumerate(recorder.plans):
+        key = case.name if len(recorder.plans) == 1 else f"{case.name}#{index}"
+        problems, changes = plan_snapshot.check(key, summarize(explained), case.allow_seq_scan)
+        failures.extend(problems)
+        for change in changes:
+            warnings.warn(change)
+
+    if failures:
+        pytest.fail("\n".join(failures))
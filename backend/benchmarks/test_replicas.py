@@ -0,0 +1,223 @@
+"""
+Read replica routing and lag-aware fallback (app/core/database.py)
+
+The routing rules are tested on their own first. The rest needs a second
+PostgreSQL: --replica-dsn. With a streaming replica of --bench-dsn
+(pg_basebackup -R) replay lag is measured for real; a standalone instance gets the
+benchmark dataset seeded and is treated as a replica with no lag.
+"""
+import asyncio
+from datetime import date, datetime, timedelta
+
+import asyncpg
+import pytest
+
+from app.core.config import settings
+from app.core.database import Database, _reads_recent_data, read_from_primary
+from benchmarks.conftest import SCALES
+from benchmarks.seed import create_pool, seed_dataset
+
+
+PAST = date.today() - timedelta(days=365)
+
+
+# ============================================================================
+# ROUTING RULES (no database)
+# ============================================================================
+
+SALES_SINCE = "SELECT count(*) FROM sales WHERE created_at >= $1 AND created_at < $2"
+
+
+@pytest.mark.parametrize("query, args, recent", [
+    (SALES_SINCE, (PAST, PAST + timedelta(days=30)), False),
+    (SALES_SINCE, (PAST, date.today() - timedelta(days=1)), False),
+    # Engines bind the exclusive end (end_date + 1 day): a period ending yesterday reaches today
+    (SALES_SINCE, (PAST, date.today()), True),
+    (SALES_SINCE, (PAST, date.today() + timedelta(days=30)), True),
+    (SALES_SINCE, (datetime.now() - timedelta(days=2), datetime.now()), True),
+    (SALES_SINCE, (datetime.combine(PAST, datetime.min.time()), PAST), False),
+    ("SELECT id FROM stores WHERE brand_id = $1", (3,), False),
+    ("SELECT count(*) FROM sales WHERE created_at >= CURRENT_DATE - 7", (), True),
+    ("SELECT count(*) FROM sales WHERE created_at >= current_date - $1", (7,), True),
+    ("SELECT now() - MAX(created_at) FROM sales", (), True),
+    ("SELECT NOW ( ) - MAX(created_at) FROM sales", (), True),
+    ("SELECT * FROM sales WHERE created_at < CURRENT_TIMESTAMP", (), True),
+    ("SELECT known_customers, snow(1) FROM stats", (), False),
+])
+def test_reads_recent_data(query, args, recent):
+    assert _reads_recent_data(query, args) is recent
+
+
+def routed(*lags) -> Database:
+    """Database with one connected replica per lag (None: check failed), without servers"""
+    database = Database(read_urls=[f"postgresql://replica-{i}" for i in range(len(lags))])
+    for replica, lag in zip(database.replicas, lags):
+        replica.pool = object()
+        replica.lag_seconds = lag
+    return database
+
+
+def target(database: Database, query: str, *args) -> str:
+    replica = database._read_target(query, args)
+    return replica.name if replica else "primary"
+
+
+def test_read_target_round_robins_healthy_replicas():
+    database = routed(0.0, 0.5)
+    assert [target(database, SALES_SINCE, PAST, date.today()) for _ in range(4)] == [
+        "replica-1", "replica-0", "replica-1", "replica-0"
+    ]
+    assert target(Database(read_urls=[]), SALES_SINCE, PAST, PAST) == "primary"
+
+
+def test_read_target_keeps_recent_reads_off_lagging_replicas():
+    lagging = settings.REPLICA_MAX_LAG_SECONDS + 1
+    database = routed(lagging, 0.0)
+    recent = [
+        (SALES_SINCE, PAST, date.today()),
+        ("SELECT count(*) FROM sales WHERE created_at >= CURRENT_DATE", ),
+        ("SELECT now() - MAX(created_at) FROM sales", ),
+    ]
+    for query, *args in recent:
+        assert target(database, query, *args) == "replica-1"
+
+    # Past data is fine on any replica
+    assert {target(database, SALES_SINCE, PAST, PAST) for _ in range(2)} == {"replica-0", "replica-1"}
+
+    database = routed(lagging)
+    assert target(database, SALES_SINCE, PAST, date.today()) == "primary"
+    assert target(database, "SELECT * FROM sales WHERE created_at >= CURRENT_DATE - 1") == "primary"
+    assert target(database, SALES_SINCE, PAST, PAST) == "replica-0"
+
+
+def test_read_target_skips_unavailable_replicas():
+    database = routed(None, 0.0)
+    database.replicas.append(routed(0.0).replicas[0])
+    database.replicas[-1].pool = None
+    assert {target(database, SALES_SINCE, PAST, PAST) for _ in range(3)} == {"replica-1"}
+
+    with read_from_primary():
+        assert target(database, SALES_SINCE, PAST, PAST) == "primary"
+
+
+# ============================================================================
+# AGAINST A REPLICA (--replica-dsn)
+# ============================================================================
+
+
+class ServerLog:
+    """Server of each query (query hook)"""
+
+    def __init__(self):
+        self.servers = []
+
+    def record(self, event):
+        self.servers.append(event.server)
+
+    def take(self) -> list[str]:
+        servers, self.servers = self.servers, []
+        return servers
+
+
+@pytest.fixture(scope="session")
+def replica_pool(request, bench_loop, bench_pool, scale):
+    dsn = request.config.getoption("--replica-dsn")
+    if not dsn:
+        pytest.skip("--replica-dsn not given")
+    schema = f"bench_api_{scale}"
+
+    async def setup():
+        conn = await asyncpg.connect(dsn)
+        try:
+            if not await conn.fetchval("SELECT pg_is_in_recovery()"):
+                await seed_dataset(conn, schema, **SCALES[scale])
+        finally:
+            await conn.close()
+        return await create_pool(dsn, schema, min_size=1, max_size=2)
+
+    pool = bench_loop.run_until_complete(setup())
+    yield pool
+    bench_loop.run_until_complete(pool.close())
+
+
+@pytest.fixture
+def replicated(request, bench_loop, bench_pool, replica_pool):
+    """Database on the benchmark pool with one replica, and the server log of its queries"""
+    database = Database(read_urls=[request.config.getoption("--replica-dsn")])
+    database.pool = bench_pool
+    database.replicas[0].pool = replica_pool
+    bench_loop.run_until_complete(database.check_replica_lag())
+    log = ServerLog()
+    database.add_query_hook(log.record)
+    return database, log
+
+
+def test_reads_go_to_replica_and_writes_to_primary(bench_loop, replicated):
+    database, log = replicated
+    assert database.replicas[0].lag_seconds is not None
+
+    async def run():
+        await database.fetch_one("SELECT count(*) FROM sales WHERE created_at < $1", PAST)
+        await database.fetch_all("SELECT id FROM stores")
+        await database.execute("SELECT 1")
+        with read_from_primary():
+            await database.fetch_all("SELECT id FROM stores")
+
+    bench_loop.run_until_complete(run())
+    assert log.take() == ["replica-0", "replica-0", "primary", "primary"]
+
+
+def test_lagging_replica_only_serves_past_data(bench_loop, replicated):
+    database, log = replicated
+    database.replicas[0].lag_seconds = settings.REPLICA_MAX_LAG_SECONDS + 1
+
+    async def run():
+        await database.fetch_one("SELECT count(*) FROM sales WHERE created_at < $1", PAST)
+        await database.fetch_one("SELECT count(*) FROM sales WHERE created_at < $1", date.today() + timedelta(days=1))
+        await database.fetch_one("SELECT count(*) FROM sales WHERE created_at >= CURRENT_DATE - 7")
+
+    bench_loop.run_until_complete(run())
+    assert log.take() == ["replica-0", "primary", "primary"]
+
+    # Unreachable replica: everything on the primary
+    database.replicas[0].lag_seconds = None
+    bench_loop.run_until_complete(database.fetch_one("SELECT count(*) FROM sales WHERE created_at < $1", PAST))
+    assert log.take() == ["primary"]
+
+
+def test_replay_lag_is_measured(bench_loop, bench_pool, replica_pool, replicated):
+    database, _ = replicated
+
+    async def run():
+        if not await replica_pool.fetchval("SELECT pg_is_in_recovery()"):
+            pytest.skip("--replica-dsn is not a streaming replica")
+        await replica_pool.execute("SELECT pg_wal_replay_pause()")
+        try:
+            await bench_pool.execute("CREATE TABLE replica_probe (at timestamptz DEFAULT now())")
+            # The pause takes effect at the next WAL record replayed
+            for _ in range(50):
+                if await replica_pool.fetchval("SELECT pg_get_wal_replay_pause_state()") == "paused":
+                    break
+                await asyncio.sleep(0.1)
+            await asyncio.sleep(1)
+            await bench_pool.execute("INSERT INTO replica_probe DEFAULT VALUES")
+            for _ in range(50):
+                await database.check_replica_lag()
+                if database.replicas[0].lag_seconds:
+                    break
+                await asyncio.sleep(0.1)
+            paused_lag = database.replicas[0].lag_seconds
+        finally:
+            await replica_pool.execute("SELECT pg_wal_replay_resume()")
+            await bench_pool.execute("DROP TABLE IF EXISTS replica_probe")
+
+        for _ in range(50):
+            await database.check_replica_lag()
+            if database.replicas[0].lag_seconds == 0:
+                break
+            await asyncio.sleep(0.1)
+        return paused_lag, database.replicas[0].lag_seconds
+
+    paused_lag, caught_up_lag = bench_loop.run_until_complete(run())
+    assert paused_lag > 0
+    assert caught_up_lag == 0
@@ -0,0 +1,76 @@
+"""
+Request tracing (app/core/tracing.py): span nesting, Server-Timing and OTLP/JSON output;
+no database needed
+"""
+import httpx
+from fastapi import FastAPI
+
+from app.core.config import settings
+from app.core.database import QueryEvent
+from app.core.tracing import Span, Trace, TracingMiddleware, record_query, server_timing, span, to_otlp
+
+
+def fixed_trace() -> Trace:
+    """Route span with an engine method and one of its queries, 1 ms = 1_000_000 ns"""
+    return Trace("0af7651916cd43dd8448eb211c80319c", [
+        Span("b7ad6b7169203331", "a1a1a1a1a1a1a1a1", "Engine.overview", "engine", 1_000_000, 9_000_000),
+        Span("c3c3c3c3c3c3c3c3", "b7ad6b7169203331", "Engine.overview", "db", 2_000_000, 6_500_000,
+             {"db.operation": "SELECT", "db.rows": 12, "db.acquire_ms": 0.25, "error": "QueryCanceledError"}),
+        Span("a1a1a1a1a1a1a1a1", None, "GET /overview", "route", 0, 10_000_000, {"http.status_code": 200}),
+    ])
+
+
+def test_server_timing_lists_total_then_spans_in_start_order():
+    assert server_timing(fixed_trace()) == (
+        "total;dur=10.0, "
+        'engine-1;dur=8.0;desc="Engine.overview", '
+        'db-2;dur=4.5;desc="Engine.overview [12 rows; 0.2ms pool wait]"'
+    )
+
+
+def test_otlp_export_keeps_parents_kinds_and_errors():
+    spans = {s["spanId"]: s for s in to_otlp(fixed_trace())["resourceSpans"][0]["scopeSpans"][0]["spans"]}
+    route, engine, query = spans["a1a1a1a1a1a1a1a1"], spans["b7ad6b7169203331"], spans["c3c3c3c3c3c3c3c3"]
+
+    assert "parentSpanId" not in route and route["kind"] == 2
+    assert engine["parentSpanId"] == route["spanId"] and engine["kind"] == 1
+    assert query["parentSpanId"] == engine["spanId"] and query["kind"] == 3
+    assert query["status"] == {"code": 2} and "status" not in engine
+    assert (query["startTimeUnixNano"], query["endTimeUnixNano"]) == ("2000000", "6500000")
+    assert {a["key"]: a["value"] for a in query["attributes"]} == {
+        "span.kind": {"stringValue": "db"},
+        "db.operation": {"stringValue": "SELECT"},
+        "db.rows": {"intValue": "12"},
+        "db.acquire_ms": {"doubleValue": 0.25},
+        "error": {"stringValue": "QueryCanceledError"},
+    }
+
+
+def test_spans_outside_a_trace_are_no_ops():
+    with span("Engine.overview", "engine") as current:
+        assert current is None
+    record_query(QueryEvent("Engine.overview", "SELECT", "SELECT 1", (), 0.1, 1.0, 1))
+
+
+async def test_debug_header_returns_server_timing(monkeypatch):
+    monkeypatch.setattr(settings, "DEBUG_TIMINGS_ENABLED", True)
+    app = FastAPI()
+
+    @app.get("/overview")
+    async def overview():
+        with span("Engine.overview", "engine"):
+            # Query spans end when the hook runs: a zero-length one starts inside the engine span
+            record_query(QueryEvent("Engine.overview", "SELECT", "SELECT 1", (), 0.0, 0.0, 3))
+        return {"ok": True}
+
+    app.add_middleware(TracingMiddleware)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        plain = await client.get("/overview")
+        debug = await client.get("/overview", headers={"X-Debug-Timings": "1", "Origin": "http://dashboard"})
+
+    assert "server-timing" not in plain.headers
+    entries = debug.headers["server-timing"].split(", ")
+    assert entries[0].startswith("total;dur=")
+    assert entries[1].startswith("engine-1;dur=") and entries[1].endswith('desc="Engine.overview"')
+    assert entries[2] == 'db-2;dur=0.0;desc="Engine.overview [3 rows; 0.0ms pool wait]"'
+    assert debug.headers["timing-allow-origin"] == "http://dashboard"
@@ -30,6 +30,13 @@ CREATE INDEX IF NOT EXISTS idx_sales_store_status_customer
     ON sales(store_id, sale_status_desc, customer_id) 
     WHERE customer_id IS NOT NULL;
 
+-- Índice de cobertura para RFM / churn paginados (keyset): agrega por cliente
+-- com index-only scan sobre as vendas concluídas, sem tocar o heap
+CREATE INDEX IF NOT EXISTS idx_sales_completed_customer_covering
+    ON sales(customer_id, created_at)
+    INCLUDE (id, store_id, channel_id, total_amount, customer_name)
+    WHERE sale_status_desc = 'COMPLETED' AND customer_id IS NOT NULL;
+
 -- Channels (para queries de canal favorito)
 CREATE INDEX IF NOT EXISTS idx_channels_id ON channels(id);
 
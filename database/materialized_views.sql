@@ -0,0 +1,68 @@
+-- ============================================================================
+-- MATERIALIZED VIEWS PARA AGREGAÇÕES PESADAS
+-- ============================================================================
+-- Created: 2025-11-03
+-- Purpose: Pré-agregar as consultas mais pesadas (performance por loja,
+--          delivery por região e heatmap dia da semana x hora).
+--
+-- Cada view tem um índice UNIQUE (apenas colunas, sem expressão/WHERE) para
+-- permitir REFRESH MATERIALIZED VIEW CONCURRENTLY sem bloquear leituras.
+-- O refresh é feito periodicamente pelo scheduler do backend
+-- (app/services/materialized_views.py), que registra a última atualização
+-- em materialized_view_refreshes.
+
+-- ----------------------------------------------------------------------------
+-- Vendas concluídas por dia x hora x loja x canal
+-- Usada por: /stores/performance e /sales/heatmap
+-- ----------------------------------------------------------------------------
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_sales_hourly AS
+SELECT
+    s.created_at::date AS sale_date,
+    EXTRACT(HOUR FROM s.created_at)::INT AS hour,
+    s.store_id,
+    s.channel_id,
+    COUNT(*) AS total_sales,
+    SUM(s.total_amount) AS total_revenue
+FROM sales s
+WHERE s.sale_status_desc = 'COMPLETED'
+GROUP BY 1, 2, 3, 4;
+
+CREATE UNIQUE INDEX IF NOT EXISTS ux_mv_sales_hourly
+    ON mv_sales_hourly (sale_date, hour, store_id, channel_id);
+
+-- ----------------------------------------------------------------------------
+-- Entregas concluídas por dia x loja x canal x cidade/estado
+-- Usada por: /delivery/performance (bloco "by_region")
+-- Somas e contagens são guardadas separadamente para que as médias
+-- possam ser recombinadas exatamente em qualquer recorte de filtros.
+-- ----------------------------------------------------------------------------
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_delivery_region_daily AS
+SELECT
+    s.created_at::date AS sale_date,
+    s.store_id,
+    s.channel_id,
+    da.city,
+    da.state,
+    COUNT(*) AS total_deliveries,
+    SUM(s.delivery_seconds) AS delivery_seconds_sum,
+    COUNT(s.delivery_seconds) AS delivery_seconds_count,
+    SUM(s.production_seconds) AS production_seconds_sum,
+    COUNT(s.production_seconds) AS production_seconds_count,
+    COUNT(*) FILTER (WHERE (s.delivery_seconds + s.production_seconds) <= 2700) AS on_time_deliveries
+FROM sales s
+JOIN delivery_sales ds ON ds.sale_id = s.id
+JOIN delivery_addresses da ON da.sale_id = s.id
+WHERE s.sale_status_desc = 'COMPLETED'
+GROUP BY 1, 2, 3, 4, 5;
+
+CREATE UNIQUE INDEX IF NOT EXISTS ux_mv_delivery_region_daily
+    ON mv_delivery_region_daily (sale_date, store_id, channel_id, city, state);
+
+-- ----------------------------------------------------------------------------
+-- Registro de frescor (atualizado a cada refresh)
+-- ----------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS materialized_view_refreshes (
+    view_name VARCHAR(100) PRIMARY KEY,
+    refreshed_at TIMESTAMP NOT NULL,
+    duration_ms INTEGER NOT NULL
+);
@@ -15,6 +15,7 @@ interface ChurnRiskResponse {
   period: {
     analysis_date: string
   }
+  next_cursor: string | null
 }
 
 interface ChurnRiskTableProps {
@@ -35,12 +36,12 @@ export function ChurnRiskTable({
 
   const { data, isLoading } = useQuery<ChurnRiskResponse>({
     queryKey: ['churn-risk', minPurchases, daysInactive, limit, storeIds, brandId],
-    queryFn: () => fetchApi<ChurnRiskResponse>('/customers/churn-risk', {
+    queryFn: ({ signal }) => fetchApi<ChurnRiskResponse>('/customers/churn-risk', {
       min_purchases: minPurchases,
       days_inactive: daysInactive,
       limit,
       store_ids: storeIds && storeIds.length > 0 ? storeIds : undefined,
-    }),
+    }, signal),
     enabled: !!brandId,
   })
 
@@ -48,56 +48,56 @@ export function Dashboard({ onNavigateToAdvanced }: DashboardProps) {
 
   const { data: overview, isLoading: overviewLoading } = useQuery<OverviewResponse>({
     queryKey: ['overview', dateRange, brandId],
-    queryFn: () => fetchApi<OverviewResponse>('/overview', {
+    queryFn: ({ signal }) => fetchApi<OverviewResponse>('/overview', {
       start_date: dateRange.startDate,
       end_date: dateRange.endDate,
       store_ids: dateRange.storeIds,
       channel_ids: dateRange.channelIds,
-    }),
+    }, signal),
     enabled: !!brandId,
   })
 
   const { data: trend, isLoading: trendLoading } = useQuery<TrendResponse>({
     queryKey: ['trend', dateRange, brandId],
-    queryFn: () => fetchApi<TrendResponse>('/sales/trend', {
+    queryFn: ({ signal }) => fetchApi<TrendResponse>('/sales/trend', {
       start_date: dateRange.startDate,
       end_date: dateRange.endDate,
       store_ids: dateRange.storeIds,
       channel_ids: dateRange.channelIds,
-    }),
+    }, signal),
     enabled: !!brandId,
   })
 
   const { data: channels, isLoading: channelsLoading } = useQuery<ChannelsResponse>({
     queryKey: ['channels', dateRange, brandId],
-    queryFn: () => fetchApi<ChannelsResponse>('/channels', {
+    queryFn: ({ signal }) => fetchApi<ChannelsResponse>('/channels', {
       start_date: dateRange.startDate,
       end_date: dateRange.endDate,
       store_ids: dateRange.storeIds,
-    }),
+    }, signal),
     enabled: !!brandId,
   })
 
   const { data: products } = useQuery<ProductsResponse>({
     queryKey: ['products', dateRange, brandId],
-    queryFn: () => fetchApi<ProductsResponse>('/products/top', {
+    queryFn: ({ signal }) => fetchApi<ProductsResponse>('/products/top', {
       start_date: dateRange.startDate,
       end_date: dateRange.endDate,
       limit: 5,
       store_ids: dateRange.storeIds,
       channel_ids: dateRange.channelIds,
-    }),
+    }, signal),
     enabled: !!brandId,
   })
 
   const { data: insights, isLoading: insightsLoading } = useQuery<InsightsResponse>({
     queryKey: ['insights', dateRange, brandId],
-    queryFn: () => fetchApi('/insights/automatic', {
+    queryFn: ({ signal }) => fetchApi('/insights/automatic', {
       start_date: dateRange.startDate,
       end_date: dateRange.endDate,
       store_ids: dateRange.storeIds,
       limit: 5
-    }),
+    }, signal),
     enabled: !!brandId,
     refetchInterval: 5 * 60 * 1000 // Atualizar a cada 5 minutos
   })
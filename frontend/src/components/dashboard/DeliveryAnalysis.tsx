@@ -30,7 +30,7 @@ export function DeliveryAnalysis({ startDate, endDate, contextFilters, storeIds
 
   const { data, isLoading } = useQuery<DeliveryPerformanceResponse>({
     queryKey: ['delivery-performance', startDate, endDate, contextFilters, storeIds, brandId],
-    queryFn: () => fetchApi<DeliveryPerformanceResponse>('/delivery/performance', {
+    queryFn: ({ signal }) => fetchApi<DeliveryPerformanceResponse>('/delivery/performance', {
       start_date: startDate,
       end_date: endDate,
       brand_id: brandId,
@@ -39,7 +39,7 @@ export function DeliveryAnalysis({ startDate, endDate, contextFilters, storeIds
       hour_end: contextFilters?.hourEnd,
       channel_id: contextFilters?.channelId,
       store_ids: storeIds && storeIds.length > 0 ? storeIds : undefined,
-    }),
+    }, signal),
     enabled: !!brandId,
   })
 
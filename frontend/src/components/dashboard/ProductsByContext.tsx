@@ -34,7 +34,7 @@ export function ProductsByContext({ startDate, endDate, contextFilters, storeIds
 
   const { data, isLoading } = useQuery<ProductsByContextResponse>({
     queryKey: ['products-context', startDate, endDate, contextFilters, storeIds, brandId],
-    queryFn: () =>
+    queryFn: ({ signal }) =>
       fetchApi<ProductsByContextResponse>('/products/by-context', {
         start_date: startDate,
         end_date: endDate,
@@ -44,7 +44,7 @@ export function ProductsByContext({ startDate, endDate, contextFilters, storeIds
         channel_id: contextFilters.channelId,
         store_ids: storeIds && storeIds.length > 0 ? storeIds : undefined,
         limit: 5,
-      }),
+      }, signal),
     enabled: hasContextFilters && !!brandId,
   })
 
@@ -36,7 +36,7 @@ export function StorePerformanceComparison({
 
   const { data, isLoading } = useQuery<StorePerformanceResponse>({
     queryKey: ['store-performance', startDate, endDate, contextFilters, storeIds, brandId],
-    queryFn: () => fetchApi<StorePerformanceResponse>('/stores/performance', {
+    queryFn: ({ signal }) => fetchApi<StorePerformanceResponse>('/stores/performance', {
       start_date: startDate,
       end_date: endDate,
       brand_id: brandId,
@@ -45,7 +45,7 @@ export function StorePerformanceComparison({
       hour_end: contextFilters?.hourEnd,
       channel_id: contextFilters?.channelId,
       store_ids: storeIds && storeIds.length > 0 ? storeIds : undefined,
-    }),
+    }, signal),
     enabled: !!brandId,
   })
 
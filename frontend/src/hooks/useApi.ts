@@ -5,9 +5,16 @@ const API_BASE_URL = import.meta.env.VITE_API_URL
   ? `${import.meta.env.VITE_API_URL}/api/v1/analytics`
   : '/api/v1/analytics'
 
+// Opt-in em dev (VITE_DEBUG_TIMINGS=true, backend com DEBUG_TIMINGS_ENABLED=true): pede o header
+// Server-Timing e o devtools mostra o tempo de cada engine, detector e query na aba Timing.
+// Desligado por padrão: com VITE_API_URL em outra origem, o header custom gera um preflight CORS por chamada
+const DEBUG_HEADERS: HeadersInit | undefined = import.meta.env.DEV && import.meta.env.VITE_DEBUG_TIMINGS === 'true'
+  ? { 'X-Debug-Timings': '1' }
+  : undefined
+
 interface UseApiReturn {
   buildUrl: (endpoint: string, params?: Record<string, any>) => string
-  fetchApi: <T>(endpoint: string, params?: Record<string, any>) => Promise<T>
+  fetchApi: <T>(endpoint: string, params?: Record<string, any>, signal?: AbortSignal) => Promise<T>
 }
 
 /**
@@ -53,15 +60,19 @@ export function useApi(): UseApiReturn {
 
   /**
    * Faz uma requisição GET à API
+   *
+   * Passe o `signal` do React Query: ao trocar filtros a requisição antiga é
+   * abortada e o backend cancela a query em andamento.
    */
   const fetchApi = useCallback(async <T>(
     endpoint: string,
-    params?: Record<string, any>
+    params?: Record<string, any>,
+    signal?: AbortSignal
   ): Promise<T> => {
     const url = buildUrl(endpoint, params)
     
     try {
-      const response = await fetch(url)
+      const response = await fetch(url, { headers: DEBUG_HEADERS, signal })
       
       if (!response.ok) {
         throw new Error(`API Error: ${response.status} ${response.statusText}`)